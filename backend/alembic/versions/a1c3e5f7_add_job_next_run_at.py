@@ -0,0 +1,56 @@
+"""Add next_run_at to jobs
+
+Revision ID: a1c3e5f7
+Revises: f0a2b4c6
+Create Date: 2025-01-29 10:00:00.000000
+
+"""
+from datetime import datetime, timedelta
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a1c3e5f7'
+down_revision: Union[str, Sequence[str], None] = 'f0a2b4c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_INTERVALS = {
+    "hourly": timedelta(hours=1),
+    "every_6_hours": timedelta(hours=6),
+    "every_12_hours": timedelta(hours=12),
+    "daily": timedelta(days=1),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('next_run_at', sa.DateTime(timezone=True), nullable=True))
+    op.create_index(op.f('ix_jobs_next_run_at'), 'jobs', ['next_run_at'], unique=False)
+
+    # Backfill active jobs from their last run; overdue ones follow the catch-up policy
+    bind = op.get_bind()
+    now = datetime.utcnow()
+    jobs = bind.execute(sa.text(
+        "SELECT id, frequency, last_run FROM jobs WHERE is_active = :active AND status != 'deleted'"
+    ), {"active": True}).fetchall()
+    for job_id, frequency, last_run in jobs:
+        interval = _INTERVALS.get(frequency, _INTERVALS["daily"])
+        if isinstance(last_run, str):
+            last_run = datetime.fromisoformat(last_run)
+        if last_run is not None and last_run.tzinfo is not None:
+            last_run = last_run.replace(tzinfo=None) - last_run.utcoffset()
+        next_run_at = (last_run or now) + interval
+        bind.execute(
+            sa.text("UPDATE jobs SET next_run_at = :next_run_at WHERE id = :id"),
+            {"next_run_at": next_run_at, "id": job_id}
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_jobs_next_run_at'), table_name='jobs')
+    op.drop_column('jobs', 'next_run_at')
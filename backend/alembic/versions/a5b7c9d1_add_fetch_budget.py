@@ -0,0 +1,36 @@
+"""Add fetch budget to jobs and page counts to executions
+
+Revision ID: a5b7c9d1
+Revises: f2a4c6e8
+Create Date: 2025-01-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a5b7c9d1'
+down_revision: Union[str, Sequence[str], None] = 'f2a4c6e8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('max_pages', sa.Integer(), nullable=True))
+    op.add_column('jobs', sa.Column('max_tweets', sa.Integer(), nullable=True))
+    op.add_column('jobs', sa.Column('max_api_calls', sa.Integer(), nullable=True))
+    op.add_column('job_executions', sa.Column('pages_fetched', sa.Integer(), nullable=True, server_default='0'))
+    op.add_column('job_executions', sa.Column('pages_skipped', sa.Integer(), nullable=True, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('job_executions', 'pages_skipped')
+    op.drop_column('job_executions', 'pages_fetched')
+    op.drop_column('jobs', 'max_api_calls')
+    op.drop_column('jobs', 'max_tweets')
+    op.drop_column('jobs', 'max_pages')
@@ -0,0 +1,27 @@
+"""Index jobs.updated_at for incremental scheduler resync
+
+Revision ID: b2d4f6a8
+Revises: a1c3e5f7
+Create Date: 2025-01-30 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b2d4f6a8'
+down_revision: Union[str, Sequence[str], None] = 'a1c3e5f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_jobs_updated_at'), 'jobs', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_jobs_updated_at'), table_name='jobs')
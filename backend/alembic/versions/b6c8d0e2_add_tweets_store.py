@@ -0,0 +1,56 @@
+"""Add tweets store and execution links
+
+Revision ID: b6c8d0e2
+Revises: a5b7c9d1
+Create Date: 2025-01-24 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6c8d0e2'
+down_revision: Union[str, Sequence[str], None] = 'a5b7c9d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'tweets',
+        sa.Column('tweet_id', sa.String(length=32), nullable=False),
+        sa.Column('username', sa.String(length=255), nullable=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('url', sa.String(length=512), nullable=True),
+        sa.Column('likes', sa.Integer(), nullable=True),
+        sa.Column('reposts', sa.Integer(), nullable=True),
+        sa.Column('posted_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('first_seen_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('tweet_id')
+    )
+    op.create_index(op.f('ix_tweets_username'), 'tweets', ['username'], unique=False)
+    op.create_index(op.f('ix_tweets_posted_at'), 'tweets', ['posted_at'], unique=False)
+
+    op.create_table(
+        'execution_tweets',
+        sa.Column('execution_id', sa.Integer(), nullable=False),
+        sa.Column('tweet_id', sa.String(length=32), nullable=False),
+        sa.ForeignKeyConstraint(['execution_id'], ['job_executions.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['tweet_id'], ['tweets.tweet_id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('execution_id', 'tweet_id')
+    )
+    op.create_index(op.f('ix_execution_tweets_tweet_id'), 'execution_tweets', ['tweet_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_execution_tweets_tweet_id'), table_name='execution_tweets')
+    op.drop_table('execution_tweets')
+    op.drop_index(op.f('ix_tweets_posted_at'), table_name='tweets')
+    op.drop_index(op.f('ix_tweets_username'), table_name='tweets')
+    op.drop_table('tweets')
@@ -0,0 +1,28 @@
+"""Add low-water mark to per-account tweet cursors
+
+Revision ID: c4e6a8b0
+Revises: b2d4f6a8
+Create Date: 2025-02-03 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e6a8b0'
+down_revision: Union[str, Sequence[str], None] = 'b2d4f6a8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('job_account_cursors', sa.Column('backfill_since', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('job_account_cursors', 'backfill_since')
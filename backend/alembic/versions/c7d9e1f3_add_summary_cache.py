@@ -0,0 +1,40 @@
+"""Add summary cache
+
+Revision ID: c7d9e1f3
+Revises: b6c8d0e2
+Create Date: 2025-01-25 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d9e1f3'
+down_revision: Union[str, Sequence[str], None] = 'b6c8d0e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'summary_cache',
+        sa.Column('fingerprint', sa.String(length=64), nullable=False),
+        sa.Column('model', sa.String(length=100), nullable=True),
+        sa.Column('headline', sa.Text(), nullable=True),
+        sa.Column('summary', sa.Text(), nullable=False),
+        sa.Column('input_tokens', sa.Integer(), nullable=True),
+        sa.Column('output_tokens', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.PrimaryKeyConstraint('fingerprint')
+    )
+    op.create_index(op.f('ix_summary_cache_created_at'), 'summary_cache', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_summary_cache_created_at'), table_name='summary_cache')
+    op.drop_table('summary_cache')
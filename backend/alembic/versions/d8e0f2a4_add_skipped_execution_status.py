@@ -0,0 +1,32 @@
+"""Add skipped execution status
+
+Revision ID: d8e0f2a4
+Revises: c7d9e1f3
+Create Date: 2025-01-26 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8e0f2a4'
+down_revision: Union[str, Sequence[str], None] = 'c7d9e1f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == "sqlite":
+        return
+    # ALTER TYPE ... ADD VALUE cannot run inside a transaction block on older PostgreSQL
+    with op.get_context().autocommit_block():
+        op.execute("ALTER TYPE executionstatus ADD VALUE IF NOT EXISTS 'SKIPPED'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # PostgreSQL cannot drop enum values; fold skipped runs into completed ones
+    op.execute("UPDATE job_executions SET status = 'COMPLETED' WHERE status = 'SKIPPED'")
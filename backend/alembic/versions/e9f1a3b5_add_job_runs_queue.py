@@ -0,0 +1,60 @@
+"""Add job runs queue
+
+Revision ID: e9f1a3b5
+Revises: d8e0f2a4
+Create Date: 2025-01-27 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e9f1a3b5'
+down_revision: Union[str, Sequence[str], None] = 'd8e0f2a4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    is_postgres = bind.dialect.name == "postgresql"
+    jobrunstatus_enum = sa.Enum('queued', 'running', 'completed', 'failed', name='jobrunstatus')
+    if is_postgres:
+        jobrunstatus_enum.create(bind, checkfirst=True)
+    op.create_table(
+        'job_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('status', jobrunstatus_enum, nullable=False, server_default='queued'),
+        sa.Column('scheduled_for', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('claimed_by', sa.String(length=255), nullable=True),
+        sa.Column('claimed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('finished_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('job_id', 'scheduled_for', name='uq_job_runs_job_slot')
+    )
+    op.create_index(op.f('ix_job_runs_id'), 'job_runs', ['id'], unique=False)
+    op.create_index(op.f('ix_job_runs_job_id'), 'job_runs', ['job_id'], unique=False)
+    op.create_index(op.f('ix_job_runs_status'), 'job_runs', ['status'], unique=False)
+    op.create_index(op.f('ix_job_runs_created_at'), 'job_runs', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    is_postgres = bind.dialect.name == "postgresql"
+    op.drop_index(op.f('ix_job_runs_created_at'), table_name='job_runs')
+    op.drop_index(op.f('ix_job_runs_status'), table_name='job_runs')
+    op.drop_index(op.f('ix_job_runs_job_id'), table_name='job_runs')
+    op.drop_index(op.f('ix_job_runs_id'), table_name='job_runs')
+    op.drop_table('job_runs')
+    if is_postgres:
+        sa.Enum(name='jobrunstatus').drop(bind, checkfirst=True)
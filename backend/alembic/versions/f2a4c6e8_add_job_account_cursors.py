@@ -0,0 +1,37 @@
+"""Add per-account tweet cursors for jobs
+
+Revision ID: f2a4c6e8
+Revises: e3f4b5c6
+Create Date: 2025-01-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a4c6e8'
+down_revision: Union[str, Sequence[str], None] = 'e3f4b5c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'job_account_cursors',
+        sa.Column('job_id', sa.Integer(), nullable=False),
+        sa.Column('username', sa.String(length=255), nullable=False),
+        sa.Column('last_tweet_id', sa.String(length=32), nullable=True),
+        sa.Column('last_tweet_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+        sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('job_id', 'username')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('job_account_cursors')
@@ -1,7 +1,6 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
 import os
 from dotenv import load_dotenv
 
@@ -13,10 +12,11 @@ if not DATABASE_URL:
     print("⚠️  WARNING: DATABASE_URL not set, using SQLite for development")
     DATABASE_URL = "sqlite:///./xtrack.db"
     SQLALCHEMY_DATABASE_URL = DATABASE_URL
+    # A connection per session (file database, default pool): DB work runs in worker
+    # threads, and one shared connection can't hold concurrent transactions
     engine = create_engine(
         DATABASE_URL,
-        connect_args={"check_same_thread": False},
-        poolclass=StaticPool
+        connect_args={"check_same_thread": False, "timeout": 30}
     )
 else:
     # Handle Railway's postgres:// vs postgresql://
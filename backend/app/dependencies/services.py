@@ -0,0 +1,37 @@
+from fastapi import HTTPException, status
+from app.services.registry import services
+from app.services.twitter_service import TwitterService
+from app.services.llm_service import LLMService
+from app.services.sendgrid_service import SendGridService
+from app.services.monitoring_service import MonitoringService
+
+
+def _resolve(name: str):
+    try:
+        return getattr(services, name)
+    except ValueError as e:
+        # Missing configuration (API keys) surfaces as 503 instead of a crash
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{name} service unavailable: {str(e)}",
+        )
+
+
+def get_twitter_service() -> TwitterService:
+    """Shared TwitterService instance"""
+    return _resolve("twitter")
+
+
+def get_llm_service() -> LLMService:
+    """Shared LLMService instance"""
+    return _resolve("llm")
+
+
+def get_email_service() -> SendGridService:
+    """Shared SendGridService instance"""
+    return _resolve("email")
+
+
+def get_monitoring_service() -> MonitoringService:
+    """Shared MonitoringService instance (uses the shared clients above)"""
+    return _resolve("monitoring")
@@ -3,6 +3,8 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.routers import jobs, monitoring, auth, notifications
 from app.scheduler import scheduler
+from app.services.http_client import close_http_session
+from app.services.registry import services
 from app.database import engine
 from app.models import Base
 
@@ -40,6 +42,9 @@ async def startup_event():
     Base.metadata.create_all(bind=engine)
     print("[STARTUP] ✅ Database tables created")
     
+    print("[STARTUP] Initializing shared services...")
+    services.warm_up()
+    
     print("[STARTUP] Starting job scheduler...")
     scheduler.start()
     print("[STARTUP] ✅ Application started successfully")
@@ -49,6 +54,7 @@ async def shutdown_event():
     """Stop the job scheduler on application shutdown"""
     print("[SHUTDOWN] Stopping job scheduler...")
     scheduler.stop()
+    close_http_session()
     print("[SHUTDOWN] ✅ Application shutdown complete")
 
 @app.get("/")
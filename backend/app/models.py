@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON, ARRAY, Enum
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON, ARRAY, Enum, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -34,6 +34,14 @@ class ExecutionStatus(str, enum.Enum):
     RUNNING = "running"      # Currently executing
     COMPLETED = "completed"  # Successfully completed
     FAILED = "failed"        # Failed with error
+    SKIPPED = "skipped"      # No new tweets; nothing summarized
+
+class JobRunStatus(str, enum.Enum):
+    """Queued job run status"""
+    QUEUED = "queued"        # Waiting for a worker
+    RUNNING = "running"      # Claimed by a worker
+    COMPLETED = "completed"  # Finished (including skipped runs)
+    FAILED = "failed"        # Gave up after max attempts
 
 class NotificationChannel(str, enum.Enum):
     """Notification delivery channel"""
@@ -66,6 +74,10 @@ class Job(Base):
     topics = Column(JSON, default=list)  # Store as JSON for SQLite/PostgreSQL compatibility
     language = Column(String(20), nullable=False, default="en")
     email = Column(String(255), nullable=True)
+    # Per-job fetch budget (NULL = environment defaults)
+    max_pages = Column(Integer, nullable=True)       # Pages followed per account
+    max_tweets = Column(Integer, nullable=True)      # Tweets kept per account
+    max_api_calls = Column(Integer, nullable=True)   # Total twitterapi.io calls per run
     is_active = Column(Boolean, default=True, index=True)
     status = Column(
         Enum(
@@ -80,7 +92,8 @@ class Job(Base):
     notification_target_id = Column(Integer, ForeignKey("notification_targets.id", ondelete="SET NULL"), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_run = Column(DateTime(timezone=True), nullable=True)
-    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    next_run_at = Column(DateTime(timezone=True), nullable=True, index=True)  # NULL = not scheduled
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)  # Scheduler resync
     
     user = relationship("User", back_populates="jobs")
     summaries = relationship("Summary", back_populates="job", cascade="all, delete-orphan")
@@ -102,12 +115,15 @@ class JobExecution(Base):
     started_at = Column(DateTime(timezone=True), server_default=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
     tweets_fetched = Column(Integer, default=0)
+    pages_fetched = Column(Integer, default=0)
+    pages_skipped = Column(Integer, default=0)  # Cursors left unfollowed due to the budget
     error_message = Column(Text, nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     
     job = relationship("Job", back_populates="executions")
     summaries = relationship("Summary", back_populates="execution")
+    tweets = relationship("Tweet", secondary="execution_tweets", viewonly=True)
 
 class Summary(Base):
     __tablename__ = "summaries"
@@ -135,6 +151,87 @@ class Summary(Base):
     job = relationship("Job", back_populates="summaries")
     execution = relationship("JobExecution", back_populates="summaries")
 
+class Tweet(Base):
+    """Raw tweet fetched from X, stored once and shared across jobs and executions"""
+    __tablename__ = "tweets"
+
+    tweet_id = Column(String(32), primary_key=True)
+    username = Column(String(255), nullable=True, index=True)
+    text = Column(Text, nullable=False)
+    url = Column(String(512), nullable=True)
+    likes = Column(Integer, default=0)
+    reposts = Column(Integer, default=0)
+    posted_at = Column(DateTime(timezone=True), nullable=True, index=True)
+    first_seen_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class ExecutionTweet(Base):
+    __tablename__ = "execution_tweets"
+
+    execution_id = Column(Integer, ForeignKey("job_executions.id", ondelete="CASCADE"), primary_key=True)
+    tweet_id = Column(String(32), ForeignKey("tweets.tweet_id", ondelete="CASCADE"), primary_key=True, index=True)
+
+class SummaryCacheEntry(Base):
+    """LLM summary stored by content fingerprint (tweet ids, topics, language, model, prompt version)"""
+    __tablename__ = "summary_cache"
+
+    fingerprint = Column(String(64), primary_key=True)
+    model = Column(String(100), nullable=True)
+    headline = Column(Text, nullable=True)
+    summary = Column(Text, nullable=False)
+    input_tokens = Column(Integer, default=0)
+    output_tokens = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class JobAccountCursor(Base):
+    """High-water mark of the newest tweet seen per job and account"""
+    __tablename__ = "job_account_cursors"
+
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), primary_key=True)
+    username = Column(String(255), primary_key=True)  # Lowercase, without "@"
+    last_tweet_id = Column(String(32), nullable=True)
+    last_tweet_at = Column(DateTime(timezone=True), nullable=True)
+    # Low-water mark: start of a window whose fetch was truncated, re-queried until fully fetched
+    backfill_since = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class JobRun(Base):
+    """Queued run of a job; enqueued by the scheduler, claimed and executed by a worker"""
+    __tablename__ = "job_runs"
+    __table_args__ = (
+        # One run per job and schedule slot, however many schedulers enqueue it
+        UniqueConstraint("job_id", "scheduled_for", name="uq_job_runs_job_slot"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("jobs.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(
+        Enum(
+            JobRunStatus,
+            name="jobrunstatus",
+            values_callable=lambda x: [e.value for e in x]
+        ),
+        default=JobRunStatus.QUEUED,
+        nullable=False,
+        index=True
+    )
+    scheduled_for = Column(DateTime(timezone=True), nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    claimed_by = Column(String(255), nullable=True)  # Worker id (host:pid)
+    claimed_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    error_message = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+class SchedulerLease(Base):
+    """Time-limited lease; the instance holding it is the scheduler leader"""
+    __tablename__ = "scheduler_leases"
+
+    name = Column(String(64), primary_key=True)
+    holder = Column(String(255), nullable=True)  # Instance id (host:pid)
+    expires_at = Column(DateTime(timezone=True), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
 class NotificationTarget(Base):
     __tablename__ = "notification_targets"
     
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.services.db_storage import DatabaseStorage
@@ -10,6 +10,11 @@ from app.models import User, JobStatus
 
 router = APIRouter()
 
+# Upper bounds for per-job fetch budgets (each page is one paid twitterapi.io call)
+MAX_PAGES_PER_ACCOUNT = 20
+MAX_TWEETS_PER_ACCOUNT = 500
+MAX_API_CALLS_PER_RUN = 200
+
 class JobCreateRequest(BaseModel):
     x_username: str
     frequency: str
@@ -17,6 +22,9 @@ class JobCreateRequest(BaseModel):
     language: Optional[str] = None
     email: Optional[str] = None
     notification_target_ids: Optional[List[int]] = None
+    max_pages: Optional[int] = Field(None, ge=1, le=MAX_PAGES_PER_ACCOUNT)
+    max_tweets: Optional[int] = Field(None, ge=1, le=MAX_TWEETS_PER_ACCOUNT)
+    max_api_calls: Optional[int] = Field(None, ge=1, le=MAX_API_CALLS_PER_RUN)
 
 class JobUpdateRequest(BaseModel):
     frequency: Optional[str] = None
@@ -25,6 +33,9 @@ class JobUpdateRequest(BaseModel):
     language: Optional[str] = None
     email: Optional[str] = None
     notification_target_ids: Optional[List[int]] = None
+    max_pages: Optional[int] = Field(None, ge=1, le=MAX_PAGES_PER_ACCOUNT)
+    max_tweets: Optional[int] = Field(None, ge=1, le=MAX_TWEETS_PER_ACCOUNT)
+    max_api_calls: Optional[int] = Field(None, ge=1, le=MAX_API_CALLS_PER_RUN)
 
 @router.post("/")
 def create_job(
@@ -41,7 +52,10 @@ def create_job(
         language=job_request.language,
         email=job_request.email,  # Only use email when explicitly provided
         user_id=current_user.id,  # Associate job with current user
-        notification_target_ids=job_request.notification_target_ids
+        notification_target_ids=job_request.notification_target_ids,
+        max_pages=job_request.max_pages,
+        max_tweets=job_request.max_tweets,
+        max_api_calls=job_request.max_api_calls
     )
     
     # Schedule the job automatically
@@ -111,6 +125,12 @@ def update_job(
         update_data["email"] = job_update.email
     if job_update.notification_target_ids is not None:
         update_data["notification_target_ids"] = job_update.notification_target_ids
+    if job_update.max_pages is not None:
+        update_data["max_pages"] = job_update.max_pages
+    if job_update.max_tweets is not None:
+        update_data["max_tweets"] = job_update.max_tweets
+    if job_update.max_api_calls is not None:
+        update_data["max_api_calls"] = job_update.max_api_calls
     
     job = storage.update_job(job_id, **update_data)
     if not job:
@@ -185,3 +205,25 @@ def get_job_executions(
     
     executions = storage.get_executions(job_id)
     return executions
+
+@router.get("/{job_id}/executions/{execution_id}/tweets")
+def get_execution_tweets(
+    job_id: int,
+    execution_id: int,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db)
+):
+    """Get the stored tweets behind an execution (requires authentication and ownership)"""
+    storage = DatabaseStorage(db)
+    job = storage.get_job(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job["user_id"] != current_user.id:
+        raise HTTPException(status_code=403, detail="You don't have permission to access this job's executions")
+    
+    tweets = storage.get_execution_tweets(job_id, execution_id)
+    if tweets is None:
+        raise HTTPException(status_code=404, detail="Execution not found")
+    
+    return tweets
@@ -1,17 +1,31 @@
+import asyncio
+import json
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, SessionLocal
 from app.services.db_storage import DatabaseStorage
+from app.scheduler import scheduler
 from app.services.monitoring_service import MonitoringService
 from app.services.twitter_service import TwitterService
+from app.services.rate_limiter import PRIORITY_INTERACTIVE
 from app.services.llm_service import LLMService
 from app.services.sendgrid_service import SendGridService
+from app.dependencies.auth import get_current_user
+from app.models import User
+from app.dependencies.services import (
+    get_twitter_service,
+    get_llm_service,
+    get_email_service,
+    get_monitoring_service,
+)
 
 router = APIRouter()
-monitoring_service = MonitoringService()
+
+MAX_LOAD_SLICES = 10080  # /schedule/load limit: one week of one-minute slices
 
 class TestRequest(BaseModel):
     x_username: str
@@ -36,9 +50,12 @@ def _parse_usernames(raw: str) -> List[str]:
     return cleaned
 
 @router.post("/test")
-def test_monitoring(
+async def test_monitoring(
     test_request: TestRequest,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    twitter_service: TwitterService = Depends(get_twitter_service),
+    llm_service: LLMService = Depends(get_llm_service),
+    email_service: SendGridService = Depends(get_email_service)
 ):
     """Test function to execute monitoring immediately with a time range"""
     print("\n" + "=" * 80)
@@ -50,11 +67,6 @@ def test_monitoring(
     print("=" * 80)
     
     try:
-        print("[API ENDPOINT] Initializing services...")
-        twitter_service = TwitterService()
-        llm_service = LLMService()
-        print("[API ENDPOINT] ✅ Services initialized")
-        
         # Calculate time range
         until_time = datetime.utcnow()
         since_time = until_time - timedelta(hours=test_request.hours_back)
@@ -62,17 +74,15 @@ def test_monitoring(
         
         # Fetch tweets (this may take time due to rate limiting)
         print("[API ENDPOINT] Step 1: Fetching tweets from Twitter API...")
-        tweets = []
-        for username in usernames:
-            account_tweets = twitter_service.get_user_tweets(
-                username=username,
-                since=since_time,
-                limit=50
-            )
-            for tweet in account_tweets:
-                if not tweet.get("username"):
-                    tweet["username"] = username
-            tweets.extend(account_tweets)
+        tweets = await twitter_service.get_tweets_for_users(
+            usernames,
+            since=since_time,
+            limit=50,
+            priority=PRIORITY_INTERACTIVE
+        )
+        # Blocking DB calls go to a thread so they never stall the event loop
+        storage = DatabaseStorage(db)
+        await asyncio.to_thread(storage.upsert_tweets, tweets)
         print(f"[API ENDPOINT] ✅ Step 1 complete: Fetched {len(tweets)} tweets")
         
         # Note: We don't filter by topics - instead we pass topics to LLM to focus on them
@@ -85,23 +95,26 @@ def test_monitoring(
         provider_name = llm_service.provider if hasattr(llm_service, 'provider') else 'LLM'
         print(f"[API ENDPOINT] Step 3: Generating AI summary with {provider_name} (emphasizing topics: {test_request.topics})...")
         time_range = f"last {test_request.hours_back} hours"
-        summary_result = llm_service.summarize_tweets(
+        summary_result = await llm_service.summarize_tweets(
             tweets,
             test_request.topics,
             x_username=", ".join(usernames),
             time_range=time_range,
-            language=test_request.language
+            language=test_request.language,
+            priority=PRIORITY_INTERACTIVE
         )
         summary_text = summary_result.get("summary", "")
         usage = summary_result.get("usage", {}) or {}
+        if summary_result.get("cached"):
+            usage = {}
         print(f"[API ENDPOINT] ✅ Step 3 complete: Summary generated ({len(summary_text)} characters)")
         
         # Send email if provided
         email_sent = False
         if test_request.email:
             print(f"[API ENDPOINT] Step 4: Sending email to {test_request.email}...")
-            email_service = SendGridService()
-            email_sent = email_service.send_summary_email(
+            email_sent = await asyncio.to_thread(
+                email_service.send_summary_email,
                 to_email=test_request.email,
                 x_username=", ".join(usernames),
                 summary=summary_text,
@@ -114,8 +127,8 @@ def test_monitoring(
             else:
                 print(f"[API ENDPOINT] ⚠️  Step 4: Email sending failed")
         
-        storage = DatabaseStorage(db)
-        playground_summary = storage.add_playground_summary(
+        playground_summary = await asyncio.to_thread(
+            storage.add_playground_summary,
             x_username=", ".join(usernames),
             topics=test_request.topics or [],
             hours_back=test_request.hours_back or 24,
@@ -133,7 +146,7 @@ def test_monitoring(
             "tweets_found": len(tweets),
             "summary": summary_text,
             "summary_id": playground_summary.get("id"),
-            "tweets": tweets[:10],  # Return first 10 tweets for preview
+            "tweets": [dict(tweet) for tweet in tweets[:10]],  # Return first 10 tweets for preview
             "since_time": since_time.isoformat(),
             "until_time": until_time.isoformat(),
             "email_sent": email_sent
@@ -163,11 +176,134 @@ def test_monitoring(
             )
         raise HTTPException(status_code=500, detail=f"Error testing: {error_message}")
 
+def _sse(event: str, payload: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+@router.post("/test/stream")
+async def test_monitoring_stream(
+    test_request: TestRequest,
+    twitter_service: TwitterService = Depends(get_twitter_service),
+    llm_service: LLMService = Depends(get_llm_service),
+    email_service: SendGridService = Depends(get_email_service)
+):
+    """
+    Streaming variant of /test (Server-Sent Events).
+    Events: tweets, headline, delta (summary text as it is generated), done, error
+    """
+    print("\n" + "=" * 80)
+    print("[API ENDPOINT] /api/monitoring/test/stream - Starting streamed test")
+    usernames = _parse_usernames(test_request.x_username)
+    if not usernames:
+        raise HTTPException(status_code=400, detail="No X usernames provided")
+    print(f"[API ENDPOINT] Request data: usernames={usernames}, hours_back={test_request.hours_back}, topics={test_request.topics}, language={test_request.language}")
+    print("=" * 80)
+
+    async def events():
+        # The response outlives the request scope, so the stream owns its session
+        db = SessionLocal()
+        try:
+            until_time = datetime.utcnow()
+            since_time = until_time - timedelta(hours=test_request.hours_back)
+            tweets = await twitter_service.get_tweets_for_users(
+                usernames,
+                since=since_time,
+                limit=50,
+                priority=PRIORITY_INTERACTIVE
+            )
+            storage = DatabaseStorage(db)
+            await asyncio.to_thread(storage.upsert_tweets, tweets)
+            print(f"[API ENDPOINT] ✅ Fetched {len(tweets)} tweets, streaming summary...")
+            yield _sse("tweets", {
+                "tweets_found": len(tweets),
+                "tweets": [dict(tweet) for tweet in tweets[:10]],
+                "since_time": since_time.isoformat(),
+                "until_time": until_time.isoformat()
+            })
+
+            summary_result = {}
+            async for event in llm_service.stream_summary(
+                tweets,
+                test_request.topics,
+                x_username=", ".join(usernames),
+                time_range=f"last {test_request.hours_back} hours",
+                language=test_request.language,
+                priority=PRIORITY_INTERACTIVE
+            ):
+                if event["type"] == "done":
+                    summary_result = event
+                else:
+                    yield _sse(event["type"], {key: value for key, value in event.items() if key != "type"})
+
+            summary_text = summary_result.get("summary", "")
+            usage = summary_result.get("usage", {}) or {}
+            if summary_result.get("cached"):
+                usage = {}
+
+            email_sent = False
+            if test_request.email and not summary_result.get("error"):
+                email_sent = await asyncio.to_thread(
+                    email_service.send_summary_email,
+                    to_email=test_request.email,
+                    x_username=", ".join(usernames),
+                    summary=summary_text,
+                    tweets_count=len(tweets),
+                    topics=test_request.topics,
+                    headline=summary_result.get("headline")
+                )
+
+            playground_summary = await asyncio.to_thread(
+                storage.add_playground_summary,
+                x_username=", ".join(usernames),
+                topics=test_request.topics or [],
+                hours_back=test_request.hours_back or 24,
+                content=summary_text,
+                raw_data={"count": len(tweets)},
+                input_tokens=usage.get("input_tokens", 0),
+                output_tokens=usage.get("output_tokens", 0)
+            )
+            print(f"[API ENDPOINT] ✅ Streamed test completed ({len(summary_text)} chars)")
+            yield _sse("done", {
+                "summary_id": playground_summary.get("id"),
+                "headline": summary_result.get("headline"),
+                "summary": summary_text,
+                "error": bool(summary_result.get("error")),
+                "email_sent": email_sent
+            })
+        except Exception as e:
+            print(f"[API ENDPOINT] ❌ Streamed test failed: {str(e)}")
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/schedule/load")
+def get_schedule_load(
+    hours: int = 24,
+    slice_seconds: Optional[int] = None,
+    current_user: User = Depends(get_current_user)
+):
+    """Projected job starts per time slice (to spot spikes before they hit the APIs)"""
+    if hours < 1 or hours > 168:
+        raise HTTPException(status_code=400, detail="hours must be between 1 and 168")
+    if slice_seconds is not None and slice_seconds < 1:
+        raise HTTPException(status_code=400, detail="slice_seconds must be positive")
+    if hours * 3600 / (slice_seconds or scheduler.slice_seconds) > MAX_LOAD_SLICES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_LOAD_SLICES} slices per request; use a shorter horizon or longer slices")
+    return scheduler.projected_load(timedelta(hours=hours), slice_seconds)
+
 @router.post("/jobs/{job_id}/run")
-def run_job_manually(job_id: int, db: Session = Depends(get_db)):
+async def run_job_manually(
+    job_id: int,
+    db: Session = Depends(get_db),
+    monitoring_service: MonitoringService = Depends(get_monitoring_service)
+):
     """Manually trigger a monitoring job"""
-    storage = DatabaseStorage(db)
-    job = storage.get_job(job_id)
+    job = await asyncio.to_thread(DatabaseStorage(db).get_job, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
@@ -175,13 +311,18 @@ def run_job_manually(job_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=400, detail="Job is not active")
     
     try:
-        summary = monitoring_service.run_job(job, db)
+        summary = await monitoring_service.run_job(job, db)
         return summary
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error running job: {str(e)}")
 
 @router.post("/jobs/{job_id}/summaries/send-email")
-def send_summary_email(job_id: int, email_request: SendEmailRequest, db: Session = Depends(get_db)):
+def send_summary_email(
+    job_id: int,
+    email_request: SendEmailRequest,
+    db: Session = Depends(get_db),
+    email_service: SendGridService = Depends(get_email_service)
+):
     """Send an existing summary via email without regenerating content"""
     print("\n" + "=" * 80)
     print(f"[API ENDPOINT] /api/monitoring/jobs/{job_id}/summaries/send-email")
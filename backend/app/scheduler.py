@@ -1,48 +1,319 @@
 """
 Job Scheduler for XTrack
-Automatically runs monitoring jobs based on configured frequency
+Automatically runs monitoring jobs based on configured frequency.
+
+Each job's next run is persisted in jobs.next_run_at, so restarts neither
+reset nor repeat runs. One instance holds the scheduler lease; it loads the
+schedule into an in-memory min-heap with one streamed query and sleeps until
+the earliest job is due. Due jobs run as coroutines on the application's
+event loop, or, with JOB_EXECUTION_MODE=queue, are only enqueued for the
+separate worker processes in app/worker.py.
 """
-from apscheduler.schedulers.background import BackgroundScheduler
+import asyncio
+import os
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 from app.database import SessionLocal
+from app.models import Job, JobStatus
 from app.services.db_storage import DatabaseStorage
-from app.services.monitoring_service import MonitoringService
+from app.services.job_queue import JobQueue
+from app.services.leader_election import LeaderLease
+from app.services.registry import services
+from app.utils.schedule_heap import ScheduleHeap
+from app.utils.schedule import (
+    CATCHUP_COALESCE,
+    CATCHUP_POLICIES,
+    frequency_interval,
+    initial_next_run,
+    plan_due_run,
+    slot_start,
+    to_utc_naive,
+)
 
 class JobScheduler:
     def __init__(self):
-        self.scheduler = BackgroundScheduler()
-        self.monitoring_service = MonitoringService()
-        self.job_map = {}  # Maps job_id to scheduler job_id
+        self.scheduler = AsyncIOScheduler()
+        # The schedule itself lives in jobs.next_run_at. The leader mirrors it in a compact
+        # in-memory heap and sleeps until the earliest due job instead of polling the table.
+        self.resync_interval = timedelta(seconds=float(os.getenv("SCHEDULER_RESYNC_SECONDS", "30")))
+        self.full_reload_interval = timedelta(seconds=float(os.getenv("SCHEDULER_FULL_RELOAD_SECONDS", "3600")))
+        self.misfire_grace = timedelta(seconds=float(os.getenv("SCHEDULER_MISFIRE_GRACE_SECONDS", "300")))
+        self.catchup_policy = os.getenv("SCHEDULER_CATCHUP_POLICY", CATCHUP_COALESCE).strip().lower()
+        if self.catchup_policy not in CATCHUP_POLICIES:
+            print(f"[SCHEDULER] ⚠️  Unknown SCHEDULER_CATCHUP_POLICY={self.catchup_policy}, using {CATCHUP_COALESCE}")
+            self.catchup_policy = CATCHUP_COALESCE
+        # "inline": run jobs in this process; "queue": only enqueue runs for app.worker processes
+        self.execution_mode = os.getenv("JOB_EXECUTION_MODE", "inline").strip().lower()
+        # With several replicas only the lease holder owns timing; the others just serve the API
+        self.leader = None
+        if os.getenv("SCHEDULER_LEADER_ELECTION", "true").lower() in ("1", "true", "yes"):
+            self.leader = LeaderLease("scheduler")
+        self.leader_renew_seconds = float(os.getenv("SCHEDULER_LEASE_RENEW_SECONDS", "10"))
+        # Load spreading: stable per-job phase within the interval, and a cap on starts per time slice
+        self.spread_jobs = os.getenv("SCHEDULER_SPREAD_JOBS", "true").lower() in ("1", "true", "yes")
+        self.slice_seconds = max(1, int(os.getenv("SCHEDULER_SLICE_SECONDS", "60")))
+        self.max_starts_per_slice = int(os.getenv("SCHEDULER_MAX_STARTS_PER_SLICE", "0"))  # 0 = no cap
+        self._slice_start = None
+        self._slice_starts = 0
+        self._throttled_until: Optional[datetime] = None  # Slice cap reached; due jobs wait until then
+        self._dispatching_since = None  # When this instance started dispatching (downtime boundary)
+        self._running: Dict[int, asyncio.Task] = {}  # Inline runs in flight, by job id
+        # Each inline run holds a DB session; keep concurrent runs below the connection pool size
+        self.max_concurrent_runs = max(1, int(os.getenv("SCHEDULER_MAX_CONCURRENT_RUNS", "5")))
+        self._run_slots = asyncio.Semaphore(self.max_concurrent_runs)
+        # In-memory schedule (leader only), kept in step with the table by periodic resyncs
+        self._heap = ScheduleHeap()
+        self._schedule_loaded = False
+        self._last_sync: Optional[datetime] = None
+        self._next_resync: Optional[datetime] = None
+        self._next_full_reload: Optional[datetime] = None
+        self._wake = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_task: Optional[asyncio.Task] = None
+
+    @property
+    def monitoring_service(self):
+        # Shared with the API; built on first use rather than at import time
+        return services.monitoring
         
     def start(self):
-        """Start the scheduler"""
+        """Start the scheduler (must be called from the running event loop)"""
         if not self.scheduler.running:
             self.scheduler.start()
             print("[SCHEDULER] ✅ Scheduler started")
-            # Schedule all active jobs
-            self._schedule_all_jobs()
+            self._loop = asyncio.get_running_loop()
+            if self.leader is None:
+                self._dispatching_since = datetime.utcnow()
+                self._wake.set()  # Load the schedule right away
+            else:
+                # Jobs are dispatched once this instance holds the lease (first check runs now)
+                self.scheduler.add_job(
+                    func=self._leadership_tick,
+                    trigger=IntervalTrigger(seconds=self.leader_renew_seconds),
+                    id="leader_lease",
+                    name="Scheduler leader lease",
+                    next_run_time=datetime.now().astimezone(),
+                    replace_existing=True
+                )
+            self._loop_task = self._loop.create_task(self._run_loop())
     
     def stop(self):
         """Stop the scheduler"""
+        if self._loop_task is not None:
+            self._loop_task.cancel()
+            self._loop_task = None
         if self.scheduler.running:
             self.scheduler.shutdown()
             print("[SCHEDULER] Scheduler stopped")
-    
-    def _schedule_all_jobs(self):
-        """Schedule all active jobs on startup"""
+        if self.leader is not None:
+            self.leader.release()
+
+    @property
+    def is_leader(self) -> bool:
+        return self.leader is None or self.leader.is_leader
+
+    async def _leadership_tick(self):
+        """Acquire/renew the lease; only the leader dispatches due jobs"""
+        was_leader = self.leader.is_leader
+        if await asyncio.to_thread(self.leader.acquire):
+            if not was_leader:
+                print(f"[SCHEDULER] 👑 {self.leader.holder_id} is now the scheduler leader")
+                self._dispatching_since = datetime.utcnow()
+                self._schedule_loaded = False
+                self._wake.set()
+        elif was_leader:
+            print(f"[SCHEDULER] ⚠️  {self.leader.holder_id} lost the scheduler lease, no longer dispatching jobs")
+            self._heap.clear()
+            self._schedule_loaded = False
+
+    async def _run_loop(self):
+        """Sleep until the earliest due job (or the next resync), then dispatch whatever is due"""
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self._seconds_until_wake())
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if not self.is_leader:
+                continue
+            try:
+                now = datetime.utcnow()
+                if not self._schedule_loaded or now >= self._next_full_reload:
+                    await self._load_schedule()
+                elif now >= self._next_resync:
+                    await self._resync_schedule()
+                if self._schedule_loaded:
+                    await self._dispatch_due_jobs(datetime.utcnow())
+            except Exception as e:
+                print(f"[SCHEDULER] ❌ Error dispatching due jobs: {str(e)}")
+                self._schedule_loaded = False  # Memory may disagree with the table now; reload it
+
+    def _seconds_until_wake(self) -> float:
+        if not self.is_leader or not self._schedule_loaded:
+            # Becoming leader wakes the loop; until then this is just a slow idle
+            return self.resync_interval.total_seconds()
+        wake_at = self._next_resync
+        next_due = self._heap.next_due()
+        if next_due is not None:
+            if self._throttled_until is not None:
+                next_due = max(next_due, self._throttled_until)
+            wake_at = min(wake_at, next_due)
+        return max((wake_at - datetime.utcnow()).total_seconds(), 0)
+
+    async def _load_schedule(self):
+        """(Re)build the in-memory schedule from the table in one streamed pass"""
+        started = datetime.utcnow()
+        heap = await asyncio.to_thread(self._read_schedule, started)
+        if not self.is_leader:
+            return
+        # Changes made while loading are picked up by the next resync (it overlaps this start)
+        self._heap = heap
+        self._schedule_loaded = True
+        self._last_sync = started
+        self._next_resync = started + self.resync_interval
+        self._next_full_reload = started + self.full_reload_interval
+        elapsed = (datetime.utcnow() - started).total_seconds()
+        print(f"[SCHEDULER] 📋 Loaded {len(heap)} scheduled job(s) in {elapsed:.2f}s")
+
+    def _read_schedule(self, now: datetime) -> ScheduleHeap:
+        """Give unscheduled active jobs a next run, then stream (id, next_run_at) into a heap"""
         db = SessionLocal()
         try:
             storage = DatabaseStorage(db)
-            jobs = storage.get_all_jobs()
-            for job in jobs:
-                if job.get("is_active", True):
-                    self.schedule_job(job["id"])
+            unscheduled = storage.get_unscheduled_jobs()
+            if unscheduled:
+                storage.set_jobs_next_run([
+                    (job_id, initial_next_run(frequency, last_run, now, job_id=job_id if self.spread_jobs else None))
+                    for job_id, frequency, last_run in unscheduled
+                ])
+                print(f"[SCHEDULER] Scheduled {len(unscheduled)} job(s) that had no next run")
+            heap = ScheduleHeap()
+            for job_id, next_run_at in storage.iter_job_schedule():
+                heap.set(job_id, to_utc_naive(next_run_at))
+            return heap
         finally:
             db.close()
+
+    async def _resync_schedule(self):
+        """Apply jobs changed since the last sync (e.g. through another replica's API)"""
+        started = datetime.utcnow()
+        # Overlap by one interval to cover clock skew and transactions that committed late
+        since = self._last_sync - self.resync_interval
+        changes = await asyncio.to_thread(self._read_schedule_changes, since)
+        if not self.is_leader:
+            return
+        for job_id, next_run_at in changes:
+            self._set_heap_entry(job_id, next_run_at)
+        self._last_sync = started
+        self._next_resync = started + self.resync_interval
+
+    def _read_schedule_changes(self, since: datetime) -> List[Tuple[int, Optional[datetime]]]:
+        db = SessionLocal()
+        try:
+            return list(DatabaseStorage(db).iter_job_schedule_changes(since))
+        finally:
+            db.close()
+
+    def _set_heap_entry(self, job_id: int, next_run_at: Optional[datetime]):
+        if next_run_at is None:
+            self._heap.discard(job_id)
+        else:
+            self._heap.set(job_id, to_utc_naive(next_run_at))
+
+    async def _dispatch_due_jobs(self, now: datetime):
+        """Start (or enqueue) every job due by `now`, applying the catch-up policy and slice cap"""
+        due_ids = self._heap.pop_due(now)
+        if not due_ids:
+            return
+        # The table stays authoritative: re-read the due jobs in one query before running them
+        entries = await asyncio.to_thread(self._read_due_entries, due_ids)
+        advanced: List[Tuple[int, datetime]] = []
+        to_run: List[Tuple[int, datetime]] = []
+        for index, job_id in enumerate(due_ids):
+            frequency, due_at = entries.get(job_id, (None, None))
+            if due_at is None:
+                continue  # Paused, deleted or unscheduled since it was loaded
+            due_at = to_utc_naive(due_at)
+            if due_at > now:
+                self._heap.set(job_id, due_at)  # Moved by another replica
+                continue
+            if not self._reserve_start(now):
+                # Back on the heap; they go first in the next slice
+                deferred = 0
+                for deferred_id in due_ids[index:]:
+                    entry = entries.get(deferred_id)
+                    if entry and entry[1] is not None:
+                        self._heap.set(deferred_id, to_utc_naive(entry[1]))
+                        deferred += 1
+                self._throttled_until = self._slice_start + timedelta(seconds=self.slice_seconds)
+                print(f"[SCHEDULER] 🚦 {self.max_starts_per_slice} starts this slice, deferring {deferred} due job(s)")
+                break
+            run_now, next_run_at = plan_due_run(
+                due_at,
+                frequency,
+                now,
+                self.catchup_policy,
+                self.misfire_grace,
+                job_id=job_id if self.spread_jobs else None,
+                online_since=self._dispatching_since
+            )
+            advanced.append((job_id, next_run_at))
+            self._heap.set(job_id, next_run_at)
+            if not run_now:
+                print(f"[SCHEDULER] ⏭️  Skipping missed run of job {job_id} (due {due_at.isoformat()}), next: {next_run_at.isoformat()}")
+                continue
+            if now - due_at > self.misfire_grace and due_at < self._dispatching_since:
+                print(f"[SCHEDULER] ⏰ Catching up job {job_id} (due {due_at.isoformat()}, policy {self.catchup_policy})")
+            to_run.append((job_id, due_at))
+        # Advance before dispatching: a crash in between loses one run rather than repeating it
+        queued = to_run if self.execution_mode == "queue" else []
+        await asyncio.to_thread(self._advance_jobs, advanced, queued)
+        if self.execution_mode != "queue":
+            for job_id, _ in to_run:
+                self._start_inline_run(job_id)
+
+    def _read_due_entries(self, job_ids: List[int]) -> Dict[int, Tuple[Optional[str], Optional[datetime]]]:
+        db = SessionLocal()
+        try:
+            return DatabaseStorage(db).get_job_schedule_entries(job_ids)
+        finally:
+            db.close()
+
+    def _advance_jobs(self, advanced: List[Tuple[int, datetime]], queued: List[Tuple[int, datetime]]):
+        """Store the advanced next runs, then queue runs for the workers (queue mode)"""
+        db = SessionLocal()
+        try:
+            DatabaseStorage(db).set_jobs_next_run(advanced)
+            for job_id, due_at in queued:
+                self._enqueue_run(job_id, due_at, db)
+        finally:
+            db.close()
+
+    def _reserve_start(self, now: datetime) -> bool:
+        """Count one start against the current time slice; False once the cap is reached"""
+        if self.max_starts_per_slice <= 0:
+            return True
+        current_slice = slot_start(now, timedelta(seconds=self.slice_seconds))
+        if current_slice != self._slice_start:
+            self._slice_start = current_slice
+            self._slice_starts = 0
+        if self._slice_starts >= self.max_starts_per_slice:
+            return False
+        self._slice_starts += 1
+        return True
+
+    def _start_inline_run(self, job_id: int):
+        if job_id in self._running:
+            print(f"[SCHEDULER] ⚠️  Job {job_id} is still running, skipping this run")
+            return
+        task = asyncio.get_running_loop().create_task(self._run_job(job_id))
+        self._running[job_id] = task
+        task.add_done_callback(lambda _, job_id=job_id: self._running.pop(job_id, None))
     
     def schedule_job(self, job_id: int):
-        """Schedule a job to run automatically"""
+        """Put a job on the schedule, deriving next_run_at from its frequency and last run"""
         db = SessionLocal()
         try:
             storage = DatabaseStorage(db)
@@ -54,54 +325,79 @@ class JobScheduler:
             if not job.get("is_active", True):
                 print(f"[SCHEDULER] ⚠️  Job {job_id} is not active")
                 return
+            
+            frequency = job.get("frequency", "daily")
+            next_run_at = initial_next_run(
+                frequency,
+                job.get("last_run"),
+                datetime.utcnow(),
+                job_id=job_id if self.spread_jobs else None
+            )
+            storage.set_job_next_run(job_id, next_run_at)
         finally:
             db.close()
-        
-        # Remove existing schedule if any
-        self.unschedule_job(job_id)
-        
-        # Get interval based on frequency
-        frequency = job.get("frequency", "daily")
-        interval_map = {
-            "hourly": {"hours": 1},
-            "every_6_hours": {"hours": 6},
-            "every_12_hours": {"hours": 12},
-            "daily": {"days": 1}
-        }
-        
-        interval = interval_map.get(frequency, {"days": 1})
-        
-        # Schedule the job
-        scheduler_job = self.scheduler.add_job(
-            func=self._run_job,
-            trigger=IntervalTrigger(**interval),
-            args=[job_id],
-            id=f"job_{job_id}",
-            name=f"Monitor @{job.get('x_username')}",
-            replace_existing=True
-        )
-        
-        self.job_map[job_id] = f"job_{job_id}"
+        self._notify_schedule_change(job_id, next_run_at)
         
         print(f"[SCHEDULER] ✅ Scheduled job {job_id} (@{job.get('x_username')}) to run every {frequency}")
-        print(f"[SCHEDULER] Next run: {scheduler_job.next_run_time}")
+        print(f"[SCHEDULER] Next run: {next_run_at.isoformat()}")
     
     def unschedule_job(self, job_id: int):
         """Remove a job from the schedule"""
-        scheduler_job_id = self.job_map.get(job_id)
-        if scheduler_job_id:
-            try:
-                self.scheduler.remove_job(scheduler_job_id)
-                del self.job_map[job_id]
-                print(f"[SCHEDULER] ⏸️  Unscheduled job {job_id}")
-            except Exception as e:
-                print(f"[SCHEDULER] ⚠️  Error unscheduling job {job_id}: {e}")
+        db = SessionLocal()
+        try:
+            DatabaseStorage(db).set_job_next_run(job_id, None)
+            self._notify_schedule_change(job_id, None)
+            print(f"[SCHEDULER] ⏸️  Unscheduled job {job_id}")
+        except Exception as e:
+            print(f"[SCHEDULER] ⚠️  Error unscheduling job {job_id}: {e}")
+        finally:
+            db.close()
     
     def reschedule_job(self, job_id: int):
         """Reschedule a job (e.g., after frequency change)"""
         self.schedule_job(job_id)
+
+    def _notify_schedule_change(self, job_id: int, next_run_at: Optional[datetime]):
+        """
+        Mirror an API-side change into this instance's heap. Routes may run in
+        the threadpool, so the update is handed to the event loop; other
+        replicas' changes arrive through the periodic resync instead.
+        """
+        if self._loop is None or self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._apply_schedule_change, job_id, next_run_at)
+
+    def _apply_schedule_change(self, job_id: int, next_run_at: Optional[datetime]):
+        if not (self.is_leader and self._schedule_loaded):
+            return
+        self._set_heap_entry(job_id, next_run_at)
+        self._wake.set()  # The new entry may now be the earliest
     
-    def _run_job(self, job_id: int):
+    def _enqueue_run(self, job_id: int, due_at: datetime, db=None):
+        """Queue a run for the workers instead of executing it here"""
+        own_session = db is None
+        if own_session:
+            db = SessionLocal()
+        try:
+            # Keyed by the due time, so a run is queued once however often this is retried
+            run = JobQueue(db).enqueue(job_id, due_at)
+            if run:
+                print(f"[SCHEDULER] 📥 Queued run {run['id']} for job {job_id} (due {due_at.isoformat()})")
+            else:
+                print(f"[SCHEDULER] Job {job_id} already has a pending run")
+        except Exception as e:
+            db.rollback()
+            print(f"[SCHEDULER] ❌ Error queueing job {job_id}: {str(e)}")
+        finally:
+            if own_session:
+                db.close()
+
+    async def _run_job(self, job_id: int):
+        """Execute a scheduled job (waits for a free run slot first)"""
+        async with self._run_slots:
+            await self._execute_job(job_id)
+
+    async def _execute_job(self, job_id: int):
         """Execute a scheduled job"""
         print("\n" + "=" * 80)
         print(f"[SCHEDULER] Running scheduled job {job_id}")
@@ -110,11 +406,11 @@ class JobScheduler:
         
         db = SessionLocal()
         try:
-            storage = DatabaseStorage(db)
-            job = storage.get_job(job_id)
+            # DB calls run in a thread; run_job does the same for its own steps
+            job = await asyncio.to_thread(DatabaseStorage(db).get_job, job_id)
             if not job:
                 print(f"[SCHEDULER] ⚠️  Job {job_id} not found, unscheduling...")
-                self.unschedule_job(job_id)
+                await asyncio.to_thread(self.unschedule_job, job_id)
                 return
             
             if not job.get("is_active", True):
@@ -125,7 +421,7 @@ class JobScheduler:
                 return
             
             # Run the monitoring job
-            summary = self.monitoring_service.run_job(job, db)
+            summary = await self.monitoring_service.run_job(job, db)
             
             print(f"[SCHEDULER] ✅ Job {job_id} completed successfully")
             print(f"[SCHEDULER] Summary ID: {summary.get('id')}")
@@ -139,16 +435,67 @@ class JobScheduler:
         finally:
             db.close()
     
+    def projected_load(self, horizon: timedelta = timedelta(hours=24), slice_seconds: Optional[int] = None) -> Dict:
+        """Run starts per time slice over the next `horizon`, projected from next_run_at and frequency"""
+        slice_length = timedelta(seconds=slice_seconds or self.slice_seconds)
+        now = datetime.utcnow()
+        # Report whole slices, so a run counts exactly when its slice starts before the end
+        end = slot_start(now + horizon, slice_length)
+        if end < now + horizon:
+            end += slice_length
+        # Jobs are grouped by (interval, first run): every group repeats the same slices, so the
+        # work is per group rather than per run. When slices divide the hour (as every interval
+        # does), all runs of a job stay in the same position within their slice and the group
+        # key can be the first run's slice, which bounds the groups by the number of slices.
+        aligned = 3600 % int(slice_length.total_seconds()) == 0
+        groups: Dict[Tuple[timedelta, datetime], int] = {}
+        db = SessionLocal()
+        try:
+            scheduled = db.query(Job.next_run_at, Job.frequency)\
+                .filter(Job.next_run_at.isnot(None), Job.is_active == True, Job.status != JobStatus.DELETED)\
+                .execution_options(yield_per=1000)
+            for next_run_at, frequency in scheduled:
+                first_run = max(to_utc_naive(next_run_at), now)  # Overdue runs start right away
+                if first_run >= end:
+                    continue
+                key = (frequency_interval(frequency), slot_start(first_run, slice_length) if aligned else first_run)
+                groups[key] = groups.get(key, 0) + 1
+        finally:
+            db.close()
+        counts: Dict[datetime, int] = {}
+        for (interval, run_at), jobs in groups.items():
+            while run_at < end:
+                bucket = slot_start(run_at, slice_length)
+                counts[bucket] = counts.get(bucket, 0) + jobs
+                run_at += interval
+        slots = [{"start": bucket.isoformat(), "runs": counts[bucket]} for bucket in sorted(counts)]
+        return {
+            "horizon_hours": horizon.total_seconds() / 3600,
+            "slice_seconds": int(slice_length.total_seconds()),
+            "max_starts_per_slice": self.max_starts_per_slice or None,
+            "total_runs": sum(counts.values()),
+            "peak_runs": max(counts.values(), default=0),
+            "slots": slots
+        }
+
     def get_scheduled_jobs(self):
         """Get list of currently scheduled jobs"""
-        jobs = []
-        for job in self.scheduler.get_jobs():
-            jobs.append({
-                "id": job.id,
-                "name": job.name,
-                "next_run": job.next_run_time.isoformat() if job.next_run_time else None
-            })
-        return jobs
+        db = SessionLocal()
+        try:
+            scheduled = db.query(Job)\
+                .filter(Job.next_run_at.isnot(None), Job.is_active == True, Job.status != JobStatus.DELETED)\
+                .order_by(Job.next_run_at)\
+                .all()
+            return [
+                {
+                    "id": f"job_{job.id}",
+                    "name": f"Monitor @{job.x_username}",
+                    "next_run": job.next_run_at.isoformat()
+                }
+                for job in scheduled
+            ]
+        finally:
+            db.close()
 
 # Global scheduler instance
 scheduler = JobScheduler()
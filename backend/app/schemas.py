@@ -32,6 +32,7 @@ class MonitoringJobResponse(BaseModel):
     is_active: bool
     created_at: datetime
     last_run: Optional[datetime] = None
+    next_run_at: Optional[datetime] = None
     
     class Config:
         from_attributes = True
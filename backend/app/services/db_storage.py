@@ -1,10 +1,17 @@
 """
 Database storage service for jobs and summaries
 """
+from sqlalchemy import update
 from sqlalchemy.orm import Session
-from app.models import User, Job, Summary, JobExecution, NotificationTarget, JobStatus
-from typing import List, Optional, Dict
-from datetime import datetime
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models import (
+    User, Job, Summary, JobExecution, NotificationTarget, JobStatus, JobAccountCursor,
+    Tweet, ExecutionTweet, SummaryCacheEntry
+)
+from app.utils.tweet_time import parse_tweet_timestamp, tweet_id_value
+from app.utils.schedule import to_utc_naive
+from typing import Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
 import uuid
 
 class DatabaseStorage:
@@ -28,7 +35,8 @@ class DatabaseStorage:
     def create_job(self, x_username: str, frequency: str, topics: List[str],
                    email: Optional[str] = None, user_id: Optional[int] = None,
                    notification_target_ids: Optional[List[int]] = None,
-                   language: Optional[str] = None) -> Dict:
+                   language: Optional[str] = None, max_pages: Optional[int] = None,
+                   max_tweets: Optional[int] = None, max_api_calls: Optional[int] = None) -> Dict:
         """Create a new monitoring job"""
         job = Job(
             user_id=user_id,
@@ -37,6 +45,9 @@ class DatabaseStorage:
             topics=topics or [],
             language=language or "en",
             email=email,
+            max_pages=max_pages,
+            max_tweets=max_tweets,
+            max_api_calls=max_api_calls,
             is_active=True
         )
         if notification_target_ids:
@@ -101,6 +112,68 @@ class DatabaseStorage:
             self.db.commit()
         return True
     
+    def set_job_next_run(self, job_id: int, next_run_at: Optional[datetime]):
+        """Store when a job should run next (None takes it off the schedule)"""
+        job = self.db.query(Job).filter(Job.id == job_id).first()
+        if job:
+            job.next_run_at = next_run_at
+            self.db.commit()
+
+    def set_jobs_next_run(self, updates: List[Tuple[int, Optional[datetime]]], batch_size: int = 1000):
+        """Store next_run_at for many jobs, as (job_id, next_run_at) pairs, in batched UPDATEs"""
+        for offset in range(0, len(updates), batch_size):
+            batch = updates[offset:offset + batch_size]
+            self.db.execute(update(Job), [{"id": job_id, "next_run_at": next_run_at} for job_id, next_run_at in batch])
+        self.db.commit()
+
+    def iter_job_schedule(self, batch_size: int = 1000) -> Iterator[Tuple[int, datetime]]:
+        """Stream (job_id, next_run_at) for every scheduled active job without loading whole rows"""
+        rows = self.db.query(Job.id, Job.next_run_at)\
+            .filter(Job.next_run_at.isnot(None), *self._schedulable())\
+            .execution_options(yield_per=batch_size)
+        for job_id, next_run_at in rows:
+            yield job_id, next_run_at
+
+    def get_unscheduled_jobs(self) -> List[Tuple[int, Optional[str], Optional[datetime]]]:
+        """(job_id, frequency, last_run) of active jobs that have no next_run_at yet"""
+        rows = self.db.query(Job.id, Job.frequency, Job.last_run)\
+            .filter(Job.next_run_at.is_(None), *self._schedulable())\
+            .all()
+        return [(job_id, frequency, last_run) for job_id, frequency, last_run in rows]
+
+    def iter_job_schedule_changes(self, since: datetime, batch_size: int = 1000) -> Iterator[Tuple[int, Optional[datetime]]]:
+        """
+        Stream (job_id, next_run_at) for jobs updated at or after `since`;
+        next_run_at is None for jobs that are paused, deleted or unscheduled
+        """
+        rows = self.db.query(Job.id, Job.next_run_at, Job.is_active, Job.status)\
+            .filter(Job.updated_at >= since)\
+            .execution_options(yield_per=batch_size)
+        for job_id, next_run_at, is_active, status in rows:
+            scheduled = is_active and status != JobStatus.DELETED
+            yield job_id, next_run_at if scheduled else None
+
+    def get_job_schedule_entries(self, job_ids: List[int], batch_size: int = 1000) -> Dict[int, Tuple[Optional[str], Optional[datetime]]]:
+        """{job_id: (frequency, next_run_at)} for the given jobs that are still active"""
+        entries = {}
+        for offset in range(0, len(job_ids), batch_size):
+            rows = self.db.query(Job.id, Job.frequency, Job.next_run_at)\
+                .filter(Job.id.in_(job_ids[offset:offset + batch_size]), *self._schedulable())\
+                .all()
+            for job_id, frequency, next_run_at in rows:
+                entries[job_id] = (frequency, next_run_at)
+        return entries
+
+    def _schedulable(self):
+        return (Job.is_active == True, Job.status != JobStatus.DELETED)
+
+    def touch_job_last_run(self, job_id: int):
+        """Advance a job's last_run without writing a summary"""
+        job = self.db.query(Job).filter(Job.id == job_id).first()
+        if job:
+            job.last_run = datetime.utcnow()
+        self.db.commit()
+
     # Summary operations
     def add_summary(
         self,
@@ -142,6 +215,196 @@ class DatabaseStorage:
             .all()
         return [self._summary_to_dict(s) for s in summaries]
 
+    def get_latest_summary(self, job_id: int) -> Optional[Dict]:
+        """Most recent summary of a job (ties broken by execution order)"""
+        summary = self.db.query(Summary)\
+            .filter(Summary.job_id == job_id)\
+            .order_by(Summary.created_at.desc(), Summary.execution_id.desc())\
+            .first()
+        return self._summary_to_dict(summary) if summary else None
+
+    # Tweet store operations
+    def upsert_tweets(self, tweets: List[Dict], execution_id: Optional[int] = None) -> int:
+        """
+        Bulk upsert fetched tweets (one row per tweet id, metrics refreshed on
+        conflict) and optionally link them to an execution. Returns rows written.
+        """
+        rows = {}
+        for tweet in tweets:
+            tweet_id = tweet.get("tweet_id")
+            if not tweet_id or not tweet.get("text"):
+                continue
+            rows[str(tweet_id)] = {
+                "tweet_id": str(tweet_id),
+                "username": tweet.get("username"),
+                "text": tweet.get("text"),
+                "url": tweet.get("url"),
+                "likes": tweet.get("likes") or 0,
+                "reposts": tweet.get("reposts") or 0,
+                "posted_at": parse_tweet_timestamp(tweet.get("timestamp")),
+                "updated_at": datetime.utcnow(),
+            }
+        if not rows:
+            return 0
+
+        insert = self._dialect_insert()
+        values = list(rows.values())
+        for start in range(0, len(values), 500):
+            chunk = values[start:start + 500]
+            statement = insert(Tweet).values(chunk)
+            statement = statement.on_conflict_do_update(
+                index_elements=[Tweet.tweet_id],
+                set_={
+                    "likes": statement.excluded.likes,
+                    "reposts": statement.excluded.reposts,
+                    "updated_at": statement.excluded.updated_at,
+                }
+            )
+            self.db.execute(statement)
+            if execution_id is not None:
+                links = insert(ExecutionTweet).values([
+                    {"execution_id": execution_id, "tweet_id": row["tweet_id"]} for row in chunk
+                ]).on_conflict_do_nothing()
+                self.db.execute(links)
+        self.db.commit()
+        return len(values)
+
+    def get_execution_tweets(self, job_id: int, execution_id: int) -> Optional[List[Dict]]:
+        """Get the stored tweets an execution summarized, newest first (None if no such execution)"""
+        execution = self.db.query(JobExecution)\
+            .filter(JobExecution.id == execution_id, JobExecution.job_id == job_id)\
+            .first()
+        if not execution:
+            return None
+        tweets = self.db.query(Tweet)\
+            .join(ExecutionTweet, ExecutionTweet.tweet_id == Tweet.tweet_id)\
+            .filter(ExecutionTweet.execution_id == execution_id)\
+            .order_by(Tweet.posted_at.desc())\
+            .all()
+        return [self._tweet_to_dict(t) for t in tweets]
+
+    # Summary cache operations
+    def get_cached_summary(self, fingerprint: str, max_age: timedelta) -> Optional[Dict]:
+        """Get a cached LLM summary by fingerprint if it is younger than max_age"""
+        entry = self.db.query(SummaryCacheEntry)\
+            .filter(SummaryCacheEntry.fingerprint == fingerprint)\
+            .first()
+        if not entry:
+            return None
+        created_at = entry.created_at
+        if created_at is not None:
+            if created_at.tzinfo is not None:
+                created_at = created_at.replace(tzinfo=None)
+            if datetime.utcnow() - created_at > max_age:
+                return None
+        return {
+            "summary": entry.summary,
+            "headline": entry.headline,
+            "usage": {"input_tokens": entry.input_tokens or 0, "output_tokens": entry.output_tokens or 0},
+            "created_at": created_at
+        }
+
+    def save_cached_summary(self, fingerprint: str, model: str, result: Dict):
+        """Store (or refresh) a cached LLM summary"""
+        usage = result.get("usage") or {}
+        values = {
+            "fingerprint": fingerprint,
+            "model": model,
+            "headline": result.get("headline"),
+            "summary": result.get("summary", ""),
+            "input_tokens": usage.get("input_tokens", 0),
+            "output_tokens": usage.get("output_tokens", 0),
+            "created_at": datetime.utcnow(),
+        }
+        statement = self._dialect_insert()(SummaryCacheEntry).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=[SummaryCacheEntry.fingerprint],
+            set_={key: statement.excluded[key] for key in values if key != "fingerprint"}
+        )
+        self.db.execute(statement)
+        self.db.commit()
+
+    def _dialect_insert(self):
+        if self.db.get_bind().dialect.name == "postgresql":
+            return postgresql.insert
+        return sqlite.insert
+
+    # Account cursor operations
+    def get_account_cursors(self, job_id: int) -> Dict[str, Dict]:
+        """Get the newest tweet seen per account for a job, keyed by lowercase username"""
+        cursors = self.db.query(JobAccountCursor).filter(JobAccountCursor.job_id == job_id).all()
+        return {
+            cursor.username: {
+                "last_tweet_id": cursor.last_tweet_id,
+                "last_tweet_at": cursor.last_tweet_at,
+                "backfill_since": cursor.backfill_since
+            }
+            for cursor in cursors
+        }
+
+    def advance_account_cursors(
+        self,
+        job_id: int,
+        tweets: List[Dict],
+        usernames: Optional[List[str]] = None,
+        truncated_since: Optional[Dict[str, datetime]] = None
+    ) -> None:
+        """
+        Move each account's cursor forward to the newest tweet in `tweets`.
+        Accounts in `truncated_since` left older tweets unfetched, so their cursor
+        stays put and the start of their window is kept as a low-water mark for
+        the next run; the other `usernames` were fully fetched and have it cleared.
+        """
+        truncated_since = {username.lower(): since for username, since in (truncated_since or {}).items()}
+        newest: Dict[str, Dict] = {}
+        for tweet in tweets:
+            username = str(tweet.get("username") or "").strip().lstrip("@").lower()
+            id_value = tweet_id_value(tweet.get("tweet_id"))
+            if not username or id_value is None or username in truncated_since:
+                continue
+            current = newest.get(username)
+            if current is None or id_value > current["id_value"]:
+                newest[username] = {"id_value": id_value, "tweet": tweet}
+        fetched = {str(username).strip().lstrip("@").lower() for username in (usernames or [])}
+        touched = set(newest) | set(truncated_since) | fetched
+        if not touched:
+            return
+
+        existing = {
+            cursor.username: cursor
+            for cursor in self.db.query(JobAccountCursor).filter(
+                JobAccountCursor.job_id == job_id,
+                JobAccountCursor.username.in_(list(touched))
+            ).all()
+        }
+        now = datetime.utcnow()
+        for username, since in truncated_since.items():
+            cursor = existing.get(username)
+            if cursor is None:
+                cursor = JobAccountCursor(job_id=job_id, username=username)
+                self.db.add(cursor)
+                existing[username] = cursor
+            if cursor.backfill_since is None or since < to_utc_naive(cursor.backfill_since):
+                cursor.backfill_since = since
+            cursor.updated_at = now
+        for username in fetched - set(truncated_since):
+            cursor = existing.get(username)
+            if cursor is not None and cursor.backfill_since is not None:
+                cursor.backfill_since = None
+                cursor.updated_at = now
+        for username, item in newest.items():
+            tweet = item["tweet"]
+            cursor = existing.get(username)
+            if cursor is None:
+                cursor = JobAccountCursor(job_id=job_id, username=username)
+                self.db.add(cursor)
+            elif (tweet_id_value(cursor.last_tweet_id) or 0) >= item["id_value"]:
+                continue
+            cursor.last_tweet_id = str(item["id_value"])
+            cursor.last_tweet_at = parse_tweet_timestamp(tweet.get("timestamp"))
+            cursor.updated_at = now
+        self.db.commit()
+
     def get_executions(self, job_id: int, limit: int = 50) -> List[Dict]:
         """Get all executions for a job"""
         executions = self.db.query(JobExecution)\
@@ -165,12 +428,16 @@ class DatabaseStorage:
             "topics": job.topics or [],
             "language": job.language,
             "email": job.email,
+            "max_pages": job.max_pages,
+            "max_tweets": job.max_tweets,
+            "max_api_calls": job.max_api_calls,
             "is_active": job.is_active,
             "status": job.status.value if job.status else None,
             "notification_target_id": job.notification_target_id,
             "notification_target_ids": notification_target_ids,
             "created_at": job.created_at.isoformat() if job.created_at else None,
             "last_run": job.last_run.isoformat() if job.last_run else None,
+            "next_run_at": job.next_run_at.isoformat() if job.next_run_at else None,
             "updated_at": job.updated_at.isoformat() if job.updated_at else None
         }
 
@@ -216,6 +483,18 @@ class DatabaseStorage:
             "created_at": summary.created_at.isoformat() if summary.created_at else None
         }
 
+    def _tweet_to_dict(self, tweet: Tweet) -> Dict:
+        """Convert Tweet model to dict (same keys as fetched tweets)"""
+        return {
+            "tweet_id": tweet.tweet_id,
+            "username": tweet.username,
+            "text": tweet.text,
+            "url": tweet.url,
+            "likes": tweet.likes,
+            "reposts": tweet.reposts,
+            "timestamp": tweet.posted_at.isoformat() if tweet.posted_at else None
+        }
+
     def _execution_to_dict(self, execution: JobExecution) -> Dict:
         """Convert JobExecution model to dict"""
         return {
@@ -225,6 +504,8 @@ class DatabaseStorage:
             "started_at": execution.started_at.isoformat() if execution.started_at else None,
             "completed_at": execution.completed_at.isoformat() if execution.completed_at else None,
             "tweets_fetched": execution.tweets_fetched,
+            "pages_fetched": execution.pages_fetched,
+            "pages_skipped": execution.pages_skipped,
             "error_message": execution.error_message,
             "created_at": execution.created_at.isoformat() if execution.created_at else None
         }
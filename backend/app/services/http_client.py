@@ -0,0 +1,68 @@
+"""
+Shared HTTP connection pool
+One keep-alive requests.Session reused by the Twitter and Telegram services
+"""
+import os
+import threading
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def build_session(
+    pool_connections: int = 10,
+    pool_maxsize: int = 20,
+    connect_retries: int = 2
+) -> requests.Session:
+    """
+    Build a session with a tuned connection pool.
+    Only connection failures are retried here; HTTP-level retries (429, 5xx)
+    stay with the callers that know how to back off.
+    """
+    retry = Retry(
+        total=connect_retries,
+        connect=connect_retries,
+        read=0,
+        status=0,
+        backoff_factor=0.5,
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_http_session() -> requests.Session:
+    """Return the process-wide session, creating it on first use"""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = build_session(
+                    pool_connections=int(os.getenv("HTTP_POOL_CONNECTIONS", "10")),
+                    pool_maxsize=int(os.getenv("HTTP_POOL_MAXSIZE", "20")),
+                    connect_retries=int(os.getenv("HTTP_CONNECT_RETRIES", "2")),
+                )
+                print("[HTTP] ✅ Shared connection pool initialized")
+    return _session
+
+
+def close_http_session():
+    """Close pooled connections (called on application shutdown)"""
+    global _session
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
@@ -0,0 +1,193 @@
+"""
+Database-backed queue of job runs
+The scheduler enqueues due runs; worker processes claim them with
+SELECT ... FOR UPDATE SKIP LOCKED on PostgreSQL (a compare-and-set update on
+SQLite) so each run is executed by exactly one worker
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import and_, or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.models import JobRun, JobRunStatus
+
+_ACTIVE_STATUSES = (JobRunStatus.QUEUED, JobRunStatus.RUNNING)
+
+
+class JobQueue:
+    def __init__(self, db: Session, max_attempts: Optional[int] = None, retry_delay: Optional[timedelta] = None):
+        self.db = db
+        if max_attempts is None:
+            max_attempts = int(os.getenv("JOB_QUEUE_MAX_ATTEMPTS", "3"))
+        if retry_delay is None:
+            retry_delay = timedelta(seconds=float(os.getenv("JOB_QUEUE_RETRY_DELAY_SECONDS", "60")))
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+
+    def enqueue(self, job_id: int, scheduled_for: datetime) -> Optional[Dict]:
+        """
+        Queue a run of a job for a schedule slot. Returns None when the slot is
+        already queued (by another scheduler) or the job still has a pending run.
+        """
+        pending = self.db.query(JobRun.id)\
+            .filter(JobRun.job_id == job_id, JobRun.status.in_(_ACTIVE_STATUSES))\
+            .first()
+        if pending:
+            return None
+        insert = postgresql.insert if self._is_postgres() else sqlite.insert
+        statement = insert(JobRun).values(
+            job_id=job_id,
+            status=JobRunStatus.QUEUED,
+            scheduled_for=scheduled_for,
+            attempts=0
+        ).on_conflict_do_nothing(index_elements=["job_id", "scheduled_for"])
+        result = self.db.execute(statement)
+        self.db.commit()
+        if not result.rowcount:
+            return None
+        run = self.db.query(JobRun)\
+            .filter(JobRun.job_id == job_id, JobRun.scheduled_for == scheduled_for)\
+            .first()
+        return self._run_to_dict(run) if run else None
+
+    def claim(self, worker_id: str) -> Optional[Dict]:
+        """Claim the oldest queued run for `worker_id`, or None if the queue is empty"""
+        if self._is_postgres():
+            run = self.db.query(JobRun)\
+                .filter(self._claimable())\
+                .order_by(JobRun.scheduled_for, JobRun.id)\
+                .with_for_update(skip_locked=True)\
+                .first()
+            if run is None:
+                self.db.commit()
+                return None
+            self._mark_claimed(run, worker_id)
+            self.db.commit()
+            return self._run_to_dict(run)
+
+        # SQLite has no row locks: claim with a conditional update and retry on a lost race
+        for _ in range(5):
+            candidate = self.db.query(JobRun.id)\
+                .filter(self._claimable())\
+                .order_by(JobRun.scheduled_for, JobRun.id)\
+                .first()
+            if candidate is None:
+                return None
+            result = self.db.execute(
+                update(JobRun)
+                .where(JobRun.id == candidate.id, JobRun.status == JobRunStatus.QUEUED)
+                .values(
+                    status=JobRunStatus.RUNNING,
+                    claimed_by=worker_id,
+                    claimed_at=datetime.utcnow(),
+                    attempts=JobRun.attempts + 1
+                )
+            )
+            self.db.commit()
+            if result.rowcount:
+                run = self.db.query(JobRun).filter(JobRun.id == candidate.id).first()
+                return self._run_to_dict(run)
+        return None
+
+    def heartbeat(self, run_ids: List[int], worker_id: str):
+        """Extend the lease on runs this worker is still executing"""
+        if not run_ids:
+            return
+        self.db.execute(
+            update(JobRun)
+            .where(
+                JobRun.id.in_(run_ids),
+                JobRun.claimed_by == worker_id,
+                JobRun.status == JobRunStatus.RUNNING
+            )
+            .values(claimed_at=datetime.utcnow())
+        )
+        self.db.commit()
+
+    def complete(self, run_id: int):
+        self._finish(run_id, JobRunStatus.COMPLETED)
+
+    def fail(self, run_id: int, error: str):
+        """Record a failed attempt; the run is re-queued until max_attempts is reached"""
+        run = self.db.query(JobRun).filter(JobRun.id == run_id).first()
+        if not run:
+            return
+        run.error_message = error
+        if (run.attempts or 0) < self.max_attempts:
+            # claimed_at stays as the attempt time; claim() waits retry_delay after it
+            run.status = JobRunStatus.QUEUED
+            run.claimed_by = None
+        else:
+            run.status = JobRunStatus.FAILED
+            run.finished_at = datetime.utcnow()
+        self.db.commit()
+
+    def requeue_expired(self, lease: timedelta) -> int:
+        """Return runs whose worker stopped heartbeating (crashed or killed) to the queue"""
+        cutoff = datetime.utcnow() - lease
+        expired = self.db.query(JobRun)\
+            .filter(JobRun.status == JobRunStatus.RUNNING, JobRun.claimed_at < cutoff)\
+            .all()
+        for run in expired:
+            print(f"[JOB QUEUE] ⚠️  Run {run.id} (job {run.job_id}) lease expired on {run.claimed_by}")
+            if (run.attempts or 0) < self.max_attempts:
+                run.status = JobRunStatus.QUEUED
+                run.claimed_by = None
+            else:
+                run.status = JobRunStatus.FAILED
+                run.finished_at = datetime.utcnow()
+                run.error_message = "Worker lease expired"
+        self.db.commit()
+        return len(expired)
+
+    def purge_finished(self, older_than: timedelta) -> int:
+        """Delete completed/failed runs older than `older_than`"""
+        cutoff = datetime.utcnow() - older_than
+        deleted = self.db.query(JobRun)\
+            .filter(
+                JobRun.status.in_((JobRunStatus.COMPLETED, JobRunStatus.FAILED)),
+                JobRun.finished_at < cutoff
+            )\
+            .delete(synchronize_session=False)
+        self.db.commit()
+        return deleted
+
+    def _finish(self, run_id: int, status: JobRunStatus):
+        run = self.db.query(JobRun).filter(JobRun.id == run_id).first()
+        if not run:
+            return
+        run.status = status
+        run.finished_at = datetime.utcnow()
+        self.db.commit()
+
+    def _claimable(self):
+        """Queued, and not retried within retry_delay of its previous attempt"""
+        return and_(
+            JobRun.status == JobRunStatus.QUEUED,
+            or_(JobRun.claimed_at.is_(None), JobRun.claimed_at <= datetime.utcnow() - self.retry_delay)
+        )
+
+    def _mark_claimed(self, run: JobRun, worker_id: str):
+        run.status = JobRunStatus.RUNNING
+        run.claimed_by = worker_id
+        run.claimed_at = datetime.utcnow()
+        run.attempts = (run.attempts or 0) + 1
+
+    def _is_postgres(self) -> bool:
+        return self.db.get_bind().dialect.name == "postgresql"
+
+    def _run_to_dict(self, run: JobRun) -> Dict:
+        return {
+            "id": run.id,
+            "job_id": run.job_id,
+            "status": run.status.value if run.status else None,
+            "scheduled_for": run.scheduled_for.isoformat() if run.scheduled_for else None,
+            "attempts": run.attempts,
+            "claimed_by": run.claimed_by,
+            "claimed_at": run.claimed_at.isoformat() if run.claimed_at else None,
+            "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+            "error_message": run.error_message,
+        }
@@ -0,0 +1,81 @@
+"""
+Lease-based leader election
+Instances compete for a named row in scheduler_leases; the holder renews it
+before it expires, and if it stops (crash, network loss) another instance
+takes over once the lease runs out
+"""
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import or_, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.database import SessionLocal
+from app.models import SchedulerLease
+
+
+class LeaderLease:
+    def __init__(self, name: str = "scheduler", holder_id: Optional[str] = None, lease_seconds: Optional[float] = None):
+        if lease_seconds is None:
+            lease_seconds = float(os.getenv("SCHEDULER_LEASE_SECONDS", "30"))
+        self.name = name
+        self.holder_id = holder_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.lease = timedelta(seconds=lease_seconds)
+        self.is_leader = False
+
+    def acquire(self) -> bool:
+        """
+        Take the lease if it is free or expired, or renew it if we hold it.
+        Returns whether this instance is the leader; errors count as not leading.
+        """
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            insert = postgresql.insert if db.get_bind().dialect.name == "postgresql" else sqlite.insert
+            db.execute(
+                insert(SchedulerLease)
+                .values(name=self.name, holder=None, expires_at=now)
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
+            result = db.execute(
+                update(SchedulerLease)
+                .where(
+                    SchedulerLease.name == self.name,
+                    or_(
+                        SchedulerLease.holder == self.holder_id,
+                        SchedulerLease.holder.is_(None),
+                        SchedulerLease.expires_at < now
+                    )
+                )
+                .values(holder=self.holder_id, expires_at=now + self.lease)
+            )
+            db.commit()
+            self.is_leader = bool(result.rowcount)
+        except Exception as e:
+            db.rollback()
+            print(f"[LEADER] ⚠️  Lease check failed, stepping down: {str(e)}")
+            self.is_leader = False
+        finally:
+            db.close()
+        return self.is_leader
+
+    def release(self):
+        """Give up the lease so another instance can take over without waiting for expiry"""
+        if not self.is_leader:
+            return
+        db = SessionLocal()
+        try:
+            db.execute(
+                update(SchedulerLease)
+                .where(SchedulerLease.name == self.name, SchedulerLease.holder == self.holder_id)
+                .values(holder=None, expires_at=datetime.utcnow())
+            )
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"[LEADER] ⚠️  Could not release lease: {str(e)}")
+        finally:
+            db.close()
+            self.is_leader = False
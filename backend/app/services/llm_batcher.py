@@ -0,0 +1,118 @@
+"""
+Process-wide batching stage for LLM calls
+Requests from concurrent jobs are collected for a short window, then
+dispatched through a bounded pool (optionally rate-limited) so an hourly
+wave of jobs is smoothed instead of hitting the provider all at once
+"""
+import asyncio
+import os
+from typing import Any, Awaitable, Callable, List, Optional, Set
+
+from app.services.rate_limiter import TokenBucketRateLimiter, PRIORITY_INTERACTIVE, PRIORITY_SCHEDULED, rate_limit_processes
+
+
+class _PendingCall:
+    __slots__ = ("call", "future", "priority")
+
+    def __init__(self, call: Callable[[], Awaitable[Any]], future: asyncio.Future, priority: str):
+        self.call = call
+        self.future = future
+        self.priority = priority
+
+
+class LLMRequestBatcher:
+    """
+    Collects submitted calls for `window_seconds` (up to `max_batch_size`),
+    then runs them with at most `max_concurrency` in flight. Interactive calls
+    in a batch go first. Each caller awaits its own result.
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 0.25,
+        max_batch_size: int = 16,
+        max_concurrency: int = 4,
+        requests_per_minute: float = 0
+    ):
+        self.window_seconds = max(window_seconds, 0.0)
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limiter = None
+        if requests_per_minute > 0:
+            self.rate_limiter = TokenBucketRateLimiter(
+                rate=requests_per_minute / 60.0,
+                burst=self.max_concurrency,
+                name="llm"
+            )
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, call: Callable[[], Awaitable[Any]], priority: str = PRIORITY_SCHEDULED) -> Any:
+        """Queue a call for the next batch and wait for its result"""
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait(_PendingCall(call, future, priority))
+        return await future
+
+    def _ensure_started(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._dispatcher is not None and not self._dispatcher.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._tasks = set()
+        self._dispatcher = loop.create_task(self._dispatch_loop())
+
+    async def _dispatch_loop(self):
+        while True:
+            batch = await self._collect_batch()
+            # Stable sort: interactive calls first, otherwise submission order
+            batch.sort(key=lambda pending: pending.priority != PRIORITY_INTERACTIVE)
+            if len(batch) > 1:
+                print(f"[LLM BATCHER] Dispatching batch of {len(batch)} requests ({self.max_concurrency} at a time)")
+            for pending in batch:
+                await self._semaphore.acquire()
+                task = self._loop.create_task(self._execute(pending))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _collect_batch(self) -> List[_PendingCall]:
+        batch = [await self._queue.get()]
+        deadline = self._loop.time() + self.window_seconds
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - self._loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _execute(self, pending: _PendingCall):
+        try:
+            if pending.future.done():
+                return  # Caller went away
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire_async(pending.priority)
+            result = await pending.call()
+            if not pending.future.done():
+                pending.future.set_result(result)
+        except Exception as e:
+            if not pending.future.done():
+                pending.future.set_exception(e)
+        finally:
+            self._semaphore.release()
+
+
+# Global batcher shared by every LLMService instance
+llm_batcher = LLMRequestBatcher(
+    window_seconds=float(os.getenv("LLM_BATCH_WINDOW_SECONDS", "0.25")),
+    max_batch_size=int(os.getenv("LLM_BATCH_MAX_SIZE", "16")),
+    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "4")),
+    requests_per_minute=float(os.getenv("LLM_REQUESTS_PER_MINUTE", "0")) / rate_limit_processes(),
+)
@@ -0,0 +1,207 @@
+"""
+LLM provider layer
+Each provider wraps one model behind an async generate() with its own
+concurrency limit and timeout; instances are shared per (provider, model)
+"""
+import asyncio
+import hashlib
+import os
+import re
+import threading
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class LLMProvider:
+    """Base provider: generate() returns (raw text, usage) or raises; stream() yields text as it arrives"""
+    name = "base"
+
+    def __init__(self, model_name: str, max_concurrency: int = 8, timeout_seconds: float = 120):
+        self.model_name = model_name
+        self.max_concurrency = max(1, max_concurrency)
+        self.timeout_seconds = timeout_seconds
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    async def generate(self, prompt: str) -> Tuple[str, Dict]:
+        async with self._semaphore:
+            if self.timeout_seconds and self.timeout_seconds > 0:
+                return await asyncio.wait_for(self._generate(prompt), self.timeout_seconds)
+            return await self._generate(prompt)
+
+    async def stream(self, prompt: str) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        """
+        Yield (text delta, None) as text arrives, then ("", usage) at the end.
+        The timeout applies to the wait for each chunk.
+        """
+        async with self._semaphore:
+            chunks = self._stream(prompt).__aiter__()
+            while True:
+                try:
+                    if self.timeout_seconds and self.timeout_seconds > 0:
+                        item = await asyncio.wait_for(chunks.__anext__(), self.timeout_seconds)
+                    else:
+                        item = await chunks.__anext__()
+                except StopAsyncIteration:
+                    return
+                yield item
+
+    async def _generate(self, prompt: str) -> Tuple[str, Dict]:
+        raise NotImplementedError
+
+    async def _stream(self, prompt: str) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        # Providers without native streaming deliver the whole response as one chunk
+        text, usage = await self._generate(prompt)
+        yield text, None
+        yield "", usage
+
+    def __repr__(self) -> str:
+        return f"{self.name}:{self.model_name}"
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, model_name: Optional[str] = None, **kwargs):
+        import google.generativeai as genai
+        api_key = os.getenv("GEMINI_API_KEY")
+        if not api_key:
+            raise ValueError("GEMINI_API_KEY not found in environment variables")
+        genai.configure(api_key=api_key)
+        # Use gemini-2.5-flash as default (latest and fastest)
+        model_name = model_name or os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
+        super().__init__(model_name, **kwargs)
+        self.model = genai.GenerativeModel(model_name)
+
+    async def _generate(self, prompt: str) -> Tuple[str, Dict]:
+        response = await self.model.generate_content_async(prompt)
+        if not hasattr(response, "text"):
+            print(f"[LLM PROVIDER] ⚠️  Gemini response object structure: {dir(response)}")
+            return str(response), {"input_tokens": 0, "output_tokens": 0}
+        return response.text, self._usage(response)
+
+    async def _stream(self, prompt: str) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        response = await self.model.generate_content_async(prompt, stream=True)
+        async for chunk in response:
+            try:
+                text = chunk.text
+            except ValueError:
+                text = ""  # Chunk without text parts (e.g. safety metadata only)
+            if text:
+                yield text, None
+        yield "", self._usage(response)
+
+    def _usage(self, response) -> Dict:
+        usage = {"input_tokens": 0, "output_tokens": 0}
+        usage_meta = getattr(response, "usage_metadata", None)
+        if usage_meta:
+            usage["input_tokens"] = getattr(usage_meta, "prompt_token_count", 0)
+            usage["output_tokens"] = getattr(usage_meta, "candidates_token_count", 0)
+        return usage
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, model_name: Optional[str] = None, **kwargs):
+        self.api_key = os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OPENAI_API_KEY not found in environment variables")
+        super().__init__(model_name or os.getenv("OPENAI_MODEL", "gpt-3.5-turbo"), **kwargs)
+
+    async def _generate(self, prompt: str) -> Tuple[str, Dict]:
+        import openai
+        openai.api_key = self.api_key
+        # The legacy OpenAI client is blocking, so keep it off the event loop
+        response = await asyncio.to_thread(
+            openai.ChatCompletion.create,
+            model=self.model_name,
+            messages=[
+                {"role": "system", "content": "You are a helpful assistant that summarizes social media content."},
+                {"role": "user", "content": prompt}
+            ]
+        )
+        usage = {
+            "input_tokens": getattr(response.usage, "prompt_tokens", 0),
+            "output_tokens": getattr(response.usage, "completion_tokens", 0)
+        }
+        return response.choices[0].message.content, usage
+
+
+class StubProvider(LLMProvider):
+    """
+    Offline, deterministic provider for local testing and benchmarks.
+    Output depends only on the prompt; LLM_STUB_LATENCY_SECONDS simulates latency.
+    """
+    name = "stub"
+
+    def __init__(self, model_name: Optional[str] = None, **kwargs):
+        super().__init__(model_name or "stub-1", **kwargs)
+        self.latency_seconds = float(os.getenv("LLM_STUB_LATENCY_SECONDS", "0"))
+
+    async def _generate(self, prompt: str) -> Tuple[str, Dict]:
+        if self.latency_seconds > 0:
+            await asyncio.sleep(self.latency_seconds)
+        digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()[:8]
+        urls = re.findall(r"https?://\S+", prompt)[:3]
+        tweets_count = prompt.count("Tweet: ")
+        lines = [
+            f"Headline: Stub digest {digest} covering {tweets_count} tweets",
+            "Summary:",
+            f"Deterministic stub summary {digest} for a prompt of {len(prompt)} characters.",
+        ]
+        if urls:
+            lines.append("Relevant Tweets:")
+            lines.extend(f"{idx}) Stub reference — {url}" for idx, url in enumerate(urls, start=1))
+        text = "\n".join(lines)
+        return text, {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4}
+
+    async def _stream(self, prompt: str) -> AsyncIterator[Tuple[str, Optional[Dict]]]:
+        text, usage = await self._generate(prompt)
+        for line in text.splitlines(keepends=True):
+            await asyncio.sleep(0)
+            yield line, None
+        yield "", usage
+
+
+PROVIDER_CLASSES = {
+    GeminiProvider.name: GeminiProvider,
+    OpenAIProvider.name: OpenAIProvider,
+    StubProvider.name: StubProvider,
+}
+
+_providers: Dict[Tuple[str, Optional[str]], LLMProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def get_provider(name: str, model_name: Optional[str] = None) -> LLMProvider:
+    """Shared provider instance for (name, model), so concurrency limits are process-wide"""
+    name = (name or "").strip().lower()
+    provider_class = PROVIDER_CLASSES.get(name)
+    if provider_class is None:
+        raise ValueError(f"Unknown LLM provider: {name}")
+    key = (name, model_name or None)
+    with _providers_lock:
+        provider = _providers.get(key)
+        if provider is None:
+            provider = provider_class(
+                model_name,
+                max_concurrency=int(os.getenv("LLM_PROVIDER_CONCURRENCY", "8")),
+                timeout_seconds=float(os.getenv("LLM_TIMEOUT_SECONDS", "120")),
+            )
+            _providers[key] = provider
+        return provider
+
+
+def default_provider_name() -> str:
+    """LLM_PROVIDER if set, otherwise whichever API key is configured"""
+    configured = os.getenv("LLM_PROVIDER")
+    if configured:
+        return configured.strip().lower()
+    if os.getenv("GEMINI_API_KEY"):
+        return GeminiProvider.name
+    if os.getenv("OPENAI_API_KEY"):
+        return OpenAIProvider.name
+    raise ValueError("No LLM API key found. Set GEMINI_API_KEY or OPENAI_API_KEY (or LLM_PROVIDER=stub)")
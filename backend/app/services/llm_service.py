@@ -1,51 +1,61 @@
+import asyncio
+import hashlib
 import os
-from typing import List, Dict, Optional, Tuple
+from typing import AsyncIterator, List, Dict, Optional, Tuple
 from dotenv import load_dotenv
-import google.generativeai as genai
-from app.utils.summary_headline import build_summary_headline
+from app.database import SessionLocal
+from app.services.db_storage import DatabaseStorage
+from app.services.llm_batcher import llm_batcher
+from app.services.llm_providers import LLMProvider, get_provider, default_provider_name
+from app.services.rate_limiter import PRIORITY_INTERACTIVE, PRIORITY_SCHEDULED
+from app.services.prompt_builder import PromptBuilder
+from app.services.summary_cache import summary_cache, summary_fingerprint
+from app.utils.summary_headline import build_summary_headline, SummaryStreamParser
 
 load_dotenv()
 
+# Bump whenever the prompt changes so cached summaries from the old prompt are not reused
+PROMPT_VERSION = "2"
+# Placeholder swapped for the tweet block once the rest of the prompt is sized
+_TWEETS_PLACEHOLDER = "\x00TWEETS\x00"
+
 class LLMService:
     def __init__(self):
-        self.gemini_api_key = os.getenv("GEMINI_API_KEY")
-        self.openai_api_key = os.getenv("OPENAI_API_KEY")
-        
-        if self.gemini_api_key:
-            genai.configure(api_key=self.gemini_api_key)
-            # Use gemini-2.5-flash as default (latest and fastest)
-            # Can be overridden with GEMINI_MODEL environment variable
-            model_name = os.getenv("GEMINI_MODEL", "gemini-2.5-flash")
-            print(f"[LLM SERVICE] Initializing Gemini with model: {model_name}")
+        # Primary provider (LLM_PROVIDER, or whichever API key is set) plus an optional fallback
+        provider_name = default_provider_name()
+        print(f"[LLM SERVICE] Initializing provider: {provider_name}")
+        self.providers: List[LLMProvider] = [get_provider(provider_name)]
+        fallback_name = os.getenv("LLM_FALLBACK_PROVIDER")
+        if fallback_name:
             try:
-                self.model = genai.GenerativeModel(model_name)
-                self.provider = "gemini"
-                print(f"[LLM SERVICE] ✅ Successfully initialized Gemini model: {model_name}")
+                self.providers.append(get_provider(fallback_name, os.getenv("LLM_FALLBACK_MODEL") or None))
             except Exception as e:
-                print(f"[LLM SERVICE] ⚠️  Failed to initialize {model_name}, trying gemini-1.5-flash...")
-                try:
-                    self.model = genai.GenerativeModel("gemini-1.5-flash")
-                    self.provider = "gemini"
-                    print(f"[LLM SERVICE] ✅ Successfully initialized with fallback model: gemini-1.5-flash")
-                except Exception as e2:
-                    print(f"[LLM SERVICE] ❌ Failed to initialize any Gemini model: {str(e2)}")
-                    raise
-        elif self.openai_api_key:
-            self.provider = "openai"
-            # OpenAI would be imported here if needed
-        else:
-            raise ValueError("No LLM API key found. Set GEMINI_API_KEY or OPENAI_API_KEY")
+                print(f"[LLM SERVICE] ⚠️  Fallback provider {fallback_name} unavailable: {str(e)}")
+        self.provider = self.providers[0].name
+        self.model_name = self.providers[0].model_name
+        print(f"[LLM SERVICE] ✅ Providers: {', '.join(repr(p) for p in self.providers)}")
+        self.prompt_builder = PromptBuilder()
+        # Above this many tweets, summarize in parallel chunks and merge (0 disables)
+        self.map_reduce_threshold = int(os.getenv("LLM_MAP_REDUCE_THRESHOLD", "150"))
+        self.map_chunk_size = max(1, int(os.getenv("LLM_MAP_CHUNK_SIZE", "50")))
+        self.map_concurrency = max(1, int(os.getenv("LLM_MAP_CONCURRENCY", "4")))
+        # Delta summaries: smaller tweet budget, and how much of the previous summary to carry
+        self.delta_max_prompt_tokens = int(os.getenv("LLM_DELTA_MAX_PROMPT_TOKENS", "6000"))
+        self.delta_previous_chars = int(os.getenv("LLM_DELTA_PREVIOUS_CHARS", "2000"))
     
-    def summarize_tweets(
+    async def summarize_tweets(
         self,
         tweets: List[Dict],
         topics: List[str] = None,
         x_username: str = None,
         time_range: str = None,
-        language: Optional[str] = None
+        language: Optional[str] = None,
+        priority: str = PRIORITY_SCHEDULED
     ) -> Dict:
         """
-        Generate AI summary of tweets using Gemini or ChatGPT
+        Generate AI summary of tweets using Gemini or ChatGPT.
+        Results are cached by tweet-set fingerprint; cache hits carry "cached": True.
+        Provider calls go through the shared batcher (interactive calls first).
         """
         print("=" * 80)
         print("[LLM SERVICE] Starting tweet summarization")
@@ -66,43 +76,388 @@ class LLMService:
                 "usage": {"input_tokens": 0, "output_tokens": 0}
             }
         
-        # Prepare tweet content for LLM
-        tweet_texts = []
-        for idx, tweet in enumerate(tweets):
-            tweet_str = f"Tweet: {tweet.get('text', '')}\n"
-            tweet_str += f"ID: {tweet.get('tweet_id', '')}\n"
-            tweet_str += f"URL: {tweet.get('url', '')}\n"
-            if tweet.get("username"):
-                tweet_str += f"Account: @{tweet.get('username')}\n"
-            tweet_str += f"Likes: {tweet.get('likes', 0)}, Reposts: {tweet.get('reposts', 0)}\n"
-            tweet_str += f"Time: {tweet.get('timestamp', 'Unknown')}\n"
-            tweet_texts.append(tweet_str)
-            if idx < 2:  # Log first 2 tweets
-                print(f"[LLM SERVICE] Sample tweet {idx + 1}: {tweet.get('text', '')[:100]}...")
-        
-        combined_text = "\n---\n".join(tweet_texts)
-        print(f"[LLM SERVICE] Combined text length: {len(combined_text)} characters")
-        
-        language_map = {
-            "zh": "Chinese",
-            "en": "English",
-            "es": "Spanish",
-            "fr": "French",
-            "de": "German",
-            "ja": "Japanese",
-            "ko": "Korean",
-            "pt": "Portuguese",
-            "ru": "Russian",
-            "it": "Italian",
-            "ar": "Arabic",
-            "hi": "Hindi",
-            "id": "Indonesian",
-            "tr": "Turkish",
-            "vi": "Vietnamese",
-            "th": "Thai",
-            "nl": "Dutch"
+        fingerprint = summary_fingerprint(
+            tweets, topics, language, self.model_name, PROMPT_VERSION, x_username, time_range
+        )
+        cached = await self._get_cached_summary(fingerprint)
+        if cached:
+            print(f"[LLM SERVICE] ✅ Summary cache hit ({fingerprint[:12]}), skipping {self.provider} call")
+            print("=" * 80)
+            return cached
+
+        if self.map_reduce_threshold and len(tweets) > self.map_reduce_threshold:
+            result = await self._summarize_map_reduce(tweets, topics, x_username, time_range, language, priority)
+        else:
+            prompt = self._build_prompt(tweets, topics, x_username, time_range, language)
+            result = await self._generate_summary(prompt, priority)
+        if not result.get("error"):
+            await self._store_cached_summary(fingerprint, result)
+        return result
+
+    async def summarize_changes(
+        self,
+        tweets: List[Dict],
+        previous_summary: str,
+        topics: List[str] = None,
+        x_username: str = None,
+        time_range: str = None,
+        language: Optional[str] = None,
+        priority: str = PRIORITY_SCHEDULED
+    ) -> Dict:
+        """
+        Incremental summary: the previous summary plus only the new tweets go
+        into a compact "what changed" prompt, so input tokens track new
+        activity. Returns the same fields as summarize_tweets, plus "delta": True.
+        Falls back to a full summary without a previous summary or when the
+        new tweets alone need map-reduce.
+        """
+        previous_summary = (previous_summary or "").strip()
+        if not tweets or not previous_summary or (
+            self.map_reduce_threshold and len(tweets) > self.map_reduce_threshold
+        ):
+            return await self.summarize_tweets(tweets, topics, x_username, time_range, language, priority)
+
+        print("=" * 80)
+        print(f"[LLM SERVICE] Starting delta summarization of {len(tweets)} new tweets ({self.provider})")
+        if len(previous_summary) > self.delta_previous_chars:
+            previous_summary = previous_summary[: self.delta_previous_chars].rstrip() + "…"
+
+        # The previous summary is part of the input, so it is part of the cache key
+        previous_digest = hashlib.sha256(previous_summary.encode("utf-8")).hexdigest()[:16]
+        fingerprint = summary_fingerprint(
+            tweets, topics, language, self.model_name, f"{PROMPT_VERSION}-delta-{previous_digest}",
+            x_username, time_range
+        )
+        cached = await self._get_cached_summary(fingerprint)
+        if cached:
+            print(f"[LLM SERVICE] ✅ Summary cache hit ({fingerprint[:12]}), skipping {self.provider} call")
+            print("=" * 80)
+            return {**cached, "delta": True}
+
+        prompt = self._build_delta_prompt(tweets, previous_summary, topics, x_username, time_range, language)
+        result = await self._generate_summary(prompt, priority)
+        if not result.get("error"):
+            await self._store_cached_summary(fingerprint, result)
+        return {**result, "delta": True}
+
+    async def stream_summary(
+        self,
+        tweets: List[Dict],
+        topics: List[str] = None,
+        x_username: str = None,
+        time_range: str = None,
+        language: Optional[str] = None,
+        priority: str = PRIORITY_INTERACTIVE
+    ) -> AsyncIterator[Dict]:
+        """
+        Streaming variant of summarize_tweets. Yields events while the response
+        is generated: {"type": "headline", "headline"} as soon as the headline
+        line is complete, {"type": "delta", "text"} for summary text, and a
+        final {"type": "done", "summary", "headline", "usage", ...} with the
+        same fields summarize_tweets returns.
+        """
+        print("=" * 80)
+        print(f"[LLM SERVICE] Starting streamed summarization of {len(tweets)} tweets ({self.provider})")
+        if not tweets:
+            yield {"type": "done", "summary": "No tweets found to summarize.", "usage": {"input_tokens": 0, "output_tokens": 0}}
+            return
+
+        fingerprint = summary_fingerprint(
+            tweets, topics, language, self.model_name, PROMPT_VERSION, x_username, time_range
+        )
+        cached = await self._get_cached_summary(fingerprint)
+        if cached:
+            print(f"[LLM SERVICE] ✅ Summary cache hit ({fingerprint[:12]}), skipping {self.provider} call")
+            if cached.get("headline"):
+                yield {"type": "headline", "headline": cached["headline"]}
+            yield {"type": "delta", "text": cached.get("summary", "")}
+            yield {"type": "done", **cached}
+            return
+
+        usage = {"input_tokens": 0, "output_tokens": 0}
+        fallback = False
+        if self.map_reduce_threshold and len(tweets) > self.map_reduce_threshold:
+            # Chunk notes are not user-facing; only the reduce pass is streamed
+            notes, usage, fallback = await self._map_chunks(tweets, topics, language, priority)
+            if not notes:
+                yield {"type": "done", "summary": "Error generating summary: every chunk failed", "usage": usage, "error": True}
+                return
+            prompt = self._build_prompt(tweets, topics, x_username, time_range, language, notes=notes)
+        else:
+            prompt = self._build_prompt(tweets, topics, x_username, time_range, language)
+
+        parser = SummaryStreamParser()
+        raw_parts = []
+        try:
+            async for delta, stream_usage, stream_fallback in self._stream_provider(prompt):
+                fallback = fallback or stream_fallback
+                if stream_usage:
+                    usage["input_tokens"] += stream_usage.get("input_tokens", 0) or 0
+                    usage["output_tokens"] += stream_usage.get("output_tokens", 0) or 0
+                if delta:
+                    raw_parts.append(delta)
+                    for event in parser.feed(delta):
+                        yield event
+            for event in parser.close():
+                yield event
+        except Exception as e:
+            error_msg = f"Error generating summary: {str(e)}"
+            print(f"[LLM SERVICE] ❌ {error_msg}")
+            yield {"type": "done", "summary": error_msg, "usage": usage, "error": True}
+            return
+
+        headline, summary = self._extract_headline_and_summary("".join(raw_parts))
+        if not headline:
+            headline = build_summary_headline(summary)
+        result = {"summary": summary, "headline": headline, "usage": usage}
+        if fallback:
+            result["fallback"] = True
+        print(f"[LLM SERVICE] ✅ Streamed summary complete ({len(summary)} characters)")
+        print("=" * 80)
+        await self._store_cached_summary(fingerprint, result)
+        yield {"type": "done", **result}
+
+    async def _stream_provider(self, prompt: str) -> AsyncIterator[Tuple[str, Optional[Dict], bool]]:
+        """
+        Stream from the primary provider; fails over only if nothing was streamed yet.
+        Yields (text delta, usage, whether a fallback provider produced it).
+        """
+        print(f"[LLM SERVICE] Prompt length: {len(prompt)} characters")
+        last_error: Optional[Exception] = None
+        for provider in self.providers:
+            print(f"[LLM SERVICE] Streaming from {provider!r}...")
+            started = False
+            try:
+                async for delta, usage in provider.stream(prompt):
+                    started = True
+                    yield delta, usage, provider is not self.providers[0]
+                return
+            except asyncio.TimeoutError:
+                last_error = TimeoutError(f"{provider!r} stalled for over {provider.timeout_seconds:g}s")
+            except Exception as e:
+                last_error = e
+            print(f"[LLM SERVICE] ⚠️  {provider!r} failed: {str(last_error)}")
+            if started:
+                break  # Text already went out; switching providers would garble it
+        raise last_error
+
+    async def _generate_summary(self, prompt: str, priority: str = PRIORITY_SCHEDULED) -> Dict:
+        """Call the configured provider with a prepared prompt and parse the headline/summary"""
+        try:
+            raw_text, usage, fallback = await self._call_provider(prompt, priority)
+            headline, summary = self._extract_headline_and_summary(raw_text)
+            if not headline:
+                headline = build_summary_headline(summary)
+            print(f"[LLM SERVICE] Summary length: {len(summary)} characters")
+            print(f"[LLM SERVICE] Summary preview: {summary[:200]}...")
+            result = {"summary": summary, "headline": headline, "usage": usage}
+            if fallback:
+                result["fallback"] = True
+            return result
+        except Exception as e:
+            error_msg = f"Error generating summary: {str(e)}"
+            print(f"[LLM SERVICE] ❌ {error_msg}")
+            print(f"[LLM SERVICE] Exception type: {type(e).__name__}")
+            import traceback
+            print(f"[LLM SERVICE] Traceback: {traceback.format_exc()}")
+            return {"summary": error_msg, "usage": {"input_tokens": 0, "output_tokens": 0}, "error": True}
+        finally:
+            print("=" * 80)
+
+    async def _call_provider(self, prompt: str, priority: str = PRIORITY_SCHEDULED) -> Tuple[str, Dict, bool]:
+        """Queue one prompt on the shared batcher; returns (raw text, usage, fallback used)"""
+        return await llm_batcher.submit(lambda: self._request_provider(prompt), priority)
+
+    async def _request_provider(self, prompt: str) -> Tuple[str, Dict, bool]:
+        """
+        Send one prompt to the primary provider, failing over to the next one
+        on error or timeout; returns (raw text, usage, whether a fallback answered)
+        """
+        print(f"[LLM SERVICE] Prompt length: {len(prompt)} characters")
+        last_error: Optional[Exception] = None
+        for provider in self.providers:
+            print(f"[LLM SERVICE] Making API call to {provider!r}...")
+            try:
+                raw_text, usage = await provider.generate(prompt)
+                print(f"[LLM SERVICE] ✅ {provider!r} response received")
+                return raw_text, usage, provider is not self.providers[0]
+            except asyncio.TimeoutError:
+                last_error = TimeoutError(f"{provider!r} timed out after {provider.timeout_seconds:g}s")
+            except Exception as e:
+                last_error = e
+            print(f"[LLM SERVICE] ⚠️  {provider!r} failed: {str(last_error)}")
+        raise last_error
+
+    async def _summarize_map_reduce(
+        self,
+        tweets: List[Dict],
+        topics: Optional[List[str]],
+        x_username: Optional[str],
+        time_range: Optional[str],
+        language: Optional[str],
+        priority: str = PRIORITY_SCHEDULED
+    ) -> Dict:
+        """
+        Summarize chunks of tweets in parallel (map), then merge the chunk
+        notes into the final Headline/Summary response (reduce)
+        """
+        notes, usage, fallback = await self._map_chunks(tweets, topics, language, priority)
+        if not notes:
+            print("=" * 80)
+            return {
+                "summary": "Error generating summary: every chunk failed",
+                "usage": usage,
+                "error": True
+            }
+
+        result = await self._generate_summary(
+            self._build_prompt(tweets, topics, x_username, time_range, language, notes=notes),
+            priority
+        )
+        reduce_usage = result.get("usage") or {}
+        result["usage"] = {
+            "input_tokens": usage["input_tokens"] + (reduce_usage.get("input_tokens", 0) or 0),
+            "output_tokens": usage["output_tokens"] + (reduce_usage.get("output_tokens", 0) or 0)
         }
-        language_label = language_map.get((language or "en").lower(), "English")
+        if fallback:
+            result["fallback"] = True
+        return result
+
+    async def _map_chunks(
+        self,
+        tweets: List[Dict],
+        topics: Optional[List[str]],
+        language: Optional[str],
+        priority: str = PRIORITY_SCHEDULED
+    ) -> Tuple[List[str], Dict, bool]:
+        """Map step: condense chunks in parallel; returns (chunk notes, summed usage, any fallback used)"""
+        chunks = self._chunk_tweets(tweets)
+        print(f"[LLM SERVICE] Map-reduce: {len(tweets)} tweets in {len(chunks)} chunks, {self.map_concurrency} at a time")
+        semaphore = asyncio.Semaphore(self.map_concurrency)
+
+        async def summarize_chunk(index: int, chunk: List[Dict]) -> Optional[Tuple[str, Dict, bool]]:
+            async with semaphore:
+                try:
+                    return await self._call_provider(self._build_chunk_prompt(chunk, topics, language), priority)
+                except Exception as e:
+                    print(f"[LLM SERVICE] ⚠️  Chunk {index + 1}/{len(chunks)} failed: {str(e)}")
+                    return None
+
+        results = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks)))
+        notes = []
+        usage = {"input_tokens": 0, "output_tokens": 0}
+        fallback = False
+        for result in results:
+            if result is None:
+                continue
+            text, chunk_usage, chunk_fallback = result
+            fallback = fallback or chunk_fallback
+            notes.append(text.strip())
+            usage["input_tokens"] += chunk_usage.get("input_tokens", 0) or 0
+            usage["output_tokens"] += chunk_usage.get("output_tokens", 0) or 0
+        print(f"[LLM SERVICE] Map-reduce: reducing {len(notes)}/{len(chunks)} chunk notes")
+        return notes, usage, fallback
+
+    def _chunk_tweets(self, tweets: List[Dict]) -> List[List[Dict]]:
+        """Split tweets into chunks of up to map_chunk_size, keeping each account's tweets together"""
+        groups: Dict[str, List[Dict]] = {}
+        for tweet in tweets:
+            groups.setdefault(str(tweet.get("username") or "").lower(), []).append(tweet)
+        size = self.map_chunk_size
+        chunks = []
+        leftover: List[Dict] = []
+        for group in groups.values():
+            for start in range(0, len(group), size):
+                piece = group[start:start + size]
+                if len(piece) == size:
+                    chunks.append(piece)
+                    continue
+                # Pack small accounts / remainders together to avoid tiny calls
+                if len(leftover) + len(piece) > size:
+                    chunks.append(leftover)
+                    leftover = []
+                leftover.extend(piece)
+        if leftover:
+            chunks.append(leftover)
+        return chunks
+
+    def _build_chunk_prompt(self, tweets: List[Dict], topics: Optional[List[str]], language: Optional[str]) -> str:
+        """Prompt for the map step: condense one chunk into short, sourced notes"""
+        topics_str = ", ".join(topics) if topics else "general topics"
+        prompt = f"""You are condensing one batch of tweets from X (Twitter) into notes for a later digest.
+Respond in {self._language_label(language)}. Use plain text only: no markdown or asterisks.
+User interests: {topics_str}
+Write at most 8 short lines. Each line states one signal, theme or notable claim, prioritizing the user interests, names the account, and ends with the URL of its strongest supporting tweet.
+Mention engagement (likes/reposts) when a tweet clearly stands out.
+
+Tweets:
+{_TWEETS_PLACEHOLDER}
+"""
+        overhead = self.prompt_builder.estimate_tokens(prompt.replace(_TWEETS_PLACEHOLDER, ""))
+        budget = max(self.prompt_builder.max_prompt_tokens - overhead, 0)
+        block, _ = self.prompt_builder.build_tweet_block(tweets, topics, budget)
+        return prompt.replace(_TWEETS_PLACEHOLDER, block)
+
+    async def _get_cached_summary(self, fingerprint: str) -> Optional[Dict]:
+        """Look up a summary in memory, then in the database"""
+        if not summary_cache.enabled:
+            return None
+        result = summary_cache.get(fingerprint)
+        if result is None:
+            try:
+                result = await asyncio.to_thread(self._load_cached_summary, fingerprint)
+            except Exception as e:
+                print(f"[LLM SERVICE] ⚠️  Summary cache lookup failed: {str(e)}")
+                return None
+            if result is None:
+                return None
+            summary_cache.put(fingerprint, result, stored_at=result.pop("created_at", None))
+        result["cached"] = True
+        return result
+
+    async def _store_cached_summary(self, fingerprint: str, result: Dict):
+        if not summary_cache.enabled:
+            return
+        if result.get("fallback"):
+            # The key names the primary model; a fallback's output must not be served as its result
+            print(f"[LLM SERVICE] Not caching summary {fingerprint[:12]} produced by a fallback provider")
+            return
+        cached = {key: result.get(key) for key in ("summary", "headline", "usage")}
+        summary_cache.put(fingerprint, cached)
+        try:
+            await asyncio.to_thread(self._save_cached_summary, fingerprint, cached)
+        except Exception as e:
+            print(f"[LLM SERVICE] ⚠️  Failed to persist summary cache entry: {str(e)}")
+
+    def _load_cached_summary(self, fingerprint: str) -> Optional[Dict]:
+        db = SessionLocal()
+        try:
+            return DatabaseStorage(db).get_cached_summary(fingerprint, summary_cache.ttl)
+        finally:
+            db.close()
+
+    def _save_cached_summary(self, fingerprint: str, result: Dict):
+        db = SessionLocal()
+        try:
+            DatabaseStorage(db).save_cached_summary(fingerprint, self.model_name, result)
+        finally:
+            db.close()
+
+    def _build_prompt(
+        self,
+        tweets: List[Dict],
+        topics: Optional[List[str]],
+        x_username: Optional[str],
+        time_range: Optional[str],
+        language: Optional[str],
+        notes: Optional[List[str]] = None
+    ) -> str:
+        """
+        Build the summarization prompt for a set of tweets.
+        The tweet block is ranked and trimmed to fit LLM_MAX_PROMPT_TOKENS.
+        With `notes` (map-reduce), the chunk notes replace the raw tweets.
+        """
+        language_label = self._language_label(language)
 
         # Create prompt - emphasize topics in the prompt rather than filtering
         if topics and len(topics) > 0:
@@ -132,6 +487,7 @@ Instructions:
         
         account_line = self._format_account_line(x_username)
         time_line = f"Time range: {time_range}\n" if time_range else ""
+        source_label = "Tweets" if notes is None else "Notes on batches of these tweets (with source URLs)"
 
         prompt = f"""Please provide a concise, insight-driven analysis of the following tweets from a user's X (Twitter) account.
 Respond in {language_label}. Use plain text only: no markdown or asterisks.
@@ -145,8 +501,8 @@ Relevant Tweets:
 1) <short quote or paraphrase> — <URL>
 Include up to 3 tweets that are most relevant to the topics. Each line must include a URL from the provided tweets.
 {topics_instruction}
-{account_line}{time_line}Tweets:
-{combined_text}
+{account_line}{time_line}{source_label}:
+{_TWEETS_PLACEHOLDER}
 
 Please structure the response as:
 1. One-sentence executive summary stating the dominant theme or signal of this account’s activity during the time range.
@@ -161,72 +517,73 @@ Guidelines:
 Make sure the analysis explicitly references the account and time range and is grounded in the tweets provided above.
 Keep the summary concise (2–3 short paragraphs). If non-topic content dominates engagement but not strategic relevance, explicitly label it as high-engagement but low-signal.
 """
+        if notes is not None:
+            return prompt.replace(_TWEETS_PLACEHOLDER, "\n---\n".join(notes))
 
-        
-        print(f"[LLM SERVICE] Prompt length: {len(prompt)} characters")
-        print(f"[LLM SERVICE] Making API call to {self.provider}...")
+        overhead = self.prompt_builder.estimate_tokens(prompt.replace(_TWEETS_PLACEHOLDER, ""))
+        budget = max(self.prompt_builder.max_prompt_tokens - overhead, 0)
+        combined_text, included = self.prompt_builder.build_tweet_block(tweets, topics, budget)
+        print(f"[LLM SERVICE] Prompt includes {included} of {len(tweets)} tweets (~{self.prompt_builder.estimate_tokens(combined_text)} of {budget} tokens)")
+        return prompt.replace(_TWEETS_PLACEHOLDER, combined_text)
 
-        try:
-            if self.provider == "gemini":
-                print("[LLM SERVICE] Using Gemini API...")
-                response = self.model.generate_content(prompt)
-                print(f"[LLM SERVICE] ✅ Gemini response received")
-                print(f"[LLM SERVICE] Response type: {type(response)}")
-                if hasattr(response, 'text'):
-                    summary_text = response.text
-                    usage = self._extract_gemini_usage(response)
-                    headline, summary = self._extract_headline_and_summary(summary_text)
-                    if not headline:
-                        headline = build_summary_headline(summary)
-                    print(f"[LLM SERVICE] Summary length: {len(summary)} characters")
-                    print(f"[LLM SERVICE] Summary preview: {summary[:200]}...")
-                    return {"summary": summary, "headline": headline, "usage": usage}
-                else:
-                    print(f"[LLM SERVICE] ⚠️  Response object structure: {dir(response)}")
-                    raw_text = str(response)
-                    headline, summary = self._extract_headline_and_summary(raw_text)
-                    if not headline:
-                        headline = build_summary_headline(summary)
-                    return {"summary": summary, "headline": headline, "usage": {"input_tokens": 0, "output_tokens": 0}}
-            elif self.provider == "openai":
-                print("[LLM SERVICE] Using OpenAI API...")
-                import openai
-                openai.api_key = self.openai_api_key
-                response = openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[
-                        {"role": "system", "content": "You are a helpful assistant that summarizes social media content."},
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                print(f"[LLM SERVICE] ✅ OpenAI response received")
-                raw_text = response.choices[0].message.content
-                usage = {
-                    "input_tokens": getattr(response.usage, "prompt_tokens", 0),
-                    "output_tokens": getattr(response.usage, "completion_tokens", 0)
-                }
-                headline, summary = self._extract_headline_and_summary(raw_text)
-                if not headline:
-                    headline = build_summary_headline(summary)
-                print(f"[LLM SERVICE] Summary length: {len(summary)} characters")
-                return {"summary": summary, "headline": headline, "usage": usage}
-        except Exception as e:
-            error_msg = f"Error generating summary: {str(e)}"
-            print(f"[LLM SERVICE] ❌ {error_msg}")
-            print(f"[LLM SERVICE] Exception type: {type(e).__name__}")
-            import traceback
-            print(f"[LLM SERVICE] Traceback: {traceback.format_exc()}")
-            return {"summary": error_msg, "usage": {"input_tokens": 0, "output_tokens": 0}}
-        finally:
-            print("=" * 80)
+    def _build_delta_prompt(
+        self,
+        tweets: List[Dict],
+        previous_summary: str,
+        topics: Optional[List[str]],
+        x_username: Optional[str],
+        time_range: Optional[str],
+        language: Optional[str]
+    ) -> str:
+        """Compact "what changed" prompt: previous summary + new tweets in compact form"""
+        language_label = self._language_label(language)
+        topics_line = f"User interests (primary signal): {', '.join(topics)}\n" if topics else ""
+        account_line = self._format_account_line(x_username)
+        time_line = f"Time range of new tweets: {time_range}\n" if time_range else ""
 
-    def _extract_gemini_usage(self, response) -> Dict:
-        usage = {"input_tokens": 0, "output_tokens": 0}
-        usage_meta = getattr(response, "usage_metadata", None)
-        if usage_meta:
-            usage["input_tokens"] = getattr(usage_meta, "prompt_token_count", 0)
-            usage["output_tokens"] = getattr(usage_meta, "candidates_token_count", 0)
-        return usage
+        prompt = f"""Update an X (Twitter) activity digest with new tweets.
+Respond in {language_label}. Use plain text only: no markdown or asterisks.
+Output:
+Headline: <12-18 words, news-style, about what is new>
+Summary:
+<1-2 short paragraphs: what changed since the previous digest, and why it matters. Carry forward at most one sentence of still-relevant earlier context.>
+Relevant Tweets:
+1) <short quote or paraphrase> — <URL>
+Include up to 3 of the new tweets, each with its URL. Do not restate the previous digest.
+{topics_line}{account_line}{time_line}
+Previous digest:
+{previous_summary}
+
+New tweets:
+{_TWEETS_PLACEHOLDER}
+"""
+        overhead = self.prompt_builder.estimate_tokens(prompt.replace(_TWEETS_PLACEHOLDER, ""))
+        budget = max(min(self.delta_max_prompt_tokens, self.prompt_builder.max_prompt_tokens) - overhead, 0)
+        combined_text, included = self.prompt_builder.build_tweet_block(tweets, topics, budget, full_detail_share=0)
+        print(f"[LLM SERVICE] Delta prompt includes {included} of {len(tweets)} new tweets (~{self.prompt_builder.estimate_tokens(combined_text)} of {budget} tokens)")
+        return prompt.replace(_TWEETS_PLACEHOLDER, combined_text)
+
+    def _language_label(self, language: Optional[str]) -> str:
+        language_map = {
+            "zh": "Chinese",
+            "en": "English",
+            "es": "Spanish",
+            "fr": "French",
+            "de": "German",
+            "ja": "Japanese",
+            "ko": "Korean",
+            "pt": "Portuguese",
+            "ru": "Russian",
+            "it": "Italian",
+            "ar": "Arabic",
+            "hi": "Hindi",
+            "id": "Indonesian",
+            "tr": "Turkish",
+            "vi": "Vietnamese",
+            "th": "Thai",
+            "nl": "Dutch"
+        }
+        return language_map.get((language or "en").lower(), "English")
 
     def _extract_headline_and_summary(self, text: str) -> Tuple[Optional[str], str]:
         if not text:
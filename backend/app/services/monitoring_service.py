@@ -1,27 +1,53 @@
-from datetime import datetime, timedelta
-from typing import Dict, Optional
+import asyncio
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from app.services.twitter_service import TwitterService
+from app.services.twitter_service import TwitterService, FetchBudget
 from app.services.llm_service import LLMService
 from app.services.sendgrid_service import SendGridService
 from app.services.db_storage import DatabaseStorage
 from app.services.notification_service import NotificationService
+from app.services.topic_filter import TopicFilter
 from app.models import JobExecution, ExecutionStatus
 from app.utils.summary_headline import build_summary_headline
+from app.utils.tweet_time import tweet_id_value, tweet_time_range
 
 class MonitoringService:
-    def __init__(self):
-        self.twitter_service = TwitterService()
-        self.llm_service = LLMService()
-        self.email_service = SendGridService()
+    def __init__(
+        self,
+        twitter_service: Optional[TwitterService] = None,
+        llm_service: Optional[LLMService] = None,
+        email_service: Optional[SendGridService] = None
+    ):
+        self.twitter_service = twitter_service or TwitterService()
+        self.llm_service = llm_service or LLMService()
+        self.email_service = email_service or SendGridService()
+        # Re-query this much before the previous window to absorb clock skew;
+        # already-seen tweets are dropped by the per-account cursors
+        self.window_overlap = timedelta(seconds=int(os.getenv("MONITORING_WINDOW_OVERLAP_SECONDS", "300")))
+        # Runs with no new tweets skip the LLM and the summary row; delivery is optional
+        self.skip_empty_runs = os.getenv("MONITORING_SKIP_EMPTY_RUNS", "true").lower() in ("1", "true", "yes")
+        self.notify_empty_runs = os.getenv("MONITORING_NOTIFY_EMPTY_RUNS", "false").lower() in ("1", "true", "yes")
+        # Optional local pre-filter of off-topic tweets before the LLM stage
+        self.topic_filter = TopicFilter() if os.getenv("MONITORING_TOPIC_FILTER", "false").lower() in ("1", "true", "yes") else None
+        # Delta mode: summarize only what changed since the previous summary. A full
+        # summary is forced after delta_max_chain deltas or when the previous one is stale
+        self.delta_summaries = os.getenv("MONITORING_DELTA_SUMMARIES", "false").lower() in ("1", "true", "yes")
+        self.delta_max_chain = int(os.getenv("MONITORING_DELTA_MAX_CHAIN", "12"))
+        self.delta_max_age = timedelta(hours=float(os.getenv("MONITORING_DELTA_MAX_AGE_HOURS", "48")))
     
-    def run_job(self, job: Dict, db: Session) -> Dict:
+    async def run_job(self, job: Dict, db: Session) -> Dict:
         """
         Execute a monitoring job:
         1. Fetch tweets from X account
         2. Filter by topics
         3. Generate AI summary
         4. Store summary in memory
+        Network waits are awaited so many jobs can be in flight on one event loop;
+        database steps run in a worker thread (one at a time, so the session is
+        never used concurrently) so a slow query or a wait for a pooled
+        connection cannot stall the loop.
         """
         print("\n" + "=" * 80)
         print("[MONITORING SERVICE] Starting job execution")
@@ -35,13 +61,7 @@ class MonitoringService:
         print("=" * 80)
         
         # Create execution record for this task run
-        execution = JobExecution(
-            job_id=job["id"],
-            status=ExecutionStatus.RUNNING
-        )
-        db.add(execution)
-        db.commit()
-        db.refresh(execution)
+        execution, execution_id, cursors = await asyncio.to_thread(self._start_execution, db, job["id"])
 
         try:
             # Calculate time window based on frequency
@@ -57,112 +77,303 @@ class MonitoringService:
             
             since = self._get_since_time(job.get("frequency", "daily"), last_run)
             print(f"[MONITORING SERVICE] Fetching tweets since: {since.isoformat()}")
+            since_by_username = self._get_account_since_times(usernames, since, cursors)
             
             # Fetch tweets
             print("[MONITORING SERVICE] Step 1: Fetching tweets...")
-            tweets = []
-            for username in usernames:
-                account_tweets = self.twitter_service.get_user_tweets(
-                    username=username,
-                    since=since,
-                    limit=50
-                )
-                for tweet in account_tweets:
-                    if not tweet.get("username"):
-                        tweet["username"] = username
-                tweets.extend(account_tweets)
-            print(f"[MONITORING SERVICE] ✅ Step 1 complete: {len(tweets)} tweets fetched")
+            budget = FetchBudget(
+                max_pages_per_account=job.get("max_pages"),
+                max_api_calls=job.get("max_api_calls")
+            )
+            max_tweets = job.get("max_tweets")
+            if max_tweets is None:
+                max_tweets = int(os.getenv("TWITTER_MAX_TWEETS", "50"))
+            tweets = await self.twitter_service.get_tweets_for_users(
+                usernames,
+                since=since,
+                limit=max_tweets,
+                since_by_username=since_by_username,
+                budget=budget
+            )
+            if budget.pages_skipped:
+                print(f"[MONITORING SERVICE] ⚠️  {budget.pages_skipped} page(s) left unfetched by the fetch budget")
+            tweets = self._filter_new_tweets(tweets, cursors)
+            # Accounts whose fetch was cut short keep their window start for the next run
+            truncated_since = {
+                username: since_by_username[username]
+                for username in budget.truncated_accounts
+                if username in since_by_username
+            }
+            if truncated_since:
+                print(f"[MONITORING SERVICE] ⚠️  Keeping cursors for truncated accounts: {sorted(truncated_since)}")
+            await asyncio.to_thread(self._record_fetch, db, execution, execution_id, budget, tweets)
+            print(f"[MONITORING SERVICE] ✅ Step 1 complete: {len(tweets)} new tweets fetched")
+
+            if not tweets and self.skip_empty_runs:
+                return await self._finish_empty_run(job, db, execution, execution_id, usernames, since, truncated_since)
             
-            # Note: We don't filter by topics - instead we pass topics to LLM to focus on them
+            # Topics are emphasized by the LLM; the optional local pre-filter only
+            # drops off-topic tweets beyond a small sample to shrink the prompt
             topics = job.get("topics", [])
-            if topics:
+            summary_tweets = tweets
+            filter_stats = None
+            if topics and self.topic_filter:
+                summary_tweets, filter_stats = self.topic_filter.apply(tweets, topics)
+                print(f"[MONITORING SERVICE] Step 2: Topic filter kept {filter_stats['kept']}/{filter_stats['total']} tweets ({filter_stats['matched']} on topic)")
+            elif topics:
                 print(f"[MONITORING SERVICE] Step 2: Topics of interest: {topics} (will be emphasized in LLM summary, not filtered)")
             else:
                 print("[MONITORING SERVICE] Step 2: No specific topics - summarizing all tweets")
             
-            # Generate AI summary with topic emphasis (no filtering)
+            # Generate AI summary with topic emphasis
             print(f"[MONITORING SERVICE] Step 3: Generating AI summary (emphasizing topics: {topics})...")
             time_range = f"since {since.isoformat()}"
-            summary_result = self.llm_service.summarize_tweets(
-                tweets,
-                topics,
-                x_username=", ".join(usernames),
-                time_range=time_range,
-                language=job.get("language")
-            )
+            # The prompt (and so the cache key) describes the window by the tweets it holds,
+            # not the exact fetch start, so repeated runs over the same tweets hit the cache
+            prompt_range = tweet_time_range(summary_tweets) or f"since {since:%Y-%m-%d %H:%M} UTC"
+            previous = await asyncio.to_thread(self._get_delta_base, db, job["id"])
+            if previous:
+                print(f"[MONITORING SERVICE] Delta mode: building on summary {previous.get('id')}")
+                summary_result = await self.llm_service.summarize_changes(
+                    summary_tweets,
+                    previous.get("content", ""),
+                    topics,
+                    x_username=", ".join(usernames),
+                    time_range=prompt_range,
+                    language=job.get("language")
+                )
+            else:
+                summary_result = await self.llm_service.summarize_tweets(
+                    summary_tweets,
+                    topics,
+                    x_username=", ".join(usernames),
+                    time_range=prompt_range,
+                    language=job.get("language")
+                )
             summary_text = summary_result.get("summary", "")
             headline = summary_result.get("headline") or build_summary_headline(summary_text)
             usage = summary_result.get("usage", {})
             input_tokens = usage.get("input_tokens", 0)
             output_tokens = usage.get("output_tokens", 0)
+            if summary_result.get("cached"):
+                # Reused summary: no tokens were spent on this run
+                input_tokens = output_tokens = 0
             print(f"[MONITORING SERVICE] ✅ Step 3 complete: Summary generated")
             
             # Store summary in database
             print("[MONITORING SERVICE] Step 4: Storing summary...")
-            storage = DatabaseStorage(db)
-            summary = storage.add_summary(
-                job_id=job["id"],
-                content=summary_text,
-                raw_data={"tweets": tweets[:10], "count": len(tweets)},  # Only store first 10 tweets
-                execution_id=execution.id,
-                input_tokens=input_tokens,
-                output_tokens=output_tokens
+            raw_data = {"count": len(tweets)}  # Tweets themselves live in the tweets table
+            if filter_stats:
+                raw_data["filter"] = filter_stats
+            if summary_result.get("delta"):
+                raw_data["mode"] = "delta"
+                raw_data["delta_chain"] = ((previous.get("raw_data") or {}).get("delta_chain") or 0) + 1
+            summary = await asyncio.to_thread(
+                self._store_summary,
+                db,
+                job["id"],
+                summary_text,
+                raw_data,
+                execution_id,
+                input_tokens,
+                output_tokens,
+                tweets,
+                usernames,
+                truncated_since
             )
             print(f"[MONITORING SERVICE] ✅ Step 4 complete: Summary stored (ID: {summary.get('id')})")
             
-            # Send email if configured
-            email = job.get("email")
-            if email:
-                print(f"[MONITORING SERVICE] Step 5: Sending email to {email}...")
-                email_sent = self.email_service.send_summary_email(
-                    to_email=email,
-                    x_username=", ".join(usernames),
-                    summary=summary_text,
-                    tweets_count=len(tweets),
-                    topics=topics,
-                    headline=headline
-                )
-                if email_sent:
-                    print(f"[MONITORING SERVICE] ✅ Step 5 complete: Email sent successfully")
-                else:
-                    print(f"[MONITORING SERVICE] ⚠️  Step 5: Email sending failed (check logs)")
-            else:
-                print("[MONITORING SERVICE] Step 5: Skipping email (no email configured for this job)")
-
-            if job.get("user_id"):
-                print("[MONITORING SERVICE] Step 6: Sending notification...")
-                target_ids = job.get("notification_target_ids") or []
-                target_id = job.get("notification_target_id")
-                if target_ids or target_id:
-                    notifier = NotificationService(db)
-                    notifier.send_summary(
-                        user_id=job["user_id"],
-                        x_username=", ".join(usernames),
-                        summary=summary_text,
-                        tweets_count=len(tweets),
-                        topics=topics,
-                        time_range=time_range,
-                        target_ids=target_ids,
-                        target_id=target_id,
-                        headline=headline
-                    )
-                else:
-                    print("[MONITORING SERVICE] Step 6: Skipping notification (no targets selected)")
-
-            execution.status = ExecutionStatus.COMPLETED
-            execution.completed_at = datetime.utcnow()
-            execution.tweets_fetched = len(tweets)
-            db.commit()
+            await self._deliver(job, db, usernames, summary_text, headline, len(tweets), topics, time_range)
+
+            await asyncio.to_thread(self._finish_execution, db, execution, ExecutionStatus.COMPLETED, len(tweets))
             
             print("=" * 80 + "\n")
             return summary
         except Exception as e:
-            execution.status = ExecutionStatus.FAILED
-            execution.completed_at = datetime.utcnow()
-            execution.error_message = str(e)
-            db.commit()
+            await asyncio.to_thread(self._finish_execution, db, execution, ExecutionStatus.FAILED, error_message=str(e))
             raise
+
+    # Database steps of a run (called through asyncio.to_thread). Each one ends its
+    # transaction so no pooled connection is held across the network waits in between.
+    def _start_execution(self, db: Session, job_id: int) -> Tuple[JobExecution, int, Dict[str, Dict]]:
+        execution = JobExecution(
+            job_id=job_id,
+            status=ExecutionStatus.RUNNING
+        )
+        db.add(execution)
+        db.commit()
+        execution_id = execution.id
+        cursors = DatabaseStorage(db).get_account_cursors(job_id)
+        db.commit()
+        return execution, execution_id, cursors
+
+    def _record_fetch(self, db: Session, execution: JobExecution, execution_id: int, budget: FetchBudget, tweets: List[Dict]):
+        execution.pages_fetched = budget.pages_fetched
+        execution.pages_skipped = budget.pages_skipped
+        DatabaseStorage(db).upsert_tweets(tweets, execution_id=execution_id)
+        db.commit()
+
+    def _advance_cursors(self, db: Session, job_id: int, usernames: List[str], truncated_since: Dict[str, datetime]):
+        DatabaseStorage(db).advance_account_cursors(job_id, [], usernames, truncated_since)
+
+    def _store_summary(
+        self,
+        db: Session,
+        job_id: int,
+        content: str,
+        raw_data: Dict,
+        execution_id: int,
+        input_tokens: int,
+        output_tokens: int,
+        tweets: List[Dict],
+        usernames: List[str],
+        truncated_since: Dict[str, datetime]
+    ) -> Dict:
+        storage = DatabaseStorage(db)
+        summary = storage.add_summary(
+            job_id=job_id,
+            content=content,
+            raw_data=raw_data,
+            execution_id=execution_id,
+            input_tokens=input_tokens,
+            output_tokens=output_tokens
+        )
+        storage.advance_account_cursors(job_id, tweets, usernames, truncated_since)
+        return summary
+
+    def _finish_execution(
+        self,
+        db: Session,
+        execution: JobExecution,
+        status: ExecutionStatus,
+        tweets_fetched: Optional[int] = None,
+        error_message: Optional[str] = None,
+        touch_job_id: Optional[int] = None
+    ):
+        if status == ExecutionStatus.FAILED:
+            db.rollback()  # The failure may have left the session mid-transaction
+        execution.status = status
+        execution.completed_at = datetime.utcnow()
+        if tweets_fetched is not None:
+            execution.tweets_fetched = tweets_fetched
+        if error_message is not None:
+            execution.error_message = error_message
+        if touch_job_id is not None:
+            DatabaseStorage(db).touch_job_last_run(touch_job_id)  # Commits the execution update too
+        db.commit()
     
+    def _get_delta_base(self, db: Session, job_id: int) -> Optional[Dict]:
+        """Previous summary to build a delta on, or None when a full summary is due"""
+        if not self.delta_summaries:
+            return None
+        previous = DatabaseStorage(db).get_latest_summary(job_id)
+        db.commit()
+        if not previous:
+            return None
+        raw_data = previous.get("raw_data") or {}
+        if (raw_data.get("delta_chain") or 0) >= self.delta_max_chain:
+            print(f"[MONITORING SERVICE] Delta chain reached {self.delta_max_chain}, running a full summary")
+            return None
+        created_at = previous.get("created_at")
+        if created_at:
+            try:
+                created = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
+                if created.tzinfo:
+                    created = created.astimezone(timezone.utc).replace(tzinfo=None)
+                if datetime.utcnow() - created > self.delta_max_age:
+                    print("[MONITORING SERVICE] Previous summary is stale, running a full summary")
+                    return None
+            except ValueError:
+                return None
+        return previous
+
+    async def _finish_empty_run(
+        self,
+        job: Dict,
+        db: Session,
+        execution: JobExecution,
+        execution_id: int,
+        usernames: List[str],
+        since: datetime,
+        truncated_since: Dict[str, datetime]
+    ) -> Dict:
+        """Record a no-op execution for a window without new tweets (no LLM call, no summary)"""
+        print("[MONITORING SERVICE] No new tweets - skipping summary generation")
+        time_range = f"since {since.isoformat()}"
+        if self.notify_empty_runs:
+            await self._deliver(
+                job, db, usernames, "No new tweets in this period.", None, 0, job.get("topics", []), time_range
+            )
+        else:
+            print("[MONITORING SERVICE] Delivery suppressed for empty run")
+
+        await asyncio.to_thread(self._advance_cursors, db, job["id"], usernames, truncated_since)
+        await asyncio.to_thread(
+            self._finish_execution, db, execution, ExecutionStatus.SKIPPED, 0, touch_job_id=job["id"]
+        )
+        print("=" * 80 + "\n")
+        return {
+            "id": None,
+            "job_id": job["id"],
+            "execution_id": execution_id,
+            "content": "No new tweets to summarize.",
+            "tweets_count": 0,
+            "skipped": True
+        }
+
+    async def _deliver(
+        self,
+        job: Dict,
+        db: Session,
+        usernames: List[str],
+        summary_text: str,
+        headline: Optional[str],
+        tweets_count: int,
+        topics: List[str],
+        time_range: str
+    ):
+        """Send a run's result by email and to the job's notification targets"""
+        # Send email if configured
+        email = job.get("email")
+        if email:
+            print(f"[MONITORING SERVICE] Step 5: Sending email to {email}...")
+            email_sent = await asyncio.to_thread(
+                self.email_service.send_summary_email,
+                to_email=email,
+                x_username=", ".join(usernames),
+                summary=summary_text,
+                tweets_count=tweets_count,
+                topics=topics,
+                headline=headline
+            )
+            if email_sent:
+                print(f"[MONITORING SERVICE] ✅ Step 5 complete: Email sent successfully")
+            else:
+                print(f"[MONITORING SERVICE] ⚠️  Step 5: Email sending failed (check logs)")
+        else:
+            print("[MONITORING SERVICE] Step 5: Skipping email (no email configured for this job)")
+
+        if job.get("user_id"):
+            print("[MONITORING SERVICE] Step 6: Sending notification...")
+            target_ids = job.get("notification_target_ids") or []
+            target_id = job.get("notification_target_id")
+            if target_ids or target_id:
+                notifier = NotificationService(db)
+                await asyncio.to_thread(
+                    notifier.send_summary,
+                    user_id=job["user_id"],
+                    x_username=", ".join(usernames),
+                    summary=summary_text,
+                    tweets_count=tweets_count,
+                    topics=topics,
+                    time_range=time_range,
+                    target_ids=target_ids,
+                    target_id=target_id,
+                    headline=headline
+                )
+            else:
+                print("[MONITORING SERVICE] Step 6: Skipping notification (no targets selected)")
+
     def _get_since_time(self, frequency: str, last_run: Optional[datetime] = None) -> datetime:
         """
         Calculate the 'since' time based on frequency
@@ -184,6 +395,60 @@ class MonitoringService:
         delta = frequency_map.get(frequency, timedelta(hours=1))
         return now - delta
 
+    def _get_account_since_times(
+        self,
+        usernames: List[str],
+        since: datetime,
+        cursors: Dict[str, Dict]
+    ) -> Dict[str, datetime]:
+        """
+        Per-account window start: the later of the previous window's start and
+        the newest tweet already seen for that account, minus a small overlap.
+        A quiet account's old cursor must not widen the window back to its last
+        tweet; tweets re-fetched by the overlap are dropped by id. An account
+        whose last fetch was truncated restarts from its low-water mark instead.
+        """
+        if since.tzinfo is not None:
+            since = since.astimezone(timezone.utc).replace(tzinfo=None)
+        since_by_username = {}
+        for username in usernames:
+            key = username.lower()
+            cursor = cursors.get(key) or {}
+            start = since
+            last_tweet_at = cursor.get("last_tweet_at")
+            if last_tweet_at is not None:
+                if last_tweet_at.tzinfo is not None:
+                    last_tweet_at = last_tweet_at.astimezone(timezone.utc).replace(tzinfo=None)
+                start = max(last_tweet_at, since)
+            since_by_username[key] = start - self.window_overlap
+            backfill_since = cursor.get("backfill_since")
+            if backfill_since is not None:
+                if backfill_since.tzinfo is not None:
+                    backfill_since = backfill_since.astimezone(timezone.utc).replace(tzinfo=None)
+                since_by_username[key] = min(since_by_username[key], backfill_since)
+        return since_by_username
+
+    def _filter_new_tweets(self, tweets: List[Dict], cursors: Dict[str, Dict]) -> List[Dict]:
+        """Drop duplicates and tweets at or below each account's last seen tweet id"""
+        seen_ids = set()
+        fresh = []
+        for tweet in tweets:
+            tweet_id = tweet.get("tweet_id")
+            if tweet_id is not None:
+                if tweet_id in seen_ids:
+                    continue
+                seen_ids.add(tweet_id)
+            username = str(tweet.get("username") or "").lower()
+            last_id = tweet_id_value((cursors.get(username) or {}).get("last_tweet_id"))
+            id_value = tweet_id_value(tweet_id)
+            if last_id is not None and id_value is not None and id_value <= last_id:
+                continue
+            fresh.append(tweet)
+        dropped = len(tweets) - len(fresh)
+        if dropped:
+            print(f"[MONITORING SERVICE] Skipped {dropped} already-seen tweets")
+        return fresh
+
     def _parse_usernames(self, raw: Optional[str]) -> list:
         if not raw:
             return []
@@ -0,0 +1,98 @@
+"""
+Token-budgeted tweet block for summarization prompts
+Tweets are ranked by topic relevance and engagement, then added until the
+budget is spent: the top ones with full detail, the rest in compact form
+"""
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from app.services.topic_filter import get_topic_matcher
+from app.utils.tweet_time import parse_tweet_timestamp
+
+
+class PromptBuilder:
+    """Fits tweets into a token budget using a chars-per-token estimate"""
+
+    def __init__(
+        self,
+        max_prompt_tokens: Optional[int] = None,
+        chars_per_token: Optional[float] = None,
+        full_detail_share: float = 0.5,
+        max_tweet_chars: int = 1000
+    ):
+        if max_prompt_tokens is None:
+            max_prompt_tokens = int(os.getenv("LLM_MAX_PROMPT_TOKENS", "24000"))
+        if chars_per_token is None:
+            chars_per_token = float(os.getenv("LLM_CHARS_PER_TOKEN", "4"))
+        self.max_prompt_tokens = max_prompt_tokens
+        self.chars_per_token = max(chars_per_token, 1.0)
+        self.full_detail_share = full_detail_share  # Part of the budget for fully detailed tweets
+        self.max_tweet_chars = max_tweet_chars
+
+    def estimate_tokens(self, text: str) -> int:
+        return int(math.ceil(len(text or "") / self.chars_per_token))
+
+    def rank_tweets(self, tweets: List[Dict], topics: Optional[List[str]] = None) -> List[Dict]:
+        """Order tweets by topic matches first, then engagement, then recency"""
+        matcher = get_topic_matcher(topics)
+
+        def score(tweet: Dict) -> Tuple[float, float, float]:
+            relevance = matcher.score(tweet.get("text")) if matcher else 0
+            engagement = math.log1p((tweet.get("likes") or 0) + 2 * (tweet.get("reposts") or 0))
+            posted_at = parse_tweet_timestamp(tweet.get("timestamp"))
+            return relevance, engagement, posted_at.timestamp() if posted_at else 0.0
+
+        return sorted(tweets, key=score, reverse=True)
+
+    def build_tweet_block(
+        self,
+        tweets: List[Dict],
+        topics: Optional[List[str]],
+        budget_tokens: int,
+        full_detail_share: Optional[float] = None
+    ) -> Tuple[str, int]:
+        """
+        Render ranked tweets into at most `budget_tokens`.
+        Returns (tweet block, number of tweets included).
+        """
+        separator = "\n---\n"
+        separator_tokens = self.estimate_tokens(separator)
+        if full_detail_share is None:
+            full_detail_share = self.full_detail_share
+        full_budget = budget_tokens * full_detail_share
+        parts = []
+        used = 0
+        for tweet in self.rank_tweets(tweets, topics):
+            compact = used >= full_budget
+            entry = self.format_tweet(tweet, compact=compact)
+            cost = self.estimate_tokens(entry) + (separator_tokens if parts else 0)
+            if used + cost > budget_tokens and not compact:
+                entry = self.format_tweet(tweet, compact=True)
+                cost = self.estimate_tokens(entry) + (separator_tokens if parts else 0)
+            if used + cost > budget_tokens and parts:
+                continue  # A shorter, lower-ranked tweet may still fit
+            # The top-ranked tweet is always kept, even on a tiny budget
+            parts.append(entry)
+            used += cost
+        return separator.join(parts), len(parts)
+
+    def format_tweet(self, tweet: Dict, compact: bool = False) -> str:
+        text = str(tweet.get("text") or "")
+        if compact:
+            if len(text) > self.max_tweet_chars:
+                text = text[: self.max_tweet_chars].rstrip() + "…"
+            entry = f"Tweet: {text}\n"
+            if tweet.get("username"):
+                entry += f"Account: @{tweet.get('username')}\n"
+            entry += f"URL: {tweet.get('url', '')}\n"
+            return entry
+
+        entry = f"Tweet: {text}\n"
+        entry += f"ID: {tweet.get('tweet_id', '')}\n"
+        entry += f"URL: {tweet.get('url', '')}\n"
+        if tweet.get("username"):
+            entry += f"Account: @{tweet.get('username')}\n"
+        entry += f"Likes: {tweet.get('likes', 0)}, Reposts: {tweet.get('reposts', 0)}\n"
+        entry += f"Time: {tweet.get('timestamp', 'Unknown')}\n"
+        return entry
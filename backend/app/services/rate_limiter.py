@@ -0,0 +1,148 @@
+"""
+Process-wide token-bucket rate limiter
+Shared by every TwitterService instance so scheduled runs and API handlers
+draw from one request budget
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Deque
+
+PRIORITY_INTERACTIVE = "interactive"  # Playground / user-triggered calls
+PRIORITY_SCHEDULED = "scheduled"      # Scheduled job runs
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_SCHEDULED)
+
+
+class _Waiter:
+    __slots__ = ("event", "granted")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.granted = False
+
+
+class TokenBucketRateLimiter:
+    """
+    Token bucket (rate tokens/second, up to burst) with fair queuing:
+    when several priorities are waiting, tokens are handed out round-robin
+    so a wave of scheduled jobs cannot starve interactive calls.
+    """
+
+    def __init__(self, rate: float, burst: int = 1, name: str = "rate-limiter"):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.name = name
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._queues: Dict[str, Deque[_Waiter]] = {priority: deque() for priority in PRIORITIES}
+        self._turn = 0
+        self._lock = threading.Lock()
+
+    @property
+    def min_interval(self) -> float:
+        return 1.0 / self.rate
+
+    def acquire(self, priority: str = PRIORITY_SCHEDULED) -> float:
+        """Block until a token is granted; returns the seconds spent waiting"""
+        waiter = _Waiter()
+        started = time.monotonic()
+        with self._lock:
+            self._queue_for(priority).append(waiter)
+        while True:
+            with self._lock:
+                delay = self._dispatch()
+                if waiter.granted:
+                    return time.monotonic() - started
+            waiter.event.wait(delay)
+
+    async def acquire_async(self, priority: str = PRIORITY_SCHEDULED) -> float:
+        """Await a token without blocking the event loop; returns the seconds spent waiting"""
+        waiter = _Waiter()
+        started = time.monotonic()
+        with self._lock:
+            queue = self._queue_for(priority)
+            queue.append(waiter)
+        try:
+            while True:
+                with self._lock:
+                    delay = self._dispatch()
+                    if waiter.granted:
+                        return time.monotonic() - started
+                await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            with self._lock:
+                if not waiter.granted:
+                    queue.remove(waiter)
+            raise
+
+    def penalize(self, seconds: float):
+        """Stop granting tokens for `seconds` (e.g. after a 429 with Retry-After)"""
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._tokens = 0.0
+
+    def _queue_for(self, priority: str) -> Deque[_Waiter]:
+        if priority not in self._queues:
+            priority = PRIORITY_SCHEDULED
+        return self._queues[priority]
+
+    def _refill(self, now: float):
+        start = max(self._updated, self._blocked_until)
+        if now > start:
+            self._tokens = min(float(self.burst), self._tokens + (now - start) * self.rate)
+        self._updated = max(self._updated, now)
+
+    def _dispatch(self) -> float:
+        """Grant available tokens to queued waiters; returns seconds until the next token"""
+        now = time.monotonic()
+        self._refill(now)
+        while now >= self._blocked_until and self._tokens >= 1.0:
+            waiter = self._next_waiter()
+            if waiter is None:
+                break
+            self._tokens -= 1.0
+            waiter.granted = True
+            waiter.event.set()
+        if now < self._blocked_until:
+            return self._blocked_until - now
+        return max((1.0 - self._tokens) / self.rate, 0.001)
+
+    def _next_waiter(self):
+        for offset in range(len(PRIORITIES)):
+            index = (self._turn + offset) % len(PRIORITIES)
+            queue = self._queues[PRIORITIES[index]]
+            if queue:
+                self._turn = index + 1
+                return queue.popleft()
+        return None
+
+
+def rate_limit_processes() -> int:
+    """
+    Processes sharing the API accounts (API process + queue workers). Limiters
+    are per process, so configured account-wide rates are divided by this.
+    """
+    return max(1, int(os.getenv("RATE_LIMIT_PROCESSES", "1")))
+
+
+def _default_twitter_rate() -> float:
+    rate = os.getenv("TWITTER_RATE_LIMIT_PER_SECOND")
+    if rate:
+        rate = float(rate)
+    else:
+        # Free tier allows 1 request per 5 seconds
+        rate = 1.0 / float(os.getenv("TWITTER_MIN_REQUEST_INTERVAL", "5.0"))
+    return rate / rate_limit_processes()
+
+
+# Global limiter for twitterapi.io, shared across the process
+twitter_rate_limiter = TokenBucketRateLimiter(
+    rate=_default_twitter_rate(),
+    burst=int(os.getenv("TWITTER_RATE_LIMIT_BURST", "1")),
+    name="twitterapi.io",
+)
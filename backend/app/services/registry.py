@@ -0,0 +1,73 @@
+"""
+Process-wide service registry
+API clients are built once on first use and shared by routers, the scheduler
+and background tasks instead of being constructed per request
+"""
+import threading
+from typing import Any, Callable, Dict
+
+from app.services.twitter_service import TwitterService
+from app.services.llm_service import LLMService
+from app.services.sendgrid_service import SendGridService
+from app.services.monitoring_service import MonitoringService
+
+
+class ServiceRegistry:
+    """
+    Lazily builds each service once and hands out the shared instance.
+    A failed build (e.g. missing API key) is not cached, so it is retried
+    on the next access.
+    """
+
+    def __init__(self):
+        self._instances: Dict[str, Any] = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name: str, factory: Callable[[], Any]) -> Any:
+        instance = self._instances.get(name)
+        if instance is not None:
+            return instance
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is None:
+                instance = factory()
+                self._instances[name] = instance
+            return instance
+
+    @property
+    def twitter(self) -> TwitterService:
+        return self._get("twitter", TwitterService)
+
+    @property
+    def llm(self) -> LLMService:
+        return self._get("llm", LLMService)
+
+    @property
+    def email(self) -> SendGridService:
+        return self._get("email", SendGridService)
+
+    @property
+    def monitoring(self) -> MonitoringService:
+        return self._get("monitoring", lambda: MonitoringService(
+            twitter_service=self.twitter,
+            llm_service=self.llm,
+            email_service=self.email
+        ))
+
+    def warm_up(self):
+        """Build every service up front so the first request doesn't pay for it"""
+        for name in ("twitter", "llm", "email", "monitoring"):
+            try:
+                getattr(self, name)
+            except Exception as e:
+                print(f"[SERVICES] ⚠️  {name} service unavailable: {str(e)}")
+        print(f"[SERVICES] ✅ Ready: {', '.join(sorted(self._instances))}")
+
+    def reset(self):
+        """Drop all instances (e.g. after configuration changes)"""
+        with self._lock:
+            self._instances.clear()
+
+
+# Global registry shared by the API and the scheduler
+services = ServiceRegistry()
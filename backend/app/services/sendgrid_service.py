@@ -11,6 +11,16 @@ from dotenv import load_dotenv
 
 load_dotenv()
 
+# SendGrid clients are reused across SendGridService instances (keyed by API key)
+_clients = {}
+
+def _get_client(api_key: str) -> SendGridAPIClient:
+    client = _clients.get(api_key)
+    if client is None:
+        client = SendGridAPIClient(api_key)
+        _clients[api_key] = client
+    return client
+
 class SendGridService:
     """SendGrid email service for sending notifications"""
     
@@ -20,7 +30,7 @@ class SendGridService:
         self.enabled = bool(self.api_key)
         
         if self.enabled:
-            self.client = SendGridAPIClient(self.api_key)
+            self.client = _get_client(self.api_key)
             print(f"[SENDGRID] ✅ SendGrid initialized successfully (from: {self.from_email})")
         else:
             print("[SENDGRID] ⚠️  SendGrid not configured - email sending disabled")
@@ -0,0 +1,85 @@
+"""
+Content-addressed cache of LLM summaries
+Identical tweet sets summarized for the same accounts and window, with the
+same topics, language, model and prompt version, reuse the stored result
+instead of calling the LLM again
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+
+def summary_fingerprint(
+    tweets: List[Dict],
+    topics: Optional[List[str]],
+    language: Optional[str],
+    model: str,
+    prompt_version: str,
+    x_username: Optional[str] = None,
+    time_range: Optional[str] = None
+) -> str:
+    """
+    Stable hash of everything that determines a summary's content, including
+    the accounts and time range the prompt tells the model to mention
+    """
+    payload = {
+        "tweets": sorted(str(tweet.get("tweet_id") or tweet.get("text") or "") for tweet in tweets),
+        "topics": sorted({str(topic).strip().lower() for topic in (topics or []) if str(topic).strip()}),
+        "language": (language or "en").lower(),
+        "model": model,
+        "prompt_version": prompt_version,
+        "x_username": (x_username or "").strip().lower(),
+        "time_range": time_range or "",
+    }
+    encoded = json.dumps(payload, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class SummaryCache:
+    """Thread-safe in-memory LRU of summary results with TTL (first tier before the DB)"""
+
+    def __init__(self, ttl_seconds: float = 86400, max_entries: int = 512):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.enabled = ttl_seconds > 0 and max_entries > 0
+        self._entries: "OrderedDict[str, Tuple[Dict, datetime]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, fingerprint: str) -> Optional[Dict]:
+        if not self.enabled:
+            return None
+        now = datetime.utcnow()
+        with self._lock:
+            cached = self._entries.get(fingerprint)
+            if cached is None:
+                return None
+            result, stored_at = cached
+            if now - stored_at > self.ttl:
+                del self._entries[fingerprint]
+                return None
+            self._entries.move_to_end(fingerprint)
+            return dict(result)
+
+    def put(self, fingerprint: str, result: Dict, stored_at: Optional[datetime] = None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[fingerprint] = (dict(result), stored_at or datetime.utcnow())
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Global cache shared by every LLMService instance
+summary_cache = SummaryCache(
+    ttl_seconds=float(os.getenv("LLM_SUMMARY_CACHE_TTL_SECONDS", "86400")),
+    max_entries=int(os.getenv("LLM_SUMMARY_CACHE_MAX_ENTRIES", "512")),
+)
@@ -2,9 +2,12 @@ import os
 from typing import Optional
 import requests
 
+from app.services.http_client import get_http_session
+
 
 class TelegramService:
-    def __init__(self):
+    def __init__(self, session: Optional[requests.Session] = None):
+        self.session = session or get_http_session()
         self.bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
         self.api_base = f"https://api.telegram.org/bot{self.bot_token}" if self.bot_token else None
 
@@ -14,7 +17,7 @@ class TelegramService:
             return False
 
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.api_base}/sendMessage",
                 json={"chat_id": chat_id, "text": text},
                 timeout=10
@@ -0,0 +1,144 @@
+"""
+Local topic relevance filter
+Tweets are scored against a job's topics with a compiled multi-pattern matcher
+before the LLM stage; topic-focused jobs then send the matching tweets plus a
+small sample of the rest instead of everything
+"""
+import math
+import os
+import re
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Scripts written without spaces between words are matched as substrings
+_UNSPACED_RE = re.compile(r"[⺀-鿿가-힯豈-﫿]")
+_SUFFIXES = (("ies", "y"), ("ing", ""), ("ers", "er"), ("ed", ""), ("es", ""), ("ly", ""), ("s", ""))
+
+
+def stem(token: str) -> str:
+    """Light suffix-stripping stemmer (plural/tense), enough for keyword matching"""
+    for suffix, replacement in _SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 3:
+            return token[: -len(suffix)] + replacement
+    return token
+
+
+def normalize_tokens(text: str) -> List[str]:
+    return [stem(token) for token in _TOKEN_RE.findall(str(text or "").casefold())]
+
+
+class TopicMatcher:
+    """
+    Token-level trie over stemmed, casefolded topic phrases. One pass over a
+    tweet's tokens finds every topic occurrence (multi-word topics included),
+    with word boundaries respected ("ai" does not match "said").
+    """
+
+    def __init__(self, topics: List[str]):
+        self.topics = [str(topic).strip() for topic in (topics or []) if str(topic).strip()]
+        self._trie: Dict = {}
+        self._substrings: List[str] = []
+        self.max_depth = 0
+        for topic in self.topics:
+            if _UNSPACED_RE.search(topic):
+                self._substrings.append(topic.casefold())
+                continue
+            tokens = normalize_tokens(topic)
+            if not tokens:
+                continue
+            node = self._trie
+            for token in tokens:
+                node = node.setdefault(token, {})
+            node[None] = True  # End of a topic phrase
+            self.max_depth = max(self.max_depth, len(tokens))
+
+    def __bool__(self) -> bool:
+        return bool(self._trie or self._substrings)
+
+    def score(self, text: str) -> int:
+        """Number of topic occurrences in `text`"""
+        matches = 0
+        if self._trie:
+            tokens = normalize_tokens(text)
+            for start in range(len(tokens)):
+                node = self._trie
+                for token in tokens[start:start + self.max_depth]:
+                    node = node.get(token)
+                    if node is None:
+                        break
+                    if None in node:
+                        matches += 1
+        if self._substrings:
+            folded = str(text or "").casefold()
+            matches += sum(folded.count(topic) for topic in self._substrings)
+        return matches
+
+
+@lru_cache(maxsize=256)
+def _compile(topics: Tuple[str, ...]) -> TopicMatcher:
+    return TopicMatcher(list(topics))
+
+
+def get_topic_matcher(topics: Optional[List[str]]) -> TopicMatcher:
+    """Compiled matcher for a topic list (cached, jobs reuse the same topics every run)"""
+    return _compile(tuple(str(topic) for topic in (topics or [])))
+
+
+class TopicFilter:
+    """
+    Keeps tweets that mention a topic (best scores first, up to max_matched)
+    plus a sample of the others (most engaged first) for context. Small runs
+    and jobs without topics pass through untouched.
+    """
+
+    def __init__(
+        self,
+        min_tweets: Optional[int] = None,
+        max_matched: Optional[int] = None,
+        sample_share: Optional[float] = None,
+        min_sample: Optional[int] = None
+    ):
+        if min_tweets is None:
+            min_tweets = int(os.getenv("TOPIC_FILTER_MIN_TWEETS", "20"))
+        if max_matched is None:
+            max_matched = int(os.getenv("TOPIC_FILTER_MAX_MATCHED", "0"))
+        if sample_share is None:
+            sample_share = float(os.getenv("TOPIC_FILTER_SAMPLE_SHARE", "0.1"))
+        if min_sample is None:
+            min_sample = int(os.getenv("TOPIC_FILTER_MIN_SAMPLE", "3"))
+        self.min_tweets = min_tweets
+        self.max_matched = max_matched  # 0 = keep every matching tweet
+        self.sample_share = min(max(sample_share, 0.0), 1.0)
+        self.min_sample = max(min_sample, 0)
+
+    def apply(self, tweets: List[Dict], topics: Optional[List[str]]) -> Tuple[List[Dict], Dict]:
+        """Returns (kept tweets in original order, stats with total/matched/kept/ratio)"""
+        stats = {"total": len(tweets), "matched": 0, "kept": len(tweets), "ratio": 1.0}
+        matcher = get_topic_matcher(topics)
+        if not matcher or len(tweets) < self.min_tweets:
+            return tweets, stats
+
+        matched: List[Tuple[int, int]] = []
+        others: List[int] = []
+        for index, tweet in enumerate(tweets):
+            score = matcher.score(tweet.get("text"))
+            if score:
+                matched.append((score, index))
+            else:
+                others.append(index)
+        matched.sort(key=lambda item: (-item[0], item[1]))
+        if self.max_matched:
+            matched = matched[: self.max_matched]
+
+        sample_size = min(len(others), max(self.min_sample, int(math.ceil(len(others) * self.sample_share))))
+        others.sort(key=lambda index: -((tweets[index].get("likes") or 0) + 2 * (tweets[index].get("reposts") or 0)))
+        keep = {index for _, index in matched} | set(others[:sample_size])
+
+        kept = [tweet for index, tweet in enumerate(tweets) if index in keep]
+        stats.update({
+            "matched": len(matched),
+            "kept": len(kept),
+            "ratio": round(len(kept) / len(tweets), 3) if tweets else 1.0,
+        })
+        return kept, stats
@@ -0,0 +1,176 @@
+"""
+Shared per-account tweet cache
+Lets jobs watching the same X account reuse one twitterapi.io fetch
+"""
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.utils.tweet_time import parse_tweet_timestamp
+
+
+class CachedWindow:
+    """Tweets fetched for one account, covering [since, until]"""
+    __slots__ = ("since", "until", "tweets", "stored_at")
+
+    def __init__(self, since: datetime, until: datetime, tweets: List[Dict], stored_at: datetime):
+        self.since = since
+        self.until = until
+        self.tweets = tweets  # newest first, unique by tweet_id
+        self.stored_at = stored_at
+
+
+class TweetCache:
+    """Thread-safe LRU cache of fetched tweets keyed by username, with TTL"""
+
+    def __init__(
+        self,
+        ttl_seconds: float = 21600,
+        max_accounts: int = 1000,
+        fresh_seconds: float = 60,
+        max_tweets_per_account: int = 500
+    ):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_accounts = max_accounts
+        self.fresh = timedelta(seconds=fresh_seconds)
+        self.max_tweets_per_account = max_tweets_per_account
+        self.enabled = ttl_seconds > 0 and max_accounts > 0
+        self._entries: "OrderedDict[str, CachedWindow]" = OrderedDict()
+        self._key_locks: Dict[str, asyncio.Lock] = {}
+        self._lock = threading.Lock()
+
+    def lock_for(self, username: str) -> asyncio.Lock:
+        """Per-account lock so concurrent fetches wait for one in-flight request"""
+        key = self._key(username)
+        with self._lock:
+            lock = self._key_locks.get(key)
+            if lock is None:
+                lock = asyncio.Lock()
+                self._key_locks[key] = lock
+            return lock
+
+    def get(self, username: str, now: Optional[datetime] = None) -> Optional[CachedWindow]:
+        """Return the cached window for an account, or None if missing/expired"""
+        if not self.enabled:
+            return None
+        key = self._key(username)
+        now = now or datetime.utcnow()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if now - entry.stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def is_fresh(self, entry: CachedWindow, now: Optional[datetime] = None) -> bool:
+        """Whether the window is recent enough to serve without fetching the tail"""
+        now = now or datetime.utcnow()
+        return now - entry.until <= self.fresh
+
+    def store(
+        self,
+        username: str,
+        tweets: List[Dict],
+        since: datetime,
+        until: datetime,
+        truncated: bool = False
+    ) -> CachedWindow:
+        """
+        Merge freshly fetched tweets for [since, until] into the cache.
+        A truncated fetch only covers back to its oldest tweet, so a gap between
+        it and the existing window means the old window is dropped.
+        """
+        tweets = [tweet.copy() for tweet in tweets]
+        key = self._key(username)
+        now = datetime.utcnow()
+        with self._lock:
+            existing = self._entries.get(key)
+            if existing is not None and (now - existing.stored_at > self.ttl):
+                existing = None
+            if truncated:
+                oldest = self.oldest_timestamp(tweets)
+                if oldest is None:
+                    # Nothing was covered (e.g. budget exhausted before the first page)
+                    return existing or CachedWindow(until, until, [], now)
+                since = max(since, oldest)
+            if existing is not None and existing.since <= since <= existing.until:
+                merged = self._merge(tweets, existing.tweets)
+                entry = CachedWindow(existing.since, max(until, existing.until), merged, existing.stored_at)
+            else:
+                entry = CachedWindow(since, until, self._merge(tweets, []), now)
+            self._trim(entry)
+            if self.enabled:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                self._evict()
+            return entry
+
+    def slice(self, entry: CachedWindow, since: datetime, limit: int) -> List[Dict]:
+        """Copy out tweets at or after `since`, newest first"""
+        result = []
+        for tweet in entry.tweets:
+            timestamp = parse_tweet_timestamp(tweet.get("timestamp"))
+            if timestamp is not None and timestamp < since:
+                continue
+            result.append(tweet.copy())
+            if len(result) >= limit:
+                break
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _merge(self, newer: List[Dict], older: List[Dict]) -> List[Dict]:
+        seen = set()
+        merged = []
+        for tweet in newer + older:
+            tweet_id = tweet.get("tweet_id")
+            if tweet_id is not None:
+                if tweet_id in seen:
+                    continue
+                seen.add(tweet_id)
+            merged.append(tweet)
+        merged.sort(
+            key=lambda t: parse_tweet_timestamp(t.get("timestamp")) or datetime.min,
+            reverse=True
+        )
+        return merged
+
+    def _trim(self, entry: CachedWindow):
+        if len(entry.tweets) <= self.max_tweets_per_account:
+            return
+        entry.tweets = entry.tweets[: self.max_tweets_per_account]
+        oldest = self.oldest_timestamp(entry.tweets)
+        if oldest is not None:
+            entry.since = max(entry.since, oldest)
+
+    def _evict(self):
+        while len(self._entries) > self.max_accounts:
+            key, _ = self._entries.popitem(last=False)
+            lock = self._key_locks.get(key)
+            if lock is not None and not lock.locked():
+                del self._key_locks[key]
+
+    def oldest_timestamp(self, tweets: List[Dict]) -> Optional[datetime]:
+        timestamps = [parse_tweet_timestamp(t.get("timestamp")) for t in tweets]
+        timestamps = [t for t in timestamps if t is not None]
+        return min(timestamps) if timestamps else None
+
+    def _key(self, username: str) -> str:
+        return str(username).strip().lstrip("@").lower()
+
+
+# Global cache shared by every TwitterService instance
+tweet_cache = TweetCache(
+    ttl_seconds=float(os.getenv("TWEET_CACHE_TTL_SECONDS", "21600")),
+    max_accounts=int(os.getenv("TWEET_CACHE_MAX_ACCOUNTS", "1000")),
+    fresh_seconds=float(os.getenv("TWEET_CACHE_FRESH_SECONDS", "60")),
+    max_tweets_per_account=int(os.getenv("TWEET_CACHE_MAX_TWEETS_PER_ACCOUNT", "500")),
+)
@@ -0,0 +1,142 @@
+"""
+Lean tweet parsing for twitterapi.io responses
+Tweets are decoded one at a time and reduced to compact TweetRecord objects
+"""
+from typing import Dict, FrozenSet, Iterator, Optional, Tuple
+
+from app.utils.json_stream import JsonArrayStream
+
+# Candidate source paths per field, in priority order
+FIELD_CANDIDATES: Dict[str, Tuple[Tuple[str, ...], ...]] = {
+    "tweet_id": (("id",), ("tweetId",), ("id_str",)),
+    "text": (("text",), ("fullText",), ("content",)),
+    "timestamp": (("createdAt",), ("created_at",), ("timestamp",)),
+    "likes": (("likeCount",), ("like_count",), ("favorite_count",), ("likes",)),
+    "reposts": (("retweetCount",), ("retweet_count",), ("reposts",)),
+    "url": (("url",), ("tweetUrl",)),
+    "username": (("username",), ("author", "userName"), ("user", "username")),
+}
+
+_MAX_CACHED_SHAPES = 64
+
+
+class TweetRecord:
+    """Compact tweet with a dict-like interface (get / [] / keys / dict(record))"""
+    __slots__ = ("tweet_id", "text", "likes", "reposts", "timestamp", "url", "username")
+    FIELDS = __slots__
+
+    def __init__(self, tweet_id=None, text=None, likes=0, reposts=0, timestamp=None, url=None, username=None):
+        self.tweet_id = tweet_id
+        self.text = text
+        self.likes = likes
+        self.reposts = reposts
+        self.timestamp = timestamp
+        self.url = url
+        self.username = username
+
+    def get(self, key: str, default=None):
+        if key not in self.FIELDS:
+            return default
+        return getattr(self, key)
+
+    def __getitem__(self, key: str):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key) -> bool:
+        return key in self.FIELDS
+
+    def keys(self):
+        return self.FIELDS
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        return len(self.FIELDS)
+
+    def copy(self) -> "TweetRecord":
+        return TweetRecord(*(getattr(self, field) for field in self.FIELDS))
+
+    def to_dict(self) -> Dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self) -> str:
+        return f"TweetRecord({self.to_dict()!r})"
+
+
+class TweetParser:
+    """Maps raw tweets to TweetRecord using field mappings resolved once per response shape"""
+
+    def __init__(self):
+        self._mappings: Dict[FrozenSet[str], Dict[str, Tuple[str, ...]]] = {}
+
+    def iter_response(self, text: str) -> Tuple[Iterator[Dict], Dict]:
+        """
+        Stream raw tweets from a response body.
+        Returns (raw tweet iterator, meta) where meta (has_next_page, next_cursor, ...)
+        is filled in as the iterator is consumed.
+        """
+        stream = JsonArrayStream(text, "tweets")
+        return iter(stream), stream.meta
+
+    def parse(self, tweet: Dict) -> Optional[TweetRecord]:
+        """Build a TweetRecord from one raw tweet; None if it lacks text or timestamp"""
+        if not isinstance(tweet, dict):
+            return None
+        mapping = self._mapping_for(tweet)
+        values = {field: self._extract(tweet, path) for field, path in mapping.items()}
+
+        if not values.get("text") or not values.get("timestamp"):
+            return None
+
+        tweet_id = values.get("tweet_id")
+        username = values.get("username") or None
+        url = values.get("url")
+        if not url and tweet_id:
+            url = f"https://twitter.com/{username}/status/{tweet_id}" if username else f"https://twitter.com/i/web/status/{tweet_id}"
+
+        return TweetRecord(
+            tweet_id=str(tweet_id) if tweet_id is not None else None,
+            text=values["text"],
+            likes=self._to_int(values.get("likes")),
+            reposts=self._to_int(values.get("reposts")),
+            timestamp=values["timestamp"],
+            url=url,
+            username=username,
+        )
+
+    def _mapping_for(self, tweet: Dict) -> Dict[str, Tuple[str, ...]]:
+        shape = frozenset(tweet.keys())
+        mapping = self._mappings.get(shape)
+        if mapping is None:
+            mapping = {}
+            for field, candidates in FIELD_CANDIDATES.items():
+                for path in candidates:
+                    if path[0] in shape:
+                        mapping[field] = path
+                        break
+            if len(self._mappings) >= _MAX_CACHED_SHAPES:
+                self._mappings.clear()
+            self._mappings[shape] = mapping
+        return mapping
+
+    def _extract(self, tweet: Dict, path: Tuple[str, ...]):
+        value = tweet
+        for key in path:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(key)
+        return value
+
+    def _to_int(self, value) -> int:
+        try:
+            return int(value) if value else 0
+        except (TypeError, ValueError):
+            return 0
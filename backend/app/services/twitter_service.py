@@ -1,107 +1,430 @@
+import asyncio
 import requests
 import os
-import time
-from typing import List, Dict, Optional
+import threading
+from typing import List, Dict, Optional, Set, Tuple, AsyncIterator
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from app.services.tweet_cache import tweet_cache
+from app.services.rate_limiter import TokenBucketRateLimiter, twitter_rate_limiter, PRIORITY_SCHEDULED
+from app.services.http_client import get_http_session
+from app.services.tweet_parser import TweetParser, TweetRecord
+from app.services.topic_filter import get_topic_matcher
 
 load_dotenv()
 
+class FetchBudget:
+    """
+    Pagination budget for one run, shared by all of its account fetches.
+    Each page is one twitterapi.io call, so max_api_calls caps the run's cost.
+    """
+
+    def __init__(self, max_pages_per_account: Optional[int] = None, max_api_calls: Optional[int] = None):
+        if max_pages_per_account is None:
+            max_pages_per_account = int(os.getenv("TWITTER_MAX_PAGES", "1"))
+        if max_api_calls is None:
+            max_api_calls = int(os.getenv("TWITTER_MAX_API_CALLS_PER_RUN", "0")) or None
+        self.max_pages_per_account = max(1, max_pages_per_account)
+        self.max_api_calls = max_api_calls
+        self.pages_fetched = 0
+        self.pages_skipped = 0  # Cursors left unfollowed (at least one page each)
+        self.truncated_accounts: Set[str] = set()  # Lowercase handles whose window was not fully fetched
+        self._lock = threading.Lock()
+
+    def reserve_page(self, account_pages: int) -> bool:
+        """Reserve one API call for an account that has already fetched `account_pages` pages"""
+        with self._lock:
+            if account_pages >= self.max_pages_per_account:
+                return False
+            if self.max_api_calls is not None and self.pages_fetched >= self.max_api_calls:
+                return False
+            self.pages_fetched += 1
+            return True
+
+    def record_skipped(self, pages: int = 1):
+        with self._lock:
+            self.pages_skipped += pages
+
+    def record_truncated(self, username: str):
+        with self._lock:
+            self.truncated_accounts.add(username.lower())
+
 class TwitterService:
-    def __init__(self):
+    def __init__(
+        self,
+        rate_limiter: Optional[TokenBucketRateLimiter] = None,
+        session: Optional[requests.Session] = None
+    ):
         self.api_key = os.getenv("TWITTER_API_KEY")
         self.base_url = os.getenv("TWITTER_API_BASE_URL", "https://api.twitterapi.io")
         if not self.api_key:
             raise ValueError("TWITTER_API_KEY not found in environment variables")
         
-        # Rate limiting: Free tier allows 1 request per 5 seconds
-        self.min_request_interval = 5.0  # seconds
-        self.last_request_time = 0.0
-        self.last_request_time = 0.0
+        # Rate limiting goes through the process-wide token bucket (free tier: 1 request per 5 seconds)
+        self.rate_limiter = rate_limiter or twitter_rate_limiter
+        self.min_request_interval = self.rate_limiter.min_interval  # seconds
+        # Keep-alive connection pool shared with other services
+        self.session = session or get_http_session()
+        self.parser = TweetParser()
+
+        # Max accounts fetched in parallel for multi-account jobs
+        self.fetch_concurrency = max(1, int(os.getenv("TWITTER_FETCH_CONCURRENCY", "4")))
+        # Batching mode: pack several handles into one OR'd advanced_search query
+        self.batch_queries = os.getenv("TWITTER_BATCH_QUERIES", "false").lower() in ("1", "true", "yes")
+        self.max_query_length = int(os.getenv("TWITTER_MAX_QUERY_LENGTH", "512"))
+
+    async def get_tweets_for_users(
+        self,
+        usernames: List[str],
+        since: Optional[datetime] = None,
+        limit: int = 50,
+        priority: str = PRIORITY_SCHEDULED,
+        since_by_username: Optional[Dict[str, datetime]] = None,
+        budget: Optional[FetchBudget] = None,
+        batch: Optional[bool] = None
+    ) -> List[Dict]:
+        """
+        Fetch tweets for several accounts concurrently (at most fetch_concurrency in flight).
+        Results are merged in the order of `usernames`; every request still goes
+        through the shared rate limit. `since_by_username` (lowercase keys)
+        overrides the window start per account. One `budget` is shared by all accounts.
+        With `batch` (default TWITTER_BATCH_QUERIES) handles share OR'd queries.
+        """
+        if not usernames:
+            return []
+        since_by_username = since_by_username or {}
+        budget = budget or FetchBudget()
+        if batch is None:
+            batch = self.batch_queries
+        if batch and len(usernames) > 1:
+            by_username = await self._get_tweets_batched(usernames, since, limit, priority, since_by_username, budget)
+            tweets = []
+            for username in usernames:
+                tweets.extend(by_username.get(username, []))
+            return tweets
+
+        semaphore = asyncio.Semaphore(self.fetch_concurrency)
+
+        async def fetch(username: str) -> List[Dict]:
+            account_since = since_by_username.get(username.lower(), since)
+            async with semaphore:
+                account_tweets = await self.get_user_tweets(
+                    username=username,
+                    since=account_since,
+                    limit=limit,
+                    priority=priority,
+                    budget=budget
+                )
+            for tweet in account_tweets:
+                if not tweet.get("username"):
+                    tweet["username"] = username
+            return account_tweets
+
+        if len(usernames) == 1:
+            return await fetch(usernames[0])
+
+        print(f"[TWITTER API] Fetching {len(usernames)} accounts, {min(self.fetch_concurrency, len(usernames))} at a time")
+        results = await asyncio.gather(*(fetch(username) for username in usernames))
+        tweets = []
+        for account_tweets in results:
+            tweets.extend(account_tweets)
+        return tweets
     
-    def get_user_tweets(
+    async def _get_tweets_batched(
+        self,
+        usernames: List[str],
+        since: Optional[datetime],
+        limit: int,
+        priority: str,
+        since_by_username: Dict[str, datetime],
+        budget: FetchBudget
+    ) -> Dict[str, List[Dict]]:
+        """
+        Serve what the tweet cache can, then fetch the remaining handles with
+        OR'd queries and split the results back per account by author username.
+        """
+        until_time = datetime.utcnow()
+        default_since = since or until_time - timedelta(hours=1)
+        since_for = {username: since_by_username.get(username.lower(), default_since) for username in usernames}
+
+        # Take per-account cache locks in a stable order to avoid deadlocks between jobs
+        locks = [tweet_cache.lock_for(name) for name in sorted({u.lower() for u in usernames})]
+        for lock in locks:
+            await lock.acquire()
+        try:
+            results: Dict[str, List[Dict]] = {}
+            fetch_since: Dict[str, datetime] = {}
+            for username in usernames:
+                entry = tweet_cache.get(username, until_time)
+                if entry and entry.since <= since_for[username]:
+                    if tweet_cache.is_fresh(entry, until_time):
+                        print(f"[TWITTER API] Cache hit for @{username} (cached through {entry.until.isoformat()})")
+                        results[username] = self._slice_window(entry, username, since_for[username], limit, budget)
+                        continue
+                    fetch_since[username] = entry.until
+                else:
+                    fetch_since[username] = since_for[username]
+
+            groups = self._build_query_groups(list(fetch_since.keys()), until_time)
+            if groups:
+                print(f"[TWITTER API] Fetching {len(fetch_since)} accounts in {len(groups)} batched queries")
+
+            semaphore = asyncio.Semaphore(self.fetch_concurrency)
+
+            async def fetch_group(group: List[str]) -> Tuple[List[str], Dict[str, List[Dict]], datetime]:
+                group_since = min(fetch_since[username] for username in group)
+                async with semaphore:
+                    by_author, covered_since = await self._fetch_query_group(
+                        group, group_since, until_time, limit * len(group), priority, budget
+                    )
+                return group, by_author, covered_since
+
+            for group, by_author, covered_since in await asyncio.gather(*(fetch_group(group) for group in groups)):
+                for username in group:
+                    entry = tweet_cache.store(
+                        username,
+                        by_author.get(username.lower(), []),
+                        covered_since,
+                        until_time
+                    )
+                    results[username] = self._slice_window(entry, username, since_for[username], limit, budget)
+            return results
+        finally:
+            for lock in reversed(locks):
+                lock.release()
+
+    def _build_query_groups(self, usernames: List[str], until_time: datetime) -> List[List[str]]:
+        """Pack handles into groups whose OR'd query stays under max_query_length"""
+        sample_time = until_time.strftime("%Y-%m-%d_%H:%M:%S_UTC")
+        fixed_length = len(self._build_query(["x"], sample_time, sample_time)) - len("from:x") + 2
+        groups: List[List[str]] = []
+        current: List[str] = []
+        current_length = fixed_length
+        for username in usernames:
+            clause_length = len(f"from:{username}") + (len(" OR ") if current else 0)
+            if current and current_length + clause_length > self.max_query_length:
+                groups.append(current)
+                current = []
+                current_length = fixed_length
+                clause_length = len(f"from:{username}")
+            current.append(username)
+            current_length += clause_length
+        if current:
+            groups.append(current)
+        return groups
+
+    def _build_query(self, usernames: List[str], since_str: str, until_str: str) -> str:
+        authors = " OR ".join(f"from:{username}" for username in usernames)
+        if len(usernames) > 1:
+            authors = f"({authors})"
+        return f"{authors} since:{since_str} until:{until_str} include:nativeretweets"
+
+    async def _fetch_query_group(
+        self,
+        usernames: List[str],
+        since_time: datetime,
+        until_time: datetime,
+        max_tweets: int,
+        priority: str,
+        budget: FetchBudget
+    ) -> Tuple[Dict[str, List[Dict]], datetime]:
+        """
+        Run one OR'd query and demultiplex by author.
+        Returns (tweets per lowercase username, start of the fully covered window).
+        """
+        since_str = since_time.strftime("%Y-%m-%d_%H:%M:%S_UTC")
+        until_str = until_time.strftime("%Y-%m-%d_%H:%M:%S_UTC")
+        query = self._build_query(usernames, since_str, until_str)
+        wanted = {username.lower() for username in usernames}
+        label = ", ".join(f"@{username}" for username in usernames)
+        print(f"[TWITTER API] Batched query: {query}")
+
+        by_author: Dict[str, List[Dict]] = {}
+        all_tweets: List[Dict] = []
+        truncated = False
+        async for page_tweets, has_more in self.iter_tweet_pages(
+            query,
+            max_tweets=max_tweets,
+            budget=budget,
+            priority=priority,
+            label=label
+        ):
+            truncated = has_more
+            for tweet in page_tweets:
+                author = str(tweet.get("username") or "").lower()
+                if author not in wanted:
+                    print(f"[TWITTER API] ⚠️  Dropping tweet {tweet.get('tweet_id')} with unexpected author '{author}'")
+                    continue
+                by_author.setdefault(author, []).append(tweet)
+                all_tweets.append(tweet)
+
+        covered_since = since_time
+        if truncated:
+            # Older tweets were left behind for every handle in the group
+            oldest = tweet_cache.oldest_timestamp(all_tweets)
+            covered_since = max(since_time, oldest) if oldest else until_time
+        print(f"[TWITTER API] Batched query returned {len(all_tweets)} tweets for {len(by_author)}/{len(usernames)} accounts")
+        return by_author, covered_since
+
+    async def get_user_tweets(
         self, 
         username: str, 
         since: Optional[datetime] = None,
-        limit: int = 50
+        limit: int = 50,
+        priority: str = PRIORITY_SCHEDULED,
+        budget: Optional[FetchBudget] = None
     ) -> List[Dict]:
         """
-        Fetch tweets from a specific user using twitterapi.io advanced search API
-        Returns parsed tweet data with only important information
+        Fetch tweets from a specific user, served through the shared tweet cache.
+        Only the part of the window not already cached is requested from the API,
+        following cursors up to `budget` (default: TWITTER_MAX_PAGES per account).
         """
-        headers = {
-            "X-API-Key": self.api_key
-        }
-        
-        # Format times for the API query
         until_time = datetime.utcnow()
         if since:
             since_time = since
         else:
             # Default to last hour if no since time provided
             since_time = until_time - timedelta(hours=1)
-        
+
+        if not tweet_cache.enabled:
+            tweets, truncated = await self._fetch_user_tweets(username, since_time, until_time, limit, priority, budget)
+            if truncated and budget is not None:
+                budget.record_truncated(username)
+            return tweets
+
+        async with tweet_cache.lock_for(username):
+            entry = tweet_cache.get(username, until_time)
+            if entry and entry.since <= since_time:
+                if tweet_cache.is_fresh(entry, until_time):
+                    print(f"[TWITTER API] Cache hit for @{username} (cached through {entry.until.isoformat()})")
+                else:
+                    print(f"[TWITTER API] Cache hit for @{username}, fetching tail since {entry.until.isoformat()}")
+                    tail, truncated = await self._fetch_user_tweets(username, entry.until, until_time, limit, priority, budget)
+                    entry = tweet_cache.store(username, tail, entry.until, until_time, truncated=truncated)
+            else:
+                tweets, truncated = await self._fetch_user_tweets(username, since_time, until_time, limit, priority, budget)
+                entry = tweet_cache.store(username, tweets, since_time, until_time, truncated=truncated)
+            return self._slice_window(entry, username, since_time, limit, budget)
+
+    def _slice_window(
+        self,
+        entry,
+        username: str,
+        since_time: datetime,
+        limit: int,
+        budget: Optional[FetchBudget]
+    ) -> List[Dict]:
+        """
+        Serve an account's tweets from its cached window, recording on `budget`
+        when older tweets in [since_time, now] were not fetched or were cut by `limit`
+        """
+        tweets = tweet_cache.slice(entry, since_time, limit + 1)
+        if budget is not None and (entry.since > since_time or len(tweets) > limit):
+            budget.record_truncated(username)
+        return tweets[:limit]
+
+    async def _fetch_user_tweets(
+        self,
+        username: str,
+        since_time: datetime,
+        until_time: datetime,
+        limit: int,
+        priority: str = PRIORITY_SCHEDULED,
+        budget: Optional[FetchBudget] = None
+    ) -> Tuple[List[Dict], bool]:
+        """
+        Fetch tweets from a specific user using twitterapi.io advanced search API
+        Returns (parsed tweets, truncated) where truncated means older tweets were left behind
+        """
         # Format times as strings in the format Twitter's API expects
         since_str = since_time.strftime("%Y-%m-%d_%H:%M:%S_UTC")
         until_str = until_time.strftime("%Y-%m-%d_%H:%M:%S_UTC")
         
         # Construct the advanced search query
-        query = f"from:{username} since:{since_str} until:{until_str} include:nativeretweets"
-        
-        # API endpoint
-        url = f"{self.base_url}/twitter/tweet/advanced_search"
-        
-        # Request parameters
-        params = {
-            "query": query,
-            "queryType": "Latest"
-        }
+        query = self._build_query([username], since_str, until_str)
         
         print("=" * 80)
         print("[TWITTER API] Starting tweet fetch")
         print(f"[TWITTER API] Username: @{username}")
         print(f"[TWITTER API] Time range: {since_str} to {until_str}")
-        print(f"[TWITTER API] URL: {url}")
         print(f"[TWITTER API] Query: {query}")
-        print(f"[TWITTER API] Params: {params}")
         print(f"[TWITTER API] API Key present: {'Yes' if self.api_key else 'No'}")
         print("=" * 80)
         
-        # Make the request and handle pagination
-        # IMPORTANT: Limit pagination to reduce API calls and costs
-        # Each page is a separate API call, so we limit to 1 page by default
         all_tweets = []
-        next_cursor = None
-        max_tweets = limit
-        max_retries = 3
-        max_pages = 1  # Limit to 1 page to minimize API calls (each page = 1 API call)
+        truncated = False
+        async for page_tweets, has_more in self.iter_tweet_pages(
+            query,
+            max_tweets=limit,
+            budget=budget,
+            priority=priority,
+            label=f"@{username}"
+        ):
+            for tweet in page_tweets:
+                if not tweet.get("username"):
+                    tweet["username"] = username
+            all_tweets.extend(page_tweets)
+            truncated = has_more
+        
+        print("=" * 80)
+        print(f"[TWITTER API] ✅ FINAL SUMMARY")
+        print(f"[TWITTER API] Total tweets fetched: {len(all_tweets)}")
+        print(f"[TWITTER API] Username: @{username}")
+        print("=" * 80)
+        return all_tweets[:limit], truncated
+
+    async def iter_tweet_pages(
+        self,
+        query: str,
+        max_tweets: int = 50,
+        budget: Optional[FetchBudget] = None,
+        priority: str = PRIORITY_SCHEDULED,
+        label: str = ""
+    ) -> AsyncIterator[Tuple[List[Dict], bool]]:
+        """
+        Stream pages of parsed tweets for an advanced search query, following
+        next_cursor while the budget allows. Yields (tweets, has_more) per page;
+        has_more on the last page means older tweets were left unfetched.
+        Rate-limit and backoff waits are awaited; the blocking HTTP call itself
+        runs on a worker thread using the pooled session.
+        """
+        budget = budget or FetchBudget()
+        headers = {
+            "X-API-Key": self.api_key
+        }
+        url = f"{self.base_url}/twitter/tweet/advanced_search"
+        params = {
+            "query": query,
+            "queryType": "Latest"
+        }
+        tweets_seen = 0
         page_count = 0
+        max_retries = 3
         
         try:
-            while len(all_tweets) < max_tweets and page_count < max_pages:
+            while True:
+                # Each page is a separate API call, so it must fit the job's budget
+                if not budget.reserve_page(page_count):
+                    print(f"[TWITTER API] Page budget exhausted for {label} after {page_count} page(s)")
+                    budget.record_skipped()
+                    if page_count == 0:
+                        yield [], True
+                    return
                 page_count += 1
-                print(f"\n[TWITTER API] ===== Page {page_count} ===== ")
-                print(f"[TWITTER API] Fetching page {page_count} for @{username}...")
-                
-                # Add cursor to params if we have one
-                if next_cursor:
-                    params["cursor"] = next_cursor
-                    print(f"[TWITTER API] Using cursor for pagination: {next_cursor[:50]}...")
-                
-                # Rate limiting: ensure we wait at least 5 seconds between requests
-                if page_count > 1:  # Only wait between pages, not before first request
-                    self._wait_for_rate_limit()
-                    print(f"[TWITTER API] Waiting 5 seconds before fetching next page (API rate limit)...")
+                print(f"[TWITTER API] Fetching page {page_count} for {label}...")
                 
                 # Make request with retry logic
                 response = None
                 for attempt in range(max_retries):
                     try:
+                        # Rate limiting: every request takes a token from the shared bucket
+                        await self._wait_for_rate_limit(priority)
                         print(f"[TWITTER API] Making GET request (attempt {attempt + 1}/{max_retries})...")
-                        response = requests.get(url, headers=headers, params=params, timeout=30)
+                        response = await asyncio.to_thread(
+                            self.session.get, url, headers=headers, params=dict(params), timeout=30
+                        )
                         
                         print(f"[TWITTER API] Response Status Code: {response.status_code}")
-                        print(f"[TWITTER API] Response Headers: {dict(response.headers)}")
                         
                         # Handle rate limit (429)
                         if response.status_code == 429:
@@ -109,9 +432,9 @@ class TwitterService:
                             wait_time = max(retry_after, self.min_request_interval)
                             print(f"[TWITTER API] ❌ Rate limit hit (429). Waiting {wait_time} seconds before retry...")
                             print(f"[TWITTER API] Response body: {response.text[:500]}")
-                            time.sleep(wait_time)
-                            self.last_request_time = time.time()
-                            continue  # Retry the request
+                            # Pause the shared bucket so every concurrent fetch backs off too
+                            self.rate_limiter.penalize(wait_time)
+                            continue  # Retry the request (waits in _wait_for_rate_limit)
                         
                         response.raise_for_status()
                         print(f"[TWITTER API] ✅ Request successful (Status: {response.status_code})")
@@ -126,61 +449,33 @@ class TwitterService:
                             raise  # Re-raise on final attempt
                         wait_time = (attempt + 1) * 2  # Exponential backoff: 2s, 4s, 6s
                         print(f"[TWITTER API] Retrying in {wait_time} seconds... (attempt {attempt + 1}/{max_retries})")
-                        time.sleep(wait_time)
+                        await asyncio.sleep(wait_time)
                 
                 if response is None:
                     raise Exception("Failed to get response after retries")
+                if response.status_code == 429:
+                    raise Exception(f"Rate limit exceeded for {label} after {max_retries} attempts")
                 
-                print(f"[TWITTER API] Parsing JSON response...")
-                data = response.json()
-                print(f"[TWITTER API] Response keys: {list(data.keys())}")
-                print(f"[TWITTER API] Has 'tweets' key: {'tweets' in data}")
-                print(f"[TWITTER API] Has 'has_next_page' key: {'has_next_page' in data}")
+                page_tweets, raw_count, data = self._parse_page(response, max_tweets - tweets_seen)
+                tweets_seen += len(page_tweets)
+                if not raw_count:
+                    print(f"[TWITTER API] ⚠️  No tweets in response. Response keys: {list(data.keys())}")
                 
-                tweets = data.get("tweets", [])
-                print(f"[TWITTER API] Raw tweets count from API: {len(tweets) if tweets else 0}")
-                
-                if not tweets:
-                    print(f"[TWITTER API] ⚠️  No tweets in response. Full response structure:")
-                    print(f"[TWITTER API] {str(data)[:1000]}")
-                
-                if tweets:
-                    print(f"[TWITTER API] Processing {len(tweets)} raw tweets...")
-                    # Parse and add tweets
-                    parsed_count = 0
-                    for idx, tweet in enumerate(tweets):
-                        if idx < 3:  # Log first 3 tweets for debugging
-                            print(f"[TWITTER API] Sample tweet {idx + 1} keys: {list(tweet.keys()) if isinstance(tweet, dict) else 'Not a dict'}")
-                        parsed_tweet = self._parse_tweet(tweet)
-                        if parsed_tweet:
-                            if not parsed_tweet.get("username"):
-                                parsed_tweet["username"] = username
-                            all_tweets.append(parsed_tweet)
-                            parsed_count += 1
-                            if len(all_tweets) >= max_tweets:
-                                break
-                    print(f"[TWITTER API] Successfully parsed {parsed_count} tweets out of {len(tweets)} raw tweets")
-                else:
-                    print(f"[TWITTER API] ⚠️  No tweets to process")
+                next_cursor = data.get("next_cursor", "")
+                has_next_page = bool(data.get("has_next_page", False) and next_cursor)
+                hit_limit = tweets_seen >= max_tweets
+                print(f"[TWITTER API] Page {page_count}: parsed {len(page_tweets)} of {raw_count} raw tweets")
                 
-                # Check if there are more pages - but don't fetch them to save API calls
-                if data.get("has_next_page", False) and data.get("next_cursor", ""):
-                    print(f"[API Call #{page_count}] More pages available, but limiting to {max_pages} page(s) to reduce API calls")
-                    # Don't fetch more pages - we've limited to 1 page to minimize costs
-                    break
-                else:
-                    break
-            
-            print("=" * 80)
-            print(f"[TWITTER API] ✅ FINAL SUMMARY")
-            print(f"[TWITTER API] Total tweets fetched: {len(all_tweets)}")
-            print(f"[TWITTER API] API calls made: {page_count}")
-            print(f"[TWITTER API] Username: @{username}")
-            print("=" * 80)
-            return all_tweets[:max_tweets]
+                if not has_next_page or hit_limit:
+                    if has_next_page:
+                        budget.record_skipped()
+                    yield page_tweets, has_next_page or (hit_limit and len(page_tweets) < raw_count)
+                    return
+                yield page_tweets, True
+                params["cursor"] = next_cursor
             
         except requests.exceptions.RequestException as e:
-            error_msg = f"Error fetching tweets for {username}: {str(e)}"
+            error_msg = f"Error fetching tweets for {label}: {str(e)}"
             if hasattr(e, 'response') and e.response is not None:
                 error_msg += f" - Response: {e.response.text}"
                 if e.response.status_code == 429:
@@ -188,16 +483,11 @@ class TwitterService:
             print(error_msg)
             raise Exception(error_msg)
     
-    def _wait_for_rate_limit(self):
-        """Wait if necessary to respect rate limits"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        
-        if time_since_last_request < self.min_request_interval:
-            wait_time = self.min_request_interval - time_since_last_request
-            time.sleep(wait_time)
-        
-        self.last_request_time = time.time()
+    async def _wait_for_rate_limit(self, priority: str = PRIORITY_SCHEDULED):
+        """Wait for a token from the shared rate limiter"""
+        waited = await self.rate_limiter.acquire_async(priority)
+        if waited >= 0.5:
+            print(f"[TWITTER API] Waited {waited:.1f} seconds for rate limit ({priority})")
     
     def _get_retry_after(self, response: requests.Response) -> float:
         """Extract retry-after time from response headers"""
@@ -209,53 +499,46 @@ class TwitterService:
                 pass
         return self.min_request_interval
     
-    def _parse_tweet(self, tweet: Dict) -> Optional[Dict]:
+    def _parse_page(self, response: requests.Response, remaining: int) -> Tuple[List[TweetRecord], int, Dict]:
+        """
+        Parse one response page into at most `remaining` TweetRecords.
+        Raw tweets are decoded one at a time from the body; falls back to
+        response.json() if the body is not a plain JSON object.
+        Returns (records, raw tweet count, other top-level fields).
+        """
+        try:
+            raw_tweets, meta = self.parser.iter_response(response.text)
+            page_tweets, raw_count = self._collect_records(raw_tweets, remaining)
+            return page_tweets, raw_count, meta
+        except ValueError:
+            data = response.json()
+            page_tweets, raw_count = self._collect_records(iter(data.get("tweets", []) or []), remaining)
+            return page_tweets, raw_count, data
+
+    def _collect_records(self, raw_tweets, remaining: int) -> Tuple[List[TweetRecord], int]:
+        page_tweets = []
+        raw_count = 0
+        for tweet in raw_tweets:
+            raw_count += 1
+            if len(page_tweets) >= remaining:
+                continue  # Keep scanning so the page metadata after the array is read
+            parsed_tweet = self._parse_tweet(tweet)
+            if parsed_tweet:
+                page_tweets.append(parsed_tweet)
+        return page_tweets, raw_count
+
+    def _parse_tweet(self, tweet: Dict) -> Optional[TweetRecord]:
         """
         Parse tweet data from twitterapi.io response and extract only important information:
-        - text
-        - likes
-        - reposts/retweets
-        - timestamp
-        - tweet_id
+        text, likes, reposts/retweets, timestamp, tweet_id, url and author username
         """
         try:
-            if not isinstance(tweet, dict):
-                print(f"[TWITTER API] ⚠️  Tweet is not a dict: {type(tweet)}")
-                return None
-            # Map twitterapi.io response fields to our standard format
-            tweet_id = tweet.get("id") or tweet.get("tweetId") or tweet.get("id_str")
-            text = tweet.get("text") or tweet.get("fullText") or tweet.get("content")
-            created_at = tweet.get("createdAt") or tweet.get("created_at") or tweet.get("timestamp")
-            
-            # Extract engagement metrics
-            likes = tweet.get("likeCount") or tweet.get("like_count") or tweet.get("favorite_count") or tweet.get("likes", 0)
-            reposts = tweet.get("retweetCount") or tweet.get("retweet_count") or tweet.get("reposts", 0)
-            
-            # Build URL
-            username = tweet.get("username") or tweet.get("user", {}).get("username", "")
-            url = tweet.get("url") or tweet.get("tweetUrl")
-            if not url and tweet_id:
-                url = f"https://twitter.com/{username}/status/{tweet_id}" if username else f"https://twitter.com/i/web/status/{tweet_id}"
-            
-            parsed = {
-                "tweet_id": tweet_id,
-                "text": text,
-                "likes": int(likes) if likes else 0,
-                "reposts": int(reposts) if reposts else 0,
-                "timestamp": created_at,
-                "url": url
-            }
-            
-            # Ensure we have at least text and timestamp
-            if not parsed["text"] or not parsed["timestamp"]:
-                print(f"[TWITTER API] ⚠️  Tweet missing required fields - text: {bool(parsed['text'])}, timestamp: {bool(parsed['timestamp'])}")
-                return None
-            
+            parsed = self.parser.parse(tweet)
+            if parsed is None:
+                print(f"[TWITTER API] ⚠️  Skipping tweet without text/timestamp (type: {type(tweet).__name__})")
             return parsed
-            
         except Exception as e:
             print(f"[TWITTER API] ❌ Error parsing tweet: {str(e)}")
-            print(f"[TWITTER API] Tweet data type: {type(tweet)}")
             print(f"[TWITTER API] Tweet data (first 500 chars): {str(tweet)[:500]}")
             return None
     
@@ -263,15 +546,7 @@ class TwitterService:
         """
         Filter tweets by topics (keywords)
         """
-        if not topics:
+        matcher = get_topic_matcher(topics)
+        if not matcher:
             return tweets
-        
-        filtered = []
-        topics_lower = [topic.lower() for topic in topics]
-        
-        for tweet in tweets:
-            text_lower = tweet.get("text", "").lower()
-            if any(topic in text_lower for topic in topics_lower):
-                filtered.append(tweet)
-        
-        return filtered
+        return [tweet for tweet in tweets if matcher.score(tweet.get("text", ""))]
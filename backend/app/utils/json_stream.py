@@ -0,0 +1,62 @@
+import json
+import re
+from typing import Any, Dict, Iterator
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_decoder = json.JSONDecoder()
+
+
+class JsonArrayStream:
+    """
+    Iterate the items of one top-level array in a JSON object, decoding them
+    one at a time instead of building the whole document tree up front.
+    Other top-level members are collected into `meta` as the scan passes them,
+    so `meta` is complete once iteration finishes.
+    """
+
+    def __init__(self, text: str, array_key: str):
+        self.text = text
+        self.array_key = array_key
+        self.meta: Dict[str, Any] = {}
+
+    def __iter__(self) -> Iterator[Any]:
+        text = self.text
+        idx = self._expect(self._skip(0), "{")
+        idx = self._skip(idx)
+        if text[idx] == "}":
+            return
+        while True:
+            key, idx = _decoder.raw_decode(text, idx)
+            idx = self._skip(self._expect(self._skip(idx), ":"))
+            if key == self.array_key and text[idx] == "[":
+                idx = self._skip(idx + 1)
+                if text[idx] == "]":
+                    idx += 1
+                else:
+                    while True:
+                        item, idx = _decoder.raw_decode(text, idx)
+                        yield item
+                        idx = self._skip(idx)
+                        if text[idx] == "]":
+                            idx += 1
+                            break
+                        idx = self._skip(self._expect(idx, ","))
+            else:
+                value, idx = _decoder.raw_decode(text, idx)
+                self.meta[key] = value
+            idx = self._skip(idx)
+            if text[idx] == "}":
+                return
+            idx = self._skip(self._expect(idx, ","))
+
+    def _skip(self, idx: int) -> int:
+        # Every skip is followed by a read, so running out here means a truncated body
+        idx = _WHITESPACE.match(self.text, idx).end()
+        if idx >= len(self.text):
+            raise ValueError("Unexpected end of JSON input")
+        return idx
+
+    def _expect(self, idx: int, char: str) -> int:
+        if idx >= len(self.text) or self.text[idx] != char:
+            raise ValueError(f"Expected '{char}' at position {idx}")
+        return idx + 1
@@ -0,0 +1,114 @@
+"""
+Schedule arithmetic for jobs
+Each job stores an explicit next_run_at; these helpers derive it from the
+frequency and last run, and decide what to do with runs missed while no
+scheduler was running
+"""
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Tuple, Union
+
+# Run interval per job frequency
+FREQUENCY_INTERVALS = {
+    "hourly": timedelta(hours=1),
+    "every_6_hours": timedelta(hours=6),
+    "every_12_hours": timedelta(hours=12),
+    "daily": timedelta(days=1)
+}
+
+# Catch-up policies for overdue runs
+CATCHUP_COALESCE = "coalesce"   # One run for all missed slots, then keep the original cadence
+CATCHUP_RUN_ONCE = "run_once"   # One run now, and restart the cadence from now
+CATCHUP_SKIP = "skip"           # Drop missed slots and wait for the next one
+CATCHUP_POLICIES = (CATCHUP_COALESCE, CATCHUP_RUN_ONCE, CATCHUP_SKIP)
+
+
+def frequency_interval(frequency: Optional[str]) -> timedelta:
+    return FREQUENCY_INTERVALS.get(frequency or "daily", FREQUENCY_INTERVALS["daily"])
+
+
+def to_utc_naive(value: Union[datetime, str, None]) -> Optional[datetime]:
+    """Naive UTC datetime (the convention used for stored timestamps) from a datetime or ISO string"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def slot_start(moment: datetime, interval: timedelta) -> datetime:
+    """Start of the schedule slot containing `moment` (slots are aligned to the epoch)"""
+    epoch = datetime(1970, 1, 1)
+    return epoch + (moment - epoch) // interval * interval
+
+
+def job_phase_offset(job_id: int, interval: timedelta) -> timedelta:
+    """Stable per-job offset within its interval, so jobs don't all start on the hour"""
+    digest = hashlib.sha256(f"job:{job_id}".encode("utf-8")).digest()
+    seconds = int(interval.total_seconds())
+    return timedelta(seconds=int.from_bytes(digest[:8], "big") % max(seconds, 1))
+
+
+def align_to_phase(moment: datetime, interval: timedelta, offset: timedelta) -> datetime:
+    """Nearest time to `moment` that sits `offset` into an (epoch-aligned) interval"""
+    earlier = slot_start(moment - offset, interval) + offset
+    later = earlier + interval
+    return earlier if moment - earlier <= later - moment else later
+
+
+def initial_next_run(
+    frequency: Optional[str],
+    last_run: Union[datetime, str, None],
+    now: datetime,
+    job_id: Optional[int] = None
+) -> datetime:
+    """
+    First run time for a newly scheduled (or rescheduled) job. With `job_id`,
+    the time is moved to the job's phase offset (a run that was not yet due
+    is never made overdue by the move).
+    """
+    last_run = to_utc_naive(last_run)
+    interval = frequency_interval(frequency)
+    next_run_at = (last_run or now) + interval  # May already be due; the catch-up policy handles that
+    if job_id is None:
+        return next_run_at
+    aligned = align_to_phase(next_run_at, interval, job_phase_offset(job_id, interval))
+    if aligned < now and next_run_at >= now:
+        aligned += interval
+    return aligned
+
+
+def plan_due_run(
+    due_at: datetime,
+    frequency: Optional[str],
+    now: datetime,
+    policy: str = CATCHUP_COALESCE,
+    grace: timedelta = timedelta(minutes=5),
+    job_id: Optional[int] = None,
+    online_since: Optional[datetime] = None
+) -> Tuple[bool, datetime]:
+    """
+    For a job due at `due_at`, returns (run now?, next_run_at). Runs later than
+    `grace` count as missed and follow the catch-up policy, unless they fell
+    due after `online_since` (delayed by throttling, not downtime). With
+    `job_id`, the next run is kept on (or moved to) the job's phase offset.
+    """
+    interval = frequency_interval(frequency)
+    missed = now - due_at > grace and (online_since is None or due_at < online_since)
+    run_now = not (missed and policy == CATCHUP_SKIP)
+    if missed and policy == CATCHUP_RUN_ONCE:
+        next_run_at = now + interval
+    else:
+        # Next slot on the original cadence that is still in the future
+        slots_behind = max((now - due_at) // interval + 1, 1)
+        next_run_at = due_at + slots_behind * interval
+    if job_id is not None:
+        next_run_at = align_to_phase(next_run_at, interval, job_phase_offset(job_id, interval))
+        if next_run_at <= now:
+            next_run_at += interval
+    return run_now, next_run_at
@@ -0,0 +1,77 @@
+"""
+In-memory timer queue for the scheduler
+A min-heap of (due timestamp, job id) pairs: two small numbers per job, so
+hundreds of thousands of jobs fit in a few tens of MB. Rescheduling pushes a
+new entry and leaves the old one behind; stale entries are skipped when they
+reach the top and dropped when the heap is compacted.
+"""
+import heapq
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def _timestamp(moment: datetime) -> float:
+    """Seconds since the epoch for a naive UTC datetime"""
+    return (moment - _EPOCH).total_seconds()
+
+
+class ScheduleHeap:
+    def __init__(self):
+        self._heap: List[Tuple[float, int]] = []
+        self._due: Dict[int, float] = {}  # Current due timestamp per job; heap entries that differ are stale
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def __contains__(self, job_id: int) -> bool:
+        return job_id in self._due
+
+    def set(self, job_id: int, due_at: datetime):
+        """Schedule (or move) a job to `due_at`"""
+        due = _timestamp(due_at)
+        if self._due.get(job_id) == due:
+            return
+        self._due[job_id] = due
+        heapq.heappush(self._heap, (due, job_id))
+        self._compact()
+
+    def discard(self, job_id: int):
+        """Take a job off the schedule (no-op if it is not on it)"""
+        if self._due.pop(job_id, None) is not None:
+            self._compact()
+
+    def clear(self):
+        self._heap = []
+        self._due = {}
+
+    def next_due(self) -> Optional[datetime]:
+        """Earliest due time, or None when nothing is scheduled"""
+        self._drop_stale()
+        if not self._heap:
+            return None
+        return _EPOCH + timedelta(seconds=self._heap[0][0])
+
+    def pop_due(self, now: datetime, limit: Optional[int] = None) -> List[int]:
+        """Remove and return the ids of jobs due at or before `now`, most overdue first"""
+        cutoff = _timestamp(now)
+        due_ids = []
+        while limit is None or len(due_ids) < limit:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > cutoff:
+                break
+            _, job_id = heapq.heappop(self._heap)
+            del self._due[job_id]
+            due_ids.append(job_id)
+        return due_ids
+
+    def _drop_stale(self):
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        # Bound the garbage left by reschedules so memory stays proportional to the job count
+        if len(self._heap) > 2 * len(self._due) + 1024:
+            self._heap = [(due, job_id) for job_id, due in self._due.items()]
+            heapq.heapify(self._heap)
@@ -1,5 +1,5 @@
 import re
-from typing import Optional
+from typing import Dict, List, Optional
 
 
 def build_summary_headline(summary: str, max_words: int = 20, max_chars: int = 140) -> str:
@@ -15,3 +15,61 @@ def build_summary_headline(summary: str, max_words: int = 20, max_chars: int = 1
     if len(first_sentence) > max_chars:
         return first_sentence[: max_chars - 3].rstrip(",.;:") + "..."
     return first_sentence
+
+
+class SummaryStreamParser:
+    """
+    Incremental counterpart of LLMService._extract_headline_and_summary for
+    streamed responses. feed() returns events as soon as they can be told apart:
+    {"type": "headline", "headline": ...} once the Headline: line is complete,
+    then {"type": "delta", "text": ...} for everything after the Summary: marker.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._preamble: List[str] = []
+        self._in_summary = False
+        self._headline_sent = False
+
+    def feed(self, delta: str) -> List[Dict]:
+        if not delta:
+            return []
+        if self._in_summary:
+            return [{"type": "delta", "text": delta}]
+        self._buffer += delta
+        events = []
+        while not self._in_summary and "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            events.extend(self._handle_line(line))
+        if self._in_summary and self._buffer:
+            events.append({"type": "delta", "text": self._buffer})
+            self._buffer = ""
+        return events
+
+    def close(self) -> List[Dict]:
+        """Flush what is left; without a Summary: marker the whole text is the summary"""
+        if self._in_summary:
+            return []
+        events = []
+        if self._buffer:
+            events.extend(self._handle_line(self._buffer))
+            self._buffer = ""
+        if not self._in_summary:
+            text = "\n".join(self._preamble).strip()
+            if text:
+                events.append({"type": "delta", "text": text})
+        return events
+
+    def _handle_line(self, line: str) -> List[Dict]:
+        stripped = line.strip()
+        lowered = stripped.lower()
+        if lowered.startswith("headline:") and not self._headline_sent:
+            self._headline_sent = True
+            self._preamble.append(line)
+            return [{"type": "headline", "headline": stripped.split(":", 1)[1].strip()}]
+        if lowered.startswith("summary:"):
+            self._in_summary = True
+            remainder = stripped.split(":", 1)[1].strip()
+            return [{"type": "delta", "text": remainder + "\n"}] if remainder else []
+        self._preamble.append(line)
+        return []
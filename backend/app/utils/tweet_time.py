@@ -0,0 +1,46 @@
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+# twitterapi.io returns the classic Twitter format, e.g. "Tue Dec 10 07:00:30 +0000 2024"
+TWITTER_TIME_FORMAT = "%a %b %d %H:%M:%S %z %Y"
+
+
+def parse_tweet_timestamp(value) -> Optional[datetime]:
+    """Parse a tweet timestamp into a naive UTC datetime (None if unparseable)"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = str(value).strip()
+        try:
+            parsed = datetime.strptime(text, TWITTER_TIME_FORMAT)
+        except ValueError:
+            try:
+                parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+            except ValueError:
+                return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def tweet_id_value(tweet_id) -> Optional[int]:
+    """Numeric value of a tweet id; snowflake ids increase with posting time"""
+    try:
+        return int(str(tweet_id).strip())
+    except (TypeError, ValueError):
+        return None
+
+
+def tweet_time_range(tweets: List[Dict]) -> Optional[str]:
+    """
+    Span of the tweets' timestamps to the minute, e.g. "2024-12-10 07:00 to
+    2024-12-10 09:30 UTC". It depends only on the tweets, so runs over the
+    same tweets describe (and cache) the window identically.
+    """
+    times = [parsed for parsed in (parse_tweet_timestamp(tweet.get("timestamp")) for tweet in tweets) if parsed]
+    if not times:
+        return None
+    start, end = min(times), max(times)
+    return f"{start:%Y-%m-%d %H:%M} to {end:%Y-%m-%d %H:%M} UTC"
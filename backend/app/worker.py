@@ -0,0 +1,143 @@
+"""
+Queue worker for XTrack
+Claims queued job runs from the database and executes them. Run any number of
+these next to the API (JOB_EXECUTION_MODE=queue):
+
+    python -m app.worker
+"""
+import asyncio
+import os
+import signal
+import socket
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from app.database import SessionLocal
+from app.services.db_storage import DatabaseStorage
+from app.services.job_queue import JobQueue
+from app.services.registry import services
+
+
+class QueueWorker:
+    def __init__(
+        self,
+        worker_id: Optional[str] = None,
+        concurrency: Optional[int] = None,
+        poll_interval: Optional[float] = None,
+        lease_seconds: Optional[float] = None
+    ):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        if concurrency is None:
+            concurrency = int(os.getenv("WORKER_CONCURRENCY", "4"))
+        if poll_interval is None:
+            poll_interval = float(os.getenv("WORKER_POLL_INTERVAL_SECONDS", "5"))
+        if lease_seconds is None:
+            lease_seconds = float(os.getenv("JOB_QUEUE_LEASE_SECONDS", "300"))
+        self.concurrency = max(1, concurrency)
+        self.poll_interval = max(poll_interval, 0.1)
+        self.lease = timedelta(seconds=lease_seconds)
+        self.retention = timedelta(days=float(os.getenv("JOB_QUEUE_RETENTION_DAYS", "7")))
+        self._in_flight: Dict[int, asyncio.Task] = {}
+        self._stopping = asyncio.Event()
+        self._last_maintenance: Optional[datetime] = None
+
+    async def run(self):
+        """Claim and execute runs until stop() is called, then drain in-flight runs"""
+        print(f"[WORKER] ✅ Worker {self.worker_id} started ({self.concurrency} concurrent runs)")
+        while not self._stopping.is_set():
+            await self._maintain()
+            claimed = await self._fill_slots()
+            if not claimed:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+            else:
+                await asyncio.sleep(0)
+        if self._in_flight:
+            print(f"[WORKER] Waiting for {len(self._in_flight)} in-flight run(s)...")
+            await asyncio.gather(*self._in_flight.values(), return_exceptions=True)
+        print(f"[WORKER] Worker {self.worker_id} stopped")
+
+    def stop(self):
+        self._stopping.set()
+
+    async def _fill_slots(self) -> int:
+        claimed = 0
+        while len(self._in_flight) < self.concurrency:
+            # Queue calls are blocking; keep them off the loop that drives in-flight runs
+            run = await asyncio.to_thread(self._claim)
+            if not run:
+                break
+            task = asyncio.get_running_loop().create_task(self._execute(run))
+            self._in_flight[run["id"]] = task
+            task.add_done_callback(lambda _, run_id=run["id"]: self._in_flight.pop(run_id, None))
+            claimed += 1
+        return claimed
+
+    def _claim(self) -> Optional[Dict]:
+        db = SessionLocal()
+        try:
+            return JobQueue(db).claim(self.worker_id)
+        finally:
+            db.close()
+
+    async def _execute(self, run: Dict):
+        print(f"[WORKER] ▶️  Run {run['id']}: job {run['job_id']} (attempt {run['attempts']})")
+        db = SessionLocal()
+        queue = JobQueue(db)
+        try:
+            # Queue and job lookups are blocking; run them in a thread like the claim loop
+            job = await asyncio.to_thread(DatabaseStorage(db).get_job, run["job_id"])
+            if not job or not job.get("is_active", True) or job.get("status") == "deleted":
+                print(f"[WORKER] ⚠️  Job {run['job_id']} is gone or inactive, dropping run {run['id']}")
+                await asyncio.to_thread(queue.complete, run["id"])
+                return
+            summary = await services.monitoring.run_job(job, db)
+            await asyncio.to_thread(queue.complete, run["id"])
+            print(f"[WORKER] ✅ Run {run['id']} completed (summary {summary.get('id')})")
+        except Exception as e:
+            print(f"[WORKER] ❌ Run {run['id']} failed: {str(e)}")
+            await asyncio.to_thread(self._fail_run, db, queue, run["id"], str(e))
+        finally:
+            db.close()
+
+    def _fail_run(self, db, queue: JobQueue, run_id: int, error: str):
+        db.rollback()
+        queue.fail(run_id, error)
+
+    async def _maintain(self):
+        """Heartbeat in-flight runs, recover expired leases, purge old runs"""
+        now = datetime.utcnow()
+        if self._last_maintenance and now - self._last_maintenance < self.lease / 3:
+            return
+        self._last_maintenance = now
+        await asyncio.to_thread(self._maintain_queue, list(self._in_flight))
+
+    def _maintain_queue(self, run_ids: List[int]):
+        db = SessionLocal()
+        try:
+            queue = JobQueue(db)
+            queue.heartbeat(run_ids, self.worker_id)
+            queue.requeue_expired(self.lease)
+            queue.purge_finished(self.retention)
+        except Exception as e:
+            print(f"[WORKER] ⚠️  Queue maintenance failed: {str(e)}")
+        finally:
+            db.close()
+
+
+async def _main():
+    worker = QueueWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, worker.stop)
+        except NotImplementedError:
+            pass  # Windows
+    services.warm_up()
+    await worker.run()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,31 @@
+"""
+Shared test setup: a throwaway SQLite database and offline service settings.
+This runs before any app module is imported, so module-level singletons pick
+the settings up.
+"""
+import os
+import tempfile
+
+os.chdir(tempfile.mkdtemp(prefix="xtrack-tests-"))  # app.database falls back to sqlite:///./xtrack.db
+os.environ.pop("DATABASE_URL", None)
+os.environ["LLM_PROVIDER"] = "stub"
+os.environ.pop("LLM_FALLBACK_PROVIDER", None)
+os.environ.setdefault("TWITTER_API_KEY", "test")
+os.environ.setdefault("SESSION_SECRET", "test")
+
+import pytest
+
+from app import models  # noqa: F401  (registers the tables)
+from app.database import Base, SessionLocal, engine
+
+
+@pytest.fixture
+def db():
+    """Session on freshly created tables"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
@@ -0,0 +1,111 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.database import SessionLocal
+from app.models import JobRun, JobRunStatus
+from app.services.db_storage import DatabaseStorage
+from app.services.job_queue import JobQueue
+
+SLOT = datetime(2025, 1, 20, 12, 0, 0)
+
+
+@pytest.fixture
+def job_id(db):
+    return DatabaseStorage(db).create_job(x_username="alice", frequency="hourly", topics=[])["id"]
+
+
+def _queue(db, **kwargs):
+    kwargs.setdefault("retry_delay", timedelta(0))
+    return JobQueue(db, **kwargs)
+
+
+def test_enqueue_once_per_slot_and_pending_run(db, job_id):
+    queue = _queue(db)
+    run = queue.enqueue(job_id, SLOT)
+    assert run["status"] == "queued" and run["attempts"] == 0
+    assert queue.enqueue(job_id, SLOT) is None
+    # A later slot waits until the pending run has finished
+    assert queue.enqueue(job_id, SLOT + timedelta(hours=1)) is None
+    queue.complete(run["id"])
+    assert queue.enqueue(job_id, SLOT + timedelta(hours=1)) is not None
+
+
+def test_each_run_is_claimed_by_one_worker(db, job_id):
+    other_job_id = DatabaseStorage(db).create_job(x_username="bob", frequency="hourly", topics=[])["id"]
+    _queue(db).enqueue(job_id, SLOT)
+    _queue(db).enqueue(other_job_id, SLOT + timedelta(minutes=1))
+
+    sessions = [SessionLocal() for _ in range(3)]
+    try:
+        claims = [_queue(session).claim(f"worker-{idx}") for idx, session in enumerate(sessions)]
+    finally:
+        for session in sessions:
+            session.close()
+
+    assert [claim["job_id"] for claim in claims[:2]] == [job_id, other_job_id]
+    assert claims[2] is None
+    assert {claim["claimed_by"] for claim in claims[:2]} == {"worker-0", "worker-1"}
+    assert all(claim["status"] == "running" and claim["attempts"] == 1 for claim in claims[:2])
+
+
+def test_claim_loses_race_to_concurrent_update(db, job_id, monkeypatch):
+    queue = _queue(db)
+    run = queue.enqueue(job_id, SLOT)
+    rival = SessionLocal()
+    original_execute = db.execute
+
+    def execute(statement, *args, **kwargs):
+        # Another worker claims the run between our SELECT and our conditional UPDATE
+        if getattr(statement, "is_update", False):
+            rival.query(JobRun).filter(JobRun.id == run["id"]).update({"status": JobRunStatus.RUNNING, "claimed_by": "rival"})
+            rival.commit()
+        return original_execute(statement, *args, **kwargs)
+
+    monkeypatch.setattr(db, "execute", execute)
+    try:
+        assert queue.claim("worker-0") is None
+    finally:
+        rival.close()
+    assert db.query(JobRun).filter(JobRun.id == run["id"]).one().claimed_by == "rival"
+
+
+def test_failed_run_is_retried_then_failed(db, job_id):
+    queue = _queue(db, max_attempts=2)
+    run = queue.enqueue(job_id, SLOT)
+
+    first = queue.claim("worker-0")
+    queue.fail(first["id"], "boom")
+    assert db.query(JobRun).filter(JobRun.id == run["id"]).one().status == JobRunStatus.QUEUED
+
+    second = queue.claim("worker-1")
+    assert second["id"] == run["id"] and second["attempts"] == 2
+    queue.fail(second["id"], "boom again")
+    db.expire_all()
+    failed = db.query(JobRun).filter(JobRun.id == run["id"]).one()
+    assert failed.status == JobRunStatus.FAILED
+    assert failed.error_message == "boom again"
+    assert queue.claim("worker-2") is None
+
+
+def test_retry_waits_for_retry_delay(db, job_id):
+    queue = _queue(db, retry_delay=timedelta(minutes=5))
+    queue.enqueue(job_id, SLOT)
+    run = queue.claim("worker-0")
+    queue.fail(run["id"], "boom")
+    assert queue.claim("worker-0") is None
+    assert _queue(db).claim("worker-0")["id"] == run["id"]
+
+
+def test_expired_lease_is_requeued(db, job_id):
+    queue = _queue(db, max_attempts=1)
+    queue.enqueue(job_id, SLOT)
+    run = queue.claim("worker-0")
+    assert queue.requeue_expired(timedelta(minutes=5)) == 0
+    db.query(JobRun).filter(JobRun.id == run["id"]).update({"claimed_at": datetime.utcnow() - timedelta(minutes=10)})
+    db.commit()
+    assert queue.requeue_expired(timedelta(minutes=5)) == 1
+    # Out of attempts, so the run is failed rather than re-queued
+    expired = db.query(JobRun).filter(JobRun.id == run["id"]).one()
+    assert expired.status == JobRunStatus.FAILED
+    assert expired.error_message == "Worker lease expired"
@@ -0,0 +1,19 @@
+import json
+
+import pytest
+
+from app.utils.json_stream import JsonArrayStream
+
+BODY = json.dumps({"tweets": [{"id": "1"}, {"id": "2"}], "has_next_page": True, "next_cursor": "abc"})
+
+
+def test_iterates_items_and_collects_meta():
+    stream = JsonArrayStream(BODY, "tweets")
+    assert [item["id"] for item in stream] == ["1", "2"]
+    assert stream.meta == {"has_next_page": True, "next_cursor": "abc"}
+
+
+@pytest.mark.parametrize("body", ["", "   ", "{", '{"tweets"', '{"tweets": [', BODY[:len(BODY) // 2], BODY[:-1]])
+def test_truncated_body_raises_value_error(body):
+    with pytest.raises(ValueError):
+        list(JsonArrayStream(body, "tweets"))
@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+
+from app.models import SchedulerLease
+from app.services.leader_election import LeaderLease
+
+
+def test_only_one_instance_holds_the_lease(db):
+    first = LeaderLease(holder_id="a", lease_seconds=30)
+    second = LeaderLease(holder_id="b", lease_seconds=30)
+    assert first.acquire()
+    assert not second.acquire()
+    # The holder renews its own lease
+    assert first.acquire()
+    assert db.query(SchedulerLease).one().holder == "a"
+
+
+def test_expired_lease_is_taken_over(db):
+    first = LeaderLease(holder_id="a", lease_seconds=30)
+    second = LeaderLease(holder_id="b", lease_seconds=30)
+    assert first.acquire()
+    db.query(SchedulerLease).update({"expires_at": datetime.utcnow() - timedelta(seconds=1)})
+    db.commit()
+    assert second.acquire()
+    assert not first.acquire()
+    db.expire_all()
+    assert db.query(SchedulerLease).one().holder == "b"
+
+
+def test_released_lease_is_free_immediately(db):
+    first = LeaderLease(holder_id="a", lease_seconds=30)
+    second = LeaderLease(holder_id="b", lease_seconds=30)
+    assert first.acquire()
+    first.release()
+    assert not first.is_leader
+    assert second.acquire()
@@ -0,0 +1,112 @@
+import runpy
+
+import pytest
+
+from app.services import llm_batcher as llm_batcher_module
+from app.services import rate_limiter as rate_limiter_module
+from app.services.rate_limiter import (
+    PRIORITY_INTERACTIVE,
+    PRIORITY_SCHEDULED,
+    TokenBucketRateLimiter,
+    _Waiter,
+    _default_twitter_rate,
+    rate_limit_processes,
+)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limiter_module, "time", clock)
+    return clock
+
+
+def _enqueue(limiter, priority, label, waiters):
+    waiter = _Waiter()
+    limiter._queue_for(priority).append(waiter)
+    waiters.append((label, waiter))
+
+
+def _granted(waiters):
+    return [label for label, waiter in waiters if waiter.granted]
+
+
+def test_priorities_take_turns(clock):
+    limiter = TokenBucketRateLimiter(rate=1.0, burst=1)
+    waiters = []
+    for idx in range(3):
+        _enqueue(limiter, PRIORITY_SCHEDULED, f"s{idx}", waiters)
+    for idx in range(2):
+        _enqueue(limiter, PRIORITY_INTERACTIVE, f"i{idx}", waiters)
+
+    order = []
+    for _ in range(5):
+        before = set(_granted(waiters))
+        limiter._dispatch()
+        order.extend(label for label in _granted(waiters) if label not in before)
+        clock.now += 1.0
+    assert order == ["i0", "s0", "i1", "s1", "s2"]
+
+
+def test_tokens_refill_at_rate_up_to_burst(clock):
+    limiter = TokenBucketRateLimiter(rate=2.0, burst=3)
+    waiters = []
+    for idx in range(4):
+        _enqueue(limiter, PRIORITY_SCHEDULED, idx, waiters)
+    assert limiter._dispatch() == pytest.approx(0.5)
+    assert _granted(waiters) == [0, 1, 2]
+
+    clock.now += 0.25
+    limiter._dispatch()
+    assert _granted(waiters) == [0, 1, 2]
+    clock.now += 0.25
+    limiter._dispatch()
+    assert _granted(waiters) == [0, 1, 2, 3]
+
+    # An idle bucket never holds more than `burst` tokens
+    clock.now += 60
+    limiter._dispatch()
+    assert limiter._tokens == pytest.approx(3.0)
+
+
+def test_penalize_blocks_until_it_expires(clock):
+    limiter = TokenBucketRateLimiter(rate=1.0, burst=1)
+    limiter.penalize(5)
+    waiters = []
+    _enqueue(limiter, PRIORITY_INTERACTIVE, "i0", waiters)
+    assert limiter._dispatch() == pytest.approx(5.0)
+    clock.now += 5.5
+    limiter._dispatch()
+    assert not _granted(waiters)
+    clock.now += 0.5
+    limiter._dispatch()
+    assert _granted(waiters) == ["i0"]
+
+
+def test_rates_are_divided_across_processes(monkeypatch):
+    monkeypatch.delenv("TWITTER_RATE_LIMIT_PER_SECOND", raising=False)
+    monkeypatch.setenv("TWITTER_MIN_REQUEST_INTERVAL", "5")
+    monkeypatch.delenv("RATE_LIMIT_PROCESSES", raising=False)
+    assert rate_limit_processes() == 1
+    assert _default_twitter_rate() == pytest.approx(0.2)
+
+    monkeypatch.setenv("RATE_LIMIT_PROCESSES", "4")
+    assert _default_twitter_rate() == pytest.approx(0.05)
+    monkeypatch.setenv("TWITTER_RATE_LIMIT_PER_SECOND", "2")
+    assert _default_twitter_rate() == pytest.approx(0.5)
+
+    monkeypatch.setenv("LLM_REQUESTS_PER_MINUTE", "120")
+    # Build the module-level batcher afresh without replacing the shared one
+    batcher = runpy.run_path(llm_batcher_module.__file__)["llm_batcher"]
+    assert batcher.rate_limiter.rate == pytest.approx(0.5)
+
+    monkeypatch.setenv("RATE_LIMIT_PROCESSES", "0")
+    assert rate_limit_processes() == 1
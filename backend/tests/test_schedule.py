@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+from app.utils.schedule import (
+    CATCHUP_COALESCE,
+    CATCHUP_RUN_ONCE,
+    CATCHUP_SKIP,
+    initial_next_run,
+    job_phase_offset,
+    plan_due_run,
+    slot_start,
+)
+
+HOUR = timedelta(hours=1)
+NOW = datetime(2025, 1, 20, 12, 0, 0)
+
+
+def _on_phase(moment, job_id, interval=HOUR):
+    return moment - slot_start(moment - job_phase_offset(job_id, interval), interval) == job_phase_offset(job_id, interval)
+
+
+def test_initial_next_run_follows_last_run():
+    assert initial_next_run("hourly", None, NOW) == NOW + HOUR
+    assert initial_next_run("hourly", NOW - timedelta(minutes=20), NOW) == NOW + timedelta(minutes=40)
+    assert initial_next_run("daily", "2025-01-20T10:00:00Z", NOW) == datetime(2025, 1, 21, 10, 0, 0)
+    # Unknown frequencies fall back to daily
+    assert initial_next_run("weekly", None, NOW) == NOW + timedelta(days=1)
+
+
+def test_initial_next_run_moves_to_phase_without_becoming_due():
+    for job_id in range(1, 50):
+        next_run_at = initial_next_run("hourly", None, NOW, job_id=job_id)
+        assert _on_phase(next_run_at, job_id)
+        assert NOW <= next_run_at <= NOW + HOUR + HOUR / 2
+
+
+def test_on_time_run_keeps_cadence():
+    due_at = NOW - timedelta(minutes=1)
+    assert plan_due_run(due_at, "hourly", NOW) == (True, due_at + HOUR)
+
+
+def test_coalesce_runs_once_and_keeps_cadence():
+    due_at = NOW - timedelta(hours=3, minutes=30)
+    run_now, next_run_at = plan_due_run(due_at, "hourly", NOW, CATCHUP_COALESCE)
+    assert run_now
+    assert next_run_at == NOW + timedelta(minutes=30)
+
+
+def test_run_once_restarts_cadence_from_now():
+    due_at = NOW - timedelta(hours=3, minutes=30)
+    assert plan_due_run(due_at, "hourly", NOW, CATCHUP_RUN_ONCE) == (True, NOW + HOUR)
+
+
+def test_skip_drops_missed_runs():
+    due_at = NOW - timedelta(hours=3, minutes=30)
+    assert plan_due_run(due_at, "hourly", NOW, CATCHUP_SKIP) == (False, NOW + timedelta(minutes=30))
+    # Within the grace period a run is late, not missed
+    assert plan_due_run(NOW - timedelta(minutes=2), "hourly", NOW, CATCHUP_SKIP)[0]
+
+
+def test_runs_delayed_while_online_are_not_missed():
+    due_at = NOW - timedelta(minutes=30)
+    run_now, _ = plan_due_run(due_at, "hourly", NOW, CATCHUP_SKIP, online_since=NOW - HOUR)
+    assert run_now
+    run_now, _ = plan_due_run(due_at, "hourly", NOW, CATCHUP_SKIP, online_since=NOW - timedelta(minutes=10))
+    assert not run_now
+
+
+def test_planned_runs_stay_on_phase_and_in_the_future():
+    for job_id in range(1, 50):
+        for policy in (CATCHUP_COALESCE, CATCHUP_RUN_ONCE, CATCHUP_SKIP):
+            _, next_run_at = plan_due_run(NOW - timedelta(hours=2), "hourly", NOW, policy, job_id=job_id)
+            assert next_run_at > NOW
+            assert _on_phase(next_run_at, job_id)
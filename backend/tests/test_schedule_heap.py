@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from app.utils.schedule_heap import ScheduleHeap
+
+BASE = datetime(2025, 1, 20, 12, 0, 0)
+
+
+def _at(minutes):
+    return BASE + timedelta(minutes=minutes)
+
+
+def test_pops_due_jobs_most_overdue_first():
+    heap = ScheduleHeap()
+    heap.set(1, _at(30))
+    heap.set(2, _at(10))
+    heap.set(3, _at(20))
+    heap.set(4, _at(90))
+    assert heap.next_due() == _at(10)
+    assert heap.pop_due(_at(30)) == [2, 3, 1]
+    assert len(heap) == 1 and 4 in heap
+    assert heap.pop_due(_at(60)) == []
+    assert heap.next_due() == _at(90)
+
+
+def test_pop_due_respects_limit():
+    heap = ScheduleHeap()
+    for job_id in range(5):
+        heap.set(job_id, _at(job_id))
+    assert heap.pop_due(_at(10), limit=2) == [0, 1]
+    assert heap.pop_due(_at(10)) == [2, 3, 4]
+    assert heap.next_due() is None
+
+
+def test_rescheduled_job_only_fires_at_its_new_time():
+    heap = ScheduleHeap()
+    heap.set(1, _at(10))
+    heap.set(2, _at(20))
+    heap.set(1, _at(40))
+    assert len(heap) == 2
+    assert heap.next_due() == _at(20)
+    assert heap.pop_due(_at(30)) == [2]
+    assert heap.pop_due(_at(40)) == [1]
+
+
+def test_discarded_job_is_skipped():
+    heap = ScheduleHeap()
+    heap.set(1, _at(10))
+    heap.set(2, _at(20))
+    heap.discard(1)
+    heap.discard(99)
+    assert 1 not in heap
+    assert heap.next_due() == _at(20)
+    assert heap.pop_due(_at(30)) == [2]
+
+
+def test_reschedules_do_not_grow_the_heap_unbounded():
+    heap = ScheduleHeap()
+    for step in range(5000):
+        heap.set(step % 10, _at(step))
+    assert len(heap) == 10
+    assert len(heap._heap) <= 2 * len(heap) + 1024
+    assert heap.pop_due(_at(5000)) == list(range(10))
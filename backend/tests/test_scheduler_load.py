@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app import scheduler as scheduler_module
+from app.models import Job
+from app.scheduler import JobScheduler
+from app.services.db_storage import DatabaseStorage
+from app.utils.schedule import FREQUENCY_INTERVALS, align_to_phase, job_phase_offset, slot_start
+
+NOW = datetime(2025, 1, 20, 12, 0, 30)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def utcnow(cls):
+        return NOW
+
+
+def test_phase_offset_is_stable_and_within_interval():
+    for interval in FREQUENCY_INTERVALS.values():
+        offsets = [job_phase_offset(job_id, interval) for job_id in range(1, 500)]
+        assert offsets == [job_phase_offset(job_id, interval) for job_id in range(1, 500)]
+        assert all(timedelta(0) <= offset < interval for offset in offsets)
+        # Spread across the interval rather than bunched at the start
+        assert len({offset // (interval / 4) for offset in offsets}) == 4
+
+
+def test_align_to_phase_picks_the_nearest_matching_time():
+    interval = timedelta(hours=1)
+    offset = timedelta(minutes=15)
+    assert align_to_phase(datetime(2025, 1, 20, 12, 10), interval, offset) == datetime(2025, 1, 20, 12, 15)
+    assert align_to_phase(datetime(2025, 1, 20, 12, 50), interval, offset) == datetime(2025, 1, 20, 13, 15)
+    assert align_to_phase(datetime(2025, 1, 20, 12, 15), interval, offset) == datetime(2025, 1, 20, 12, 15)
+
+
+def test_reserve_start_caps_starts_per_slice():
+    job_scheduler = JobScheduler()
+    job_scheduler.slice_seconds = 60
+    job_scheduler.max_starts_per_slice = 3
+    assert [job_scheduler._reserve_start(NOW) for _ in range(4)] == [True, True, True, False]
+    assert not job_scheduler._reserve_start(NOW + timedelta(seconds=20))
+    # A new slice starts with a fresh allowance
+    assert job_scheduler._reserve_start(NOW + timedelta(seconds=40))
+
+    job_scheduler.max_starts_per_slice = 0
+    assert all(job_scheduler._reserve_start(NOW) for _ in range(100))
+
+
+def _brute_force_load(schedule, horizon, slice_length):
+    end = slot_start(NOW + horizon, slice_length)
+    if end < NOW + horizon:
+        end += slice_length
+    counts = {}
+    for next_run_at, frequency in schedule:
+        run_at = max(next_run_at, NOW)
+        while run_at < end:
+            bucket = slot_start(run_at, slice_length).isoformat()
+            counts[bucket] = counts.get(bucket, 0) + 1
+            run_at += FREQUENCY_INTERVALS[frequency]
+    return counts
+
+
+@pytest.mark.parametrize("slice_seconds", [60, 420])
+def test_projected_load_matches_run_by_run_count(db, monkeypatch, slice_seconds):
+    monkeypatch.setattr(scheduler_module, "datetime", FrozenDatetime)
+    storage = DatabaseStorage(db)
+    frequencies = list(FREQUENCY_INTERVALS)
+    schedule = []
+    for idx in range(60):
+        frequency = frequencies[idx % len(frequencies)]
+        # Some overdue, several sharing a slice, some beyond the horizon
+        next_run_at = NOW + timedelta(minutes=(idx * 37) % 1700 - 30, seconds=idx % 3)
+        job = storage.create_job(x_username=f"user{idx}", frequency=frequency, topics=[])
+        db.query(Job).filter(Job.id == job["id"]).update({"next_run_at": next_run_at})
+        schedule.append((next_run_at, frequency))
+    db.commit()
+
+    horizon = timedelta(hours=24)
+    load = JobScheduler().projected_load(horizon, slice_seconds=slice_seconds)
+    expected = _brute_force_load(schedule, horizon, timedelta(seconds=slice_seconds))
+
+    assert {slot["start"]: slot["runs"] for slot in load["slots"]} == expected
+    assert load["total_runs"] == sum(expected.values())
+    assert load["peak_runs"] == max(expected.values())
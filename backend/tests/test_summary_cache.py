@@ -0,0 +1,91 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+
+from app.services.llm_providers import StubProvider
+from app.services.llm_service import LLMService
+from app.services.summary_cache import summary_fingerprint
+from app.utils.tweet_time import tweet_time_range
+
+
+def _tweets(count=3):
+    base = datetime(2024, 12, 10, 7, 0, 30)
+    return [
+        {
+            "tweet_id": uuid.uuid4().hex,
+            "username": "alice",
+            "text": f"tweet {idx} about ai",
+            "timestamp": (base + timedelta(minutes=idx)).strftime("%a %b %d %H:%M:%S +0000 %Y"),
+            "likes": idx,
+            "reposts": 0,
+            "url": f"https://x.com/alice/status/{idx}",
+        }
+        for idx in range(count)
+    ]
+
+
+def test_time_range_depends_only_on_tweets():
+    tweets = _tweets()
+    assert tweet_time_range(tweets) == "2024-12-10 07:00 to 2024-12-10 07:02 UTC"
+    assert tweet_time_range(list(reversed(tweets))) == tweet_time_range(tweets)
+    assert tweet_time_range([{"text": "no timestamp"}]) is None
+
+
+def test_fingerprint_separates_accounts_and_ignores_tweet_order():
+    tweets = _tweets()
+    key = summary_fingerprint(tweets, ["AI"], "en", "m", "1", "alice", "r")
+    assert key == summary_fingerprint(list(reversed(tweets)), ["ai "], "EN", "m", "1", "Alice", "r")
+    assert key != summary_fingerprint(tweets, ["ai"], "en", "m", "1", "bob", "r")
+
+
+def test_second_run_over_same_tweets_hits_cache(db):
+    tweets = _tweets()
+    service = LLMService()
+
+    async def run_twice():
+        # Two scheduled runs: same tweets, fetch windows that differ by a few seconds
+        first = await service.summarize_tweets(tweets, ["ai"], x_username="alice", time_range=tweet_time_range(tweets))
+        second = await service.summarize_tweets(
+            [dict(tweet) for tweet in tweets], ["ai"], x_username="alice", time_range=tweet_time_range(tweets)
+        )
+        return first, second
+
+    first, second = asyncio.run(run_twice())
+    assert not first.get("cached")
+    assert second.get("cached")
+    assert second["summary"] == first["summary"]
+
+
+class _FailingProvider(StubProvider):
+    async def _generate(self, prompt):
+        raise RuntimeError("primary down")
+
+
+def test_fallback_results_are_not_cached(db):
+    tweets = _tweets()
+    service = LLMService()
+    service.providers = [_FailingProvider(), StubProvider("stub-fallback")]
+
+    async def run():
+        first = await service.summarize_tweets(tweets, ["ai"], x_username="alice", time_range="r")
+        second = await service.summarize_tweets(tweets, ["ai"], x_username="alice", time_range="r")
+        events = [event async for event in service.stream_summary(tweets, ["ai"], x_username="alice", time_range="r")]
+        return first, second, events[-1]
+
+    first, second, streamed = asyncio.run(run())
+    assert first.get("fallback") and not first.get("error")
+    assert not second.get("cached")
+    assert streamed.get("fallback") and not streamed.get("cached")
+
+    # Once the primary answers again its result is cached under the primary's key
+    service.providers = [StubProvider()]
+
+    async def recover():
+        return (
+            await service.summarize_tweets(tweets, ["ai"], x_username="alice", time_range="r"),
+            await service.summarize_tweets(tweets, ["ai"], x_username="alice", time_range="r"),
+        )
+
+    fresh, cached = asyncio.run(recover())
+    assert not fresh.get("cached") and not fresh.get("fallback")
+    assert cached.get("cached")
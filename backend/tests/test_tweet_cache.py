@@ -0,0 +1,72 @@
+from datetime import datetime, timedelta
+
+from app.services.tweet_cache import TweetCache
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+def _tweet(tweet_id, minutes_ago):
+    timestamp = NOW - timedelta(minutes=minutes_ago)
+    return {"tweet_id": str(tweet_id), "text": f"tweet {tweet_id}", "timestamp": timestamp.strftime("%a %b %d %H:%M:%S +0000 %Y")}
+
+
+def _ids(tweets):
+    return [tweet["tweet_id"] for tweet in tweets]
+
+
+def test_slice_filters_by_since_and_limit():
+    cache = TweetCache()
+    entry = cache.store("alice", [_tweet(1, 50), _tweet(3, 10), _tweet(2, 30)], NOW - timedelta(hours=1), NOW)
+    assert _ids(cache.slice(entry, NOW - timedelta(hours=1), 10)) == ["3", "2", "1"]
+    assert _ids(cache.slice(entry, NOW - timedelta(minutes=40), 10)) == ["3", "2"]
+    assert _ids(cache.slice(entry, NOW - timedelta(hours=1), 1)) == ["3"]
+    # Callers get copies they can annotate freely
+    cache.slice(entry, NOW - timedelta(hours=1), 10)[0]["username"] = "mallory"
+    assert "username" not in entry.tweets[0]
+
+
+def test_store_merges_tail_into_existing_window():
+    cache = TweetCache()
+    cache.store("Alice", [_tweet(1, 50), _tweet(2, 30)], NOW - timedelta(hours=1), NOW - timedelta(minutes=20))
+    entry = cache.store("@alice", [_tweet(2, 30), _tweet(3, 5)], NOW - timedelta(minutes=20), NOW)
+    assert entry.since == NOW - timedelta(hours=1)
+    assert entry.until == NOW
+    assert _ids(entry.tweets) == ["3", "2", "1"]
+    assert cache.get("ALICE", NOW) is entry
+
+
+def test_truncated_store_covers_only_back_to_oldest_tweet():
+    cache = TweetCache()
+    entry = cache.store("alice", [_tweet(5, 5), _tweet(4, 15)], NOW - timedelta(hours=2), NOW, truncated=True)
+    assert entry.since == NOW - timedelta(minutes=15)
+    # A truncated fetch that returned nothing covers nothing and keeps the old window
+    assert cache.store("alice", [], NOW - timedelta(hours=2), NOW, truncated=True) is entry
+
+
+def test_store_with_gap_replaces_window():
+    cache = TweetCache()
+    cache.store("alice", [_tweet(1, 200)], NOW - timedelta(hours=4), NOW - timedelta(hours=3))
+    entry = cache.store("alice", [_tweet(2, 10)], NOW - timedelta(hours=1), NOW)
+    assert entry.since == NOW - timedelta(hours=1)
+    assert _ids(entry.tweets) == ["2"]
+
+
+def test_entries_expire_after_ttl():
+    cache = TweetCache(ttl_seconds=60, fresh_seconds=10)
+    entry = cache.store("alice", [_tweet(1, 5)], NOW - timedelta(hours=1), NOW)
+    assert cache.is_fresh(entry, NOW + timedelta(seconds=5))
+    assert not cache.is_fresh(entry, NOW + timedelta(seconds=30))
+    assert cache.get("alice", datetime.utcnow() + timedelta(seconds=30)) is entry
+    assert cache.get("alice", datetime.utcnow() + timedelta(seconds=120)) is None
+    assert cache.get("alice") is None
+
+
+def test_window_is_trimmed_and_accounts_evicted():
+    cache = TweetCache(max_accounts=2, max_tweets_per_account=2)
+    entry = cache.store("alice", [_tweet(1, 50), _tweet(2, 30), _tweet(3, 10)], NOW - timedelta(hours=1), NOW)
+    assert _ids(entry.tweets) == ["3", "2"]
+    assert entry.since == NOW - timedelta(minutes=30)
+    cache.store("bob", [], NOW - timedelta(hours=1), NOW)
+    cache.store("carol", [], NOW - timedelta(hours=1), NOW)
+    assert cache.get("alice", NOW) is None
+    assert cache.get("carol", NOW) is not None
@@ -13,6 +13,30 @@ const PLAYGROUND_WINDOW_MS = 24 * 60 * 60 * 1000
 const PLAYGROUND_STORAGE_KEY = 'xtrack_playground_runs'
 const MAX_TASKS_PER_USER = 5
 
+// Read a Server-Sent Events response body, calling onEvent(event, data) per message
+async function readEventStream(response, onEvent) {
+  const reader = response.body.getReader()
+  const decoder = new TextDecoder()
+  let buffer = ''
+  while (true) {
+    const { done, value } = await reader.read()
+    if (done) break
+    buffer += decoder.decode(value, { stream: true })
+    let boundary
+    while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+      const message = buffer.slice(0, boundary)
+      buffer = buffer.slice(boundary + 2)
+      let event = 'message'
+      const dataLines = []
+      for (const line of message.split('\n')) {
+        if (line.startsWith('event:')) event = line.slice(6).trim()
+        else if (line.startsWith('data:')) dataLines.push(line.slice(5).trimStart())
+      }
+      if (dataLines.length) onEvent(event, JSON.parse(dataLines.join('\n')))
+    }
+  }
+}
+
 function MainApp({ showAuthModal, setShowAuthModal, onShowProfile }) {
   const { user } = useAuth();
   const [jobs, setJobs] = useState([])
@@ -242,7 +266,11 @@ function MainApp({ showAuthModal, setShowAuthModal, onShowProfile }) {
     try {
       const response = await axios.post(`${API_BASE}/monitoring/jobs/${jobId}/run`)
       await loadExecutions(jobId)
-      alert('Task completed! Summary generated successfully.')
+      if (response.data?.skipped) {
+        alert('Task completed. No new tweets since the last run, so no summary was generated.')
+      } else {
+        alert('Task completed! Summary generated successfully.')
+      }
     } catch (error) {
       alert('Error running task: ' + (error.response?.data?.detail || error.message))
     } finally {
@@ -396,16 +424,50 @@ function MainApp({ showAuthModal, setShowAuthModal, onShowProfile }) {
     setTestResult(null)
     try {
       const topics = testData.topics.split(',').map(t => t.trim()).filter(t => t)
-      const response = await axios.post(`${API_BASE}/monitoring/test`, {
-        x_username: testData.x_username.trim(),
-        hours_back: parseInt(testData.hours_back) || 24,
-        topics: topics,
-        language: testData.language
+      const hoursBack = parseInt(testData.hours_back) || 24
+      // Streamed variant of /monitoring/test: the summary renders as it is generated
+      const response = await fetch(`${API_BASE}/monitoring/test/stream`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({
+          x_username: testData.x_username.trim(),
+          hours_back: hoursBack,
+          topics: topics,
+          language: testData.language
+        })
+      })
+      if (!response.ok) {
+        const body = await response.json().catch(() => ({}))
+        const error = new Error(body.detail || `Request failed with status ${response.status}`)
+        error.status = response.status
+        throw error
+      }
+      await readEventStream(response, (event, data) => {
+        if (event === 'tweets') {
+          setTestResult({
+            x_username: testData.x_username.trim(),
+            hours_back: hoursBack,
+            topics: topics,
+            tweets_found: data.tweets_found,
+            tweets: data.tweets,
+            summary: ''
+          })
+        } else if (event === 'delta') {
+          setTestResult(prev => prev && { ...prev, summary: prev.summary + data.text })
+        } else if (event === 'done') {
+          setTestResult(prev => prev && {
+            ...prev,
+            summary: data.summary,
+            summary_id: data.summary_id,
+            email_sent: data.email_sent
+          })
+        } else if (event === 'error') {
+          throw new Error(data.detail)
+        }
       })
-      setTestResult(response.data)
     } catch (error) {
-      let errorMessage = error.response?.data?.detail || error.message
-      if (error.response?.status === 429) {
+      let errorMessage = error.message
+      if (error.status === 429 || /rate limit/i.test(errorMessage)) {
         errorMessage = 'Rate limit exceeded. The Twitter API allows 1 request every 5 seconds. Please wait a moment and try again.'
       }
       alert('Error running test: ' + errorMessage)